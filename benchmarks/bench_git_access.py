@@ -0,0 +1,99 @@
+"""
+Benchmarks per-file Git access overhead on a synthetic repository.
+
+Compares the legacy path (`get_file_content_from_commit`, which opens the repo
+and resolves the commit on every call) with `GitObjectReader`, which resolves
+both commits once and reads all blobs through one `git cat-file --batch` stream.
+
+Usage:
+    python -m benchmarks.bench_git_access --files 5000 --legacy-sample 200
+"""
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+import time
+
+from src.utils.git_utils import GitObjectReader, get_file_content_from_commit
+
+FILE_TEMPLATE = '''from flask import Flask, jsonify
+
+app = Flask(__name__)
+
+
+@app.route("/v1/items-{index}")
+def get_items_{index}():
+    return jsonify({{"item_id": {index}, "revision": {revision}}})
+'''
+
+
+def _git(repo_dir: str, *args: str) -> None:
+    subprocess.run(["git", *args], cwd=repo_dir, check=True, capture_output=True)
+
+
+def create_synthetic_repo(repo_dir: str, file_count: int) -> None:
+    """Creates a repository with two commits in which every one of `file_count` Python files changes."""
+    _git(repo_dir, "init", "-q")
+    _git(repo_dir, "config", "user.email", "bench@example.com")
+    _git(repo_dir, "config", "user.name", "bench")
+    for revision in (1, 2):
+        for index in range(file_count):
+            package_dir = os.path.join(repo_dir, "services", f"pkg_{index % 50}")
+            os.makedirs(package_dir, exist_ok=True)
+            with open(os.path.join(package_dir, f"routes_{index}.py"), "w") as f:
+                f.write(FILE_TEMPLATE.format(index=index, revision=revision))
+        _git(repo_dir, "add", "-A")
+        _git(repo_dir, "commit", "-q", "-m", f"revision {revision}")
+
+
+def bench_legacy(repo_dir: str, paths: list[str]) -> float:
+    """Returns seconds per file for the per-call GitPython path (two reads per file, as in main.py before)."""
+    start = time.perf_counter()
+    for path in paths:
+        get_file_content_from_commit(repo_dir, path, "HEAD~1")
+        get_file_content_from_commit(repo_dir, path, "HEAD")
+    return (time.perf_counter() - start) / len(paths)
+
+
+def bench_batched(repo_dir: str) -> tuple[float, int]:
+    """Returns seconds per file, and the file count, for listing plus bulk reading with GitObjectReader."""
+    start = time.perf_counter()
+    with GitObjectReader(repo_dir) as reader:
+        changed = reader.changed_files("HEAD~1", "HEAD")
+        blobs = reader.read_blobs([sha for f in changed for sha in (f.old_sha, f.new_sha)])
+    elapsed = time.perf_counter() - start
+    assert len(blobs) == 2 * len(changed)
+    return elapsed / len(changed), len(changed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-file Git access overhead.")
+    parser.add_argument('--files', type=int, default=2000, help="Number of changed files in the synthetic repo. Defaults to 2000.")
+    parser.add_argument('--legacy-sample', type=int, default=200, help="Files timed with the slow legacy path. Defaults to 200.")
+    parser.add_argument('--output', type=str, help="Optional path to write the results as JSON.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as repo_dir:
+        print(f"Creating synthetic repository with {args.files} changed files...")
+        create_synthetic_repo(repo_dir, args.files)
+
+        batched, file_count = bench_batched(repo_dir)
+        with GitObjectReader(repo_dir) as reader:
+            sample = [f.path for f in reader.changed_files("HEAD~1", "HEAD")[:args.legacy_sample]]
+        legacy = bench_legacy(repo_dir, sample)
+
+    results = {
+        "changed_files": file_count,
+        "legacy_ms_per_file": round(legacy * 1000, 3),
+        "batched_ms_per_file": round(batched * 1000, 3),
+        "speedup": round(legacy / batched, 1),
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Benchmarks the end-to-end validation pipeline offline.
+
+Swaps the Azure model for the deterministic fake LLM (`LLM_BACKEND=fake`) with
+a configurable latency and runs `run_validation_from_git` on a synthetic
+repository in which every file changes some Flask routes. Reports files/sec,
+per-node latency percentiles (from the per-file `trace.json` files), peak RSS
+and the startup time of `main.py`, `ingest.py` and the compiled graph.
+
+Results are saved as JSON; pass `--baseline` with an earlier result file to
+flag regressions.
+
+Usage:
+    python -m benchmarks.bench_pipeline --files 50 --workers 4 --llm-latency-ms 200
+"""
+import argparse
+import datetime
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+from benchmarks.bench_git_access import _git
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+# A metric that gets worse by more than this fraction is reported as a regression
+REGRESSION_THRESHOLD = 0.10
+
+ROUTE_TEMPLATE = '''
+
+@app.route("/v1/{resource}-{index}/<int:item_id>")
+def get_{resource}_{index}(item_id):
+    return jsonify({{"{key}": item_id, "revision": {revision}}})
+'''
+
+
+def create_route_repo(repo_dir: str, file_count: int, routes_per_file: int) -> None:
+    """
+    Creates a repository with two commits. In the second one every file gains a
+    route and changes the JSON keys of its existing routes.
+    """
+    _git(repo_dir, "init", "-q")
+    _git(repo_dir, "config", "user.email", "bench@example.com")
+    _git(repo_dir, "config", "user.name", "bench")
+    for revision in (1, 2):
+        for index in range(file_count):
+            package_dir = os.path.join(repo_dir, "services", f"pkg_{index % 20}")
+            os.makedirs(package_dir, exist_ok=True)
+            source = "from flask import Flask, jsonify\n\napp = Flask(__name__)\n"
+            for route in range(routes_per_file + revision - 1):
+                source += ROUTE_TEMPLATE.format(
+                    resource=f"items{route}", index=index, revision=revision,
+                    key="item_id" if revision == 1 else "itemId",
+                )
+            with open(os.path.join(package_dir, f"routes_{index}.py"), "w") as f:
+                f.write(source)
+        _git(repo_dir, "add", "-A")
+        _git(repo_dir, "commit", "-q", "-m", f"revision {revision}")
+
+
+def _percentiles(samples: list[float]) -> dict:
+    samples_ms = sorted(s * 1000 for s in samples)
+    pick = lambda q: round(samples_ms[min(len(samples_ms) - 1, int(q * len(samples_ms)))], 3)
+    return {"count": len(samples_ms), "p50_ms": pick(0.50), "p90_ms": pick(0.90), "p99_ms": pick(0.99), "max_ms": round(samples_ms[-1], 3)}
+
+
+def measure_startup(args: list[str], runs: int) -> dict:
+    """Runs a command `runs` times in a fresh interpreter; returns its wall time and peak RSS."""
+    times, peak_rss_kb = [], 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, *args], cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        _, status, usage = os.wait4(process.pid, 0)
+        times.append(time.perf_counter() - start)
+        peak_rss_kb = max(peak_rss_kb, usage.ru_maxrss)
+        if os.waitstatus_to_exitcode(status) != 0:
+            raise RuntimeError(f"Startup command failed: {' '.join(args)}")
+    return {"min_s": round(min(times), 4), "median_s": round(sorted(times)[len(times) // 2], 4), "peak_rss_mb": round(peak_rss_kb / 1024, 1)}
+
+
+def node_latencies(output_root: str) -> dict:
+    """Collects per-node, LLM and retrieval latency percentiles from every `trace.json` of a run."""
+    samples = defaultdict(list)
+    for trace_path in glob.glob(os.path.join(output_root, "*", "trace.json")):
+        with open(trace_path) as f:
+            for event in json.load(f)["events"]:
+                if "duration_s" in event:
+                    samples[f"{event['kind']}:{event['name']}"].append(event["duration_s"])
+    return {key: _percentiles(values) for key, values in sorted(samples.items())}
+
+
+def compare_to_baseline(results: dict, baseline: dict) -> list[str]:
+    """Returns a description of every tracked metric that regressed against the baseline."""
+    checks = [("files_per_sec", results["files_per_sec"], baseline.get("files_per_sec"), True)]
+    for key, stats in results["latency"].items():
+        previous = baseline.get("latency", {}).get(key)
+        if previous:
+            checks.append((f"{key} p90", stats["p90_ms"], previous["p90_ms"], False))
+    checks.append(("peak_rss_mb", results["peak_rss_mb"], baseline.get("peak_rss_mb"), False))
+
+    regressions = []
+    for name, current, previous, higher_is_better in checks:
+        if not previous:
+            continue
+        change = (current - previous) / previous
+        if (-change if higher_is_better else change) > REGRESSION_THRESHOLD:
+            regressions.append(f"{name}: {previous} -> {current} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the validation pipeline offline with a fake LLM.")
+    parser.add_argument('--files', type=int, default=50, help="Number of changed files in the synthetic repo. Defaults to 50.")
+    parser.add_argument('--routes-per-file', type=int, default=3, help="Routes per file before the change. Defaults to 3.")
+    parser.add_argument('--workers', type=int, default=4, help="Files processed in parallel. Defaults to 4.")
+    parser.add_argument('--validation-mode', type=str, default="concurrent", help="Validator mode. Defaults to concurrent.")
+    parser.add_argument('--max-concurrency', type=int, default=5, help="In-flight rule checks per unit. Defaults to 5.")
+    parser.add_argument('--llm-latency-ms', type=float, default=200.0, help="Simulated latency of each fake LLM call. Defaults to 200.")
+    parser.add_argument('--startup-runs', type=int, default=3, help="Fresh-interpreter runs per startup measurement. Defaults to 3.")
+    parser.add_argument('--warm-caches', action='store_true', help="Keep the LLM, retrieval and verdict caches enabled.")
+    parser.add_argument('--output', type=str, help=f"Path of the JSON results. Defaults to a timestamped file in {RESULTS_DIR}.")
+    parser.add_argument('--baseline', type=str, help="Earlier results file to compare against.")
+    args = parser.parse_args()
+
+    # Configure the fake model (and cold caches) before the pipeline modules read the environment
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ["FAKE_LLM_LATENCY_MS"] = str(args.llm_latency_ms)
+    if not args.warm_caches:
+        for variable in ("LLM_CACHE_DISABLED", "RETRIEVAL_CACHE_DISABLED", "VERDICT_CACHE_DISABLED"):
+            os.environ[variable] = "1"
+
+    print("Measuring startup times...")
+    startup = {
+        "main.py": measure_startup(["main.py", "--help"], args.startup_runs),
+        "ingest.py": measure_startup(["ingest.py", "--help"], args.startup_runs),
+    }
+
+    start = time.perf_counter()
+    from main import run_validation_from_git
+    from src.graph.workflow import create_governance_graph
+    app = create_governance_graph(validation_mode=args.validation_mode, max_concurrency=args.max_concurrency)
+    startup["graph"] = {"import_and_compile_s": round(time.perf_counter() - start, 4)}
+
+    with tempfile.TemporaryDirectory() as repo_dir, tempfile.TemporaryDirectory() as output_root:
+        print(f"Creating synthetic repository with {args.files} changed files...")
+        create_route_repo(repo_dir, args.files, args.routes_per_file)
+
+        start = time.perf_counter()
+        output_dirs = run_validation_from_git(
+            repo_dir, "HEAD~1", "HEAD", workers=args.workers, validation_mode=args.validation_mode,
+            max_concurrency=args.max_concurrency, app=app, output_root=output_root,
+        )
+        elapsed = time.perf_counter() - start
+        latency = node_latencies(output_root)
+
+    results = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "config": vars(args),
+        "files": len(output_dirs),
+        "wall_time_s": round(elapsed, 3),
+        "files_per_sec": round(len(output_dirs) / elapsed, 3),
+        "latency": latency,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "startup": startup,
+    }
+    print(json.dumps({k: v for k, v in results.items() if k != "config"}, indent=2))
+
+    output = args.output or os.path.join(RESULTS_DIR, f"pipeline_{datetime.datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to: {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(results, json.load(f))
+        if regressions:
+            print("Regressions against the baseline:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Exercises the rate-limited LLM client against a local fake Azure OpenAI endpoint.
+
+The fake endpoint serves chat completions but only allows `--server-capacity`
+requests in flight and `--server-rpm` requests per minute. Excess requests get
+`429 Too Many Requests` with a `Retry-After` header, and a fraction of requests
+fail with a 500. The benchmark fires concurrent requests through `create_llm()`
+and reports throughput, each server's view of the traffic and the router's
+per-deployment metrics. With `--deployments N`, N fake endpoints are started
+and registered as deployments of one tier, to show aggregate throughput and failover.
+
+Usage:
+    python -m benchmarks.bench_rate_limit --requests 200 --threads 32 --server-capacity 8
+    python -m benchmarks.bench_rate_limit --requests 400 --threads 64 --deployments 3
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeAzureOpenAIServer:
+    """A local stand-in for an Azure OpenAI deployment that enforces a concurrency and RPM quota."""
+
+    def __init__(self, capacity: int, rpm: int, latency_s: float, error_rate: float, retry_after_s: int = 1):
+        self.capacity = capacity
+        self.rpm = rpm
+        self.latency_s = latency_s
+        self.error_rate = error_rate
+        self.retry_after_s = retry_after_s
+        self.stats = {"served": 0, "throttled": 0, "server_errors": 0, "peak_in_flight": 0}
+        self._in_flight = 0
+        self._window = []
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def _admit(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._window = [t for t in self._window if now - t < 60]
+            if self._in_flight >= self.capacity or (self.rpm and len(self._window) >= self.rpm):
+                self.stats["throttled"] += 1
+                return False
+            self._window.append(now)
+            self._in_flight += 1
+            self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self._in_flight)
+            return True
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, body: dict, headers: dict = None) -> None:
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if not server._admit():
+                    self._reply(429, {"error": {"code": "429", "message": "Rate limit exceeded."}},
+                                {"Retry-After": str(server.retry_after_s)})
+                    return
+                try:
+                    time.sleep(server.latency_s)
+                    if random.random() < server.error_rate:
+                        with server._lock:
+                            server.stats["server_errors"] += 1
+                        self._reply(500, {"error": {"code": "500", "message": "Internal server error."}})
+                        return
+                    with server._lock:
+                        server.stats["served"] += 1
+                    self._reply(200, {
+                        "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()), "model": "fake",
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": "Compliant: Synthetic verdict."}}],
+                        "usage": {"prompt_tokens": 50, "completion_tokens": 5, "total_tokens": 55},
+                    })
+                finally:
+                    with server._lock:
+                        server._in_flight -= 1
+
+        return Handler
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the rate-limited LLM client against a fake 429-returning endpoint.")
+    parser.add_argument('--requests', type=int, default=200, help="Number of LLM calls. Defaults to 200.")
+    parser.add_argument('--threads', type=int, default=32, help="Client threads issuing calls. Defaults to 32.")
+    parser.add_argument('--server-capacity', type=int, default=8, help="Requests the fake endpoint allows in flight. Defaults to 8.")
+    parser.add_argument('--server-rpm', type=int, default=0, help="Requests per minute the fake endpoint allows (0 = unlimited). Defaults to 0.")
+    parser.add_argument('--server-latency-ms', type=float, default=50.0, help="Fake endpoint latency. Defaults to 50.")
+    parser.add_argument('--error-rate', type=float, default=0.02, help="Fraction of requests failing with a 500. Defaults to 0.02.")
+    parser.add_argument('--deployments', type=int, default=1, help="Number of fake endpoints routed as one tier. Defaults to 1.")
+    parser.add_argument('--output', type=str, help="Optional path to write the results as JSON.")
+    args = parser.parse_args()
+
+    with ExitStack() as stack:
+        servers = [
+            stack.enter_context(FakeAzureOpenAIServer(args.server_capacity, args.server_rpm, args.server_latency_ms / 1000, args.error_rate))
+            for _ in range(args.deployments)
+        ]
+        os.environ.update({
+            "LLM_BACKEND": "azure",
+            "OPENAI_API_KEY": "fake-key",
+            "API_AZURE_ENDPOINT": servers[0].url,
+            "API_AZURE_MODEL_DEPLOYMENT": "fake-deployment",
+            "API_ENDPOINT_VERSION": "2024-06-01",
+        })
+        if args.deployments > 1:
+            deployments_file = stack.enter_context(tempfile.NamedTemporaryFile("w", suffix=".json"))
+            json.dump({"deployments": [
+                {"name": f"fake-{i}", "endpoint": server.url, "tier": "default"} for i, server in enumerate(servers)
+            ]}, deployments_file)
+            deployments_file.flush()
+            os.environ["LLM_DEPLOYMENTS_FILE"] = deployments_file.name
+        from src.llm.model import create_llm
+        from src.llm.router import router_metrics
+        llm = create_llm(use_cache=False)
+
+        def call(i: int) -> bool:
+            try:
+                llm.invoke(f"Request {i}: does this code comply?")
+                return True
+            except Exception as e:
+                print(f"Request {i} failed: {e}")
+                return False
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as executor:
+            succeeded = sum(executor.map(call, range(args.requests)))
+        elapsed = time.perf_counter() - start
+
+    results = {
+        "requests": args.requests,
+        "succeeded": succeeded,
+        "wall_time_s": round(elapsed, 3),
+        "requests_per_sec": round(succeeded / elapsed, 2),
+        "servers": [server.stats for server in servers],
+        "deployments": router_metrics(),
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmarks the Chroma and NumPy retriever backends on a synthetic corpus.
+
+Random unit vectors stand in for MiniLM embeddings so the benchmark measures
+the vector stores alone, without loading the embedding model.
+
+Usage:
+    python -m benchmarks.bench_retrieval --chunks 50 --queries 200
+"""
+import argparse
+import json
+import statistics
+import tempfile
+import time
+
+import numpy as np
+from langchain_community.vectorstores import Chroma
+
+from src.utils.numpy_index import INDEX_DTYPES, NumpyVectorIndex, write_numpy_index
+
+EMBEDDING_DIM = 384 # all-MiniLM-L6-v2
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def _percentiles(samples: list[float]) -> dict:
+    samples_ms = sorted(s * 1000 for s in samples)
+    return {
+        "p50_ms": round(statistics.median(samples_ms), 4),
+        "p95_ms": round(samples_ms[int(0.95 * (len(samples_ms) - 1))], 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Chroma vs NumPy retrieval.")
+    parser.add_argument('--chunks', type=int, default=50, help="Number of policy chunks in the corpus. Defaults to 50.")
+    parser.add_argument('--queries', type=int, default=200, help="Number of queries to time. Defaults to 200.")
+    parser.add_argument('--k', type=int, default=5, help="Results per query. Defaults to 5.")
+    parser.add_argument('--output', type=str, help="Optional path to write the results as JSON.")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((args.chunks, EMBEDDING_DIM)).astype(np.float32)
+    queries = rng.standard_normal((args.queries, EMBEDDING_DIM)).astype(np.float32)
+    ids = [f"chunk-{i}" for i in range(args.chunks)]
+    documents = [f"Policy chunk {i}" for i in range(args.chunks)]
+    metadatas = [{"category": f"Category {i % 6}"} for i in range(args.chunks)]
+    results = {"chunks": args.chunks, "queries": args.queries, "k": args.k}
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = Chroma(persist_directory=directory, embedding_function=None)
+        store._collection.add(ids=ids, embeddings=embeddings.tolist(), documents=documents, metadatas=metadatas)
+        for dtype in INDEX_DTYPES:
+            write_numpy_index(f"{directory}/{dtype}", ids, embeddings, documents, metadatas, dtype=dtype)
+        del store
+
+        store, load_time = _timed(lambda: Chroma(persist_directory=directory, embedding_function=None))
+        latencies = [_timed(lambda: store.similarity_search_by_vector(q.tolist(), k=args.k))[1] for q in queries]
+        results["chroma"] = {"load_ms": round(load_time * 1000, 3), **_percentiles(latencies)}
+
+        for dtype in INDEX_DTYPES:
+            index, load_time = _timed(lambda: NumpyVectorIndex(f"{directory}/{dtype}"))
+            latencies = [_timed(lambda: index.search(q, args.k))[1] for q in queries]
+            _, batch_time = _timed(lambda: index.search(queries, args.k))
+            results[f"numpy_{dtype}"] = {
+                "load_ms": round(load_time * 1000, 3),
+                **_percentiles(latencies),
+                "batched_ms_per_query": round(batch_time * 1000 / args.queries, 4),
+            }
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
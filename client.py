@@ -0,0 +1,88 @@
+"""
+Thin CI client for the validation service started with `python server.py`.
+
+Uses only the standard library so it starts instantly; all models stay warm in
+the server process.
+"""
+import argparse
+import json
+import sys
+import time
+import urllib.error
+import urllib.request
+
+DEFAULT_SERVER_URL = "http://127.0.0.1:8765"
+
+
+def _request(method: str, url: str, body: dict = None) -> tuple[int, dict, dict]:
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read()), dict(response.headers)
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"{}"), dict(e.headers)
+
+
+def submit_job(server_url: str, job: dict, max_wait: float) -> str:
+    """Submits a job, waiting and retrying while the server applies backpressure."""
+    deadline = time.monotonic() + max_wait
+    while True:
+        status, body, headers = _request("POST", f"{server_url}/jobs", job)
+        if status == 202:
+            return body["job_id"]
+        if status != 503 or time.monotonic() > deadline:
+            raise RuntimeError(f"Job submission failed ({status}): {body.get('error')}")
+        retry_after = float(headers.get("Retry-After", 5))
+        print(f"Server is busy, retrying in {retry_after:.0f}s...", file=sys.stderr)
+        time.sleep(retry_after)
+
+
+def wait_for_job(server_url: str, job_id: str, poll_interval: float, max_wait: float) -> dict:
+    """Polls a job until it has finished and returns its final status."""
+    deadline = time.monotonic() + max_wait
+    while True:
+        status, body, _ = _request("GET", f"{server_url}/jobs/{job_id}")
+        if status != 200:
+            raise RuntimeError(f"Could not fetch job {job_id} ({status}): {body.get('error')}")
+        if body["status"] in ("done", "failed"):
+            return body
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Job {job_id} did not finish within {max_wait:.0f}s.")
+        time.sleep(poll_interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Submit a validation job to a running API Governance server.")
+    parser.add_argument('--server-url', type=str, default=DEFAULT_SERVER_URL, help=f"Base URL of the server. Defaults to {DEFAULT_SERVER_URL}.")
+    parser.add_argument('--repo-path', type=str, help="The absolute path to the local Git repository to check (as seen by the server).")
+    parser.add_argument('--dir-path', type=str, default=".", help="Optional: A specific directory path within the repository to analyze.")
+    parser.add_argument('--old-commit', type=str, help="The old commit hash or reference.")
+    parser.add_argument('--new-commit', type=str, help="The new commit hash or reference.")
+    parser.add_argument('--old-file', type=str, help="Validate a code pair instead: path to the old version of a file.")
+    parser.add_argument('--new-file', type=str, help="Validate a code pair instead: path to the new version of a file.")
+    parser.add_argument('--poll-interval', type=float, default=2.0, help="Seconds between status polls. Defaults to 2.")
+    parser.add_argument('--timeout', type=float, default=3600.0, help="Maximum seconds to wait for the job. Defaults to 3600.")
+    args = parser.parse_args()
+
+    if args.repo_path and args.old_commit and args.new_commit:
+        job = {"repo_path": args.repo_path, "old_commit": args.old_commit, "new_commit": args.new_commit, "dir_path": args.dir_path}
+    elif args.new_file:
+        old_code = ""
+        if args.old_file:
+            with open(args.old_file) as f:
+                old_code = f.read()
+        with open(args.new_file) as f:
+            job = {"old_code": old_code, "new_code": f.read()}
+    else:
+        parser.error("Provide --repo-path, --old-commit and --new-commit, or --new-file (and optionally --old-file).")
+
+    job_id = submit_job(args.server_url, job, args.timeout)
+    print(f"Submitted job {job_id}", file=sys.stderr)
+    result = wait_for_job(args.server_url, job_id, args.poll_interval, args.timeout)
+    print(json.dumps(result, indent=2))
+    sys.exit(0 if result["status"] == "done" else 1)
+
+
+if __name__ == "__main__":
+    main()
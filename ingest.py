@@ -1,5 +1,8 @@
 import os
 import re
+import argparse
+import glob
+import hashlib
 from langchain_community.document_loaders import TextLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_openai import OpenAIEmbeddings
@@ -7,87 +10,202 @@ from langchain_community.vectorstores import Chroma
 from langchain_core.documents import Document
 from sentence_transformers import SentenceTransformer
 from langchain_huggingface import HuggingFaceEmbeddings
+from src.utils.numpy_index import INDEX_DTYPES, write_numpy_index
+from src.utils.retrieval_cache import CORPUS_VERSION_FILE
+from src.utils.rule_checks import split_rules
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
 # --- Configuration ---
-POLICY_FILE = "data/api_governance_policies.md"
+POLICY_DIR = "data"
 VECTOR_STORE_DIR = "db"
 CHUNK_SIZE = 500
 CHUNK_OVERLAP = 50
 
-# --- Get API Key ---
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-    raise ValueError("OPENAI_API_KEY not found in environment variables.")
-
-# --- 1. Load Document ---
-print(f"Loading document: {POLICY_FILE}")
-loader = TextLoader(POLICY_FILE)
-document = loader.load()
-
-# The document is a single large string. We need to split it by category.
-doc_content = document[0].page_content
-
-# --- 2. Split Document by Category and Create Chunks ---
-print("Splitting document into chunks by category...")
-# Regex to split by markdown H1 headers (# Header)
-sections = re.split(r'\n# ', doc_content)
-if sections[0].startswith('# '):
-    sections[0] = sections[0][2:] # Clean up the very first header
-else:
-    sections.pop(0) # Remove any leading empty string
-
-all_chunks = []
-text_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=CHUNK_SIZE,
-    chunk_overlap=CHUNK_OVERLAP,
-    length_function=len,
-)
-
-for section in sections:
-    if not section.strip():
-        continue
-    
-    # The category is the first line of the section
-    lines = section.split('\n')
-    category_title = lines[0].strip()
-    category_content = '\n'.join(lines[1:]).strip()
-
-    # Split the content of this category into chunks
-    chunks = text_splitter.split_text(category_content)
-    
-    # Create Document objects with metadata for each chunk
-    for chunk in chunks:
-        all_chunks.append(
-            Document(
-                page_content=chunk, 
-                metadata={"category": category_title, "source": POLICY_FILE}
-            )
-        )
-
-print(f"Created {len(all_chunks)} chunks from {len(sections)} categories.")
-
-# --- 3. Create Embeddings and Store in ChromaDB ---
-# Before creating new embeddings, let's clear the old vector store directory
-if os.path.exists(VECTOR_STORE_DIR):
-    import shutil
-    print(f"Removing old vector store directory: {VECTOR_STORE_DIR}")
-    shutil.rmtree(VECTOR_STORE_DIR)
-
-print("Creating embeddings and storing in ChromaDB...")
-#embeddings = OpenAIEmbeddings(model="text-embedding-3-large",api_key=api_key)
-embeddings = HuggingFaceEmbeddings(
-    model_name="sentence-transformers/all-MiniLM-L6-v2"
-)
-# Create a new Chroma DB from the prepared chunks
-vector_store = Chroma.from_documents(
-    documents=all_chunks,
-    embedding=embeddings,
-    persist_directory=VECTOR_STORE_DIR
-)
-
-print(f"Successfully ingested data and saved vector store to: {VECTOR_STORE_DIR}")
-print("--- Ingestion Complete ---")
\ No newline at end of file
+
+def discover_policy_files(policy_dir: str = POLICY_DIR) -> list[str]:
+    """Returns every markdown policy file under `policy_dir`, in a stable order."""
+    return sorted(glob.glob(os.path.join(policy_dir, "**", "*.md"), recursive=True))
+
+
+def chunk_id(chunk: Document) -> str:
+    """Returns a stable ID for a chunk: a hash of its content and category."""
+    payload = f"{chunk.metadata['category']}\n{chunk.page_content}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def split_policy_file(policy_file: str, text_splitter: RecursiveCharacterTextSplitter) -> list[Document]:
+    """
+    Loads a policy markdown file and splits it into chunks tagged with their category.
+
+    Every `**Rule X.Y:**` bullet becomes its own chunk with a `rule_id` in its
+    metadata, so each rule is retrieved and validated on its own. Any other text
+    in a category is chunked by size.
+    """
+    loader = TextLoader(policy_file)
+    document = loader.load()
+
+    # The document is a single large string. We need to split it by category.
+    doc_content = document[0].page_content
+
+    # Regex to split by markdown H1 headers (# Header)
+    sections = re.split(r'\n# ', doc_content)
+    if sections[0].startswith('# '):
+        sections[0] = sections[0][2:] # Clean up the very first header
+    else:
+        sections.pop(0) # Remove any leading empty string
+
+    chunks = []
+    for section in sections:
+        if not section.strip():
+            continue
+
+        # The category is the first line of the section
+        lines = section.split('\n')
+        category_title = lines[0].strip()
+        category_content = '\n'.join(lines[1:]).strip()
+
+        # Split the content of this category into one chunk per rule
+        # and create Document objects with metadata for each chunk
+        for rule_id, rule_text in split_rules(category_content):
+            metadata = {"category": category_title, "source": policy_file}
+            if rule_id:
+                metadata["rule_id"] = rule_id
+                chunks.append(Document(page_content=rule_text, metadata=metadata))
+            else:
+                chunks.extend(
+                    Document(page_content=chunk, metadata=dict(metadata))
+                    for chunk in text_splitter.split_text(rule_text)
+                )
+    return chunks
+
+
+def load_policy_chunks(policy_files: list[str]) -> dict[str, Document]:
+    """
+    Splits all policy files into chunks keyed by their content hash. Identical
+    chunks found in several files (e.g. the combined policy file and the per-topic
+    files) are stored once, attributed to the first file they appear in.
+    """
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        length_function=len,
+    )
+
+    chunks = {}
+    for policy_file in policy_files:
+        print(f"Loading document: {policy_file}")
+        for chunk in split_policy_file(policy_file, text_splitter):
+            chunks.setdefault(chunk_id(chunk), chunk)
+    return chunks
+
+
+def sync_vector_store(vector_store: Chroma, chunks: dict[str, Document]) -> dict:
+    """
+    Upserts new chunks into the vector store and deletes chunks that no longer
+    exist, leaving unchanged chunks (and their embeddings) untouched.
+
+    Returns:
+        dict: The IDs that were added, removed and left unchanged.
+    """
+    existing_ids = set(vector_store.get(include=[])["ids"])
+    current_ids = set(chunks)
+
+    added = sorted(current_ids - existing_ids)
+    removed = sorted(existing_ids - current_ids)
+    unchanged = sorted(current_ids & existing_ids)
+
+    # Add before deleting so running validators never see an empty store
+    if added:
+        vector_store.add_documents([chunks[i] for i in added], ids=added)
+    if removed:
+        vector_store.delete(ids=removed)
+
+    return {"added": added, "removed": removed, "unchanged": unchanged}
+
+
+def export_numpy_index(vector_store: Chroma, dtype: str) -> str:
+    """
+    Writes the collection's existing embeddings to the memory-mapped NumPy index
+    used by the "numpy" retriever backend. Nothing is re-embedded.
+    """
+    contents = vector_store.get(include=["embeddings", "documents", "metadatas"])
+    return write_numpy_index(
+        VECTOR_STORE_DIR,
+        ids=contents["ids"],
+        embeddings=contents["embeddings"],
+        documents=contents["documents"],
+        metadatas=contents["metadatas"],
+        dtype=dtype,
+    )
+
+
+def write_corpus_version(chunk_ids: list[str]) -> str:
+    """
+    Records a version ID for the ingested corpus (a hash of all chunk IDs). The
+    retrieval cache keys results by it, so any policy change invalidates them.
+    """
+    version = hashlib.sha256("\n".join(sorted(chunk_ids)).encode("utf-8")).hexdigest()[:16]
+    with open(os.path.join(VECTOR_STORE_DIR, CORPUS_VERSION_FILE), "w") as f:
+        f.write(version)
+    return version
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest API governance policies into the vector store.")
+    parser.add_argument(
+        '--index-dtype',
+        choices=INDEX_DTYPES,
+        default="float32",
+        help="Precision of the NumPy vector index written next to the Chroma store. Defaults to float32."
+    )
+    args = parser.parse_args()
+
+    # --- Get API Key ---
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY not found in environment variables.")
+
+    # --- 1. Load and Chunk Documents by Category ---
+    policy_files = discover_policy_files()
+    print(f"Found {len(policy_files)} policy files under '{POLICY_DIR}'.")
+    chunks = load_policy_chunks(policy_files)
+    print(f"Created {len(chunks)} unique chunks.")
+
+    # --- 2. Sync Embeddings into ChromaDB ---
+    print("Syncing embeddings with ChromaDB...")
+    #embeddings = OpenAIEmbeddings(model="text-embedding-3-large",api_key=api_key)
+    embeddings = HuggingFaceEmbeddings(
+        model_name="sentence-transformers/all-MiniLM-L6-v2"
+    )
+    # Open (or create) the persistent store and only embed what changed
+    vector_store = Chroma(
+        persist_directory=VECTOR_STORE_DIR,
+        embedding_function=embeddings
+    )
+    changes = sync_vector_store(vector_store, chunks)
+
+    print(f"Added {len(changes['added'])} chunks, removed {len(changes['removed'])}, "
+          f"{len(changes['unchanged'])} unchanged.")
+    for chunk_hash in changes["added"]:
+        chunk = chunks[chunk_hash]
+        print(f"  + [{chunk.metadata['category']}] {chunk.page_content.splitlines()[0][:80]}")
+    for chunk_hash in changes["removed"]:
+        print(f"  - {chunk_hash[:12]}")
+
+    # --- 3. Export the NumPy Index ---
+    index_path = export_numpy_index(vector_store, args.index_dtype)
+    print(f"Wrote {args.index_dtype} NumPy vector index to: {index_path}")
+
+    # --- 4. Record the Corpus Version ---
+    version = write_corpus_version(list(chunks))
+    print(f"Policy corpus version: {version}")
+
+    print(f"Successfully ingested data and saved vector store to: {VECTOR_STORE_DIR}")
+    print("--- Ingestion Complete ---")
+
+
+if __name__ == "__main__":
+    main()
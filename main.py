@@ -1,62 +1,388 @@
 import argparse
 import datetime
-from src.graph.workflow import create_governance_graph
+import math
+import queue
+import sqlite3
+import threading
+from typing import Iterator
+from src.graph.workflow import create_governance_graph, results_version
 from src.graph.state import GovernanceState
-from src.utils.git_utils import get_file_content_from_commit, get_changed_files_in_dir
+from src.agents.validator import VALIDATION_MODES
+from src.agents.reporter import RUN_REPORT_FILE, ReporterAgent
+from src.utils.git_utils import ChangedFile, GitObjectReader
+from src.llm.cache import get_llm_cache
+from src.llm.router import router_metrics
+from src.utils.vector_store import get_retrieval_cache
+from src.utils.verdict_cache import get_verdict_cache
+from src.utils.tracing import RUN_TRACE_FILE, TRACE_FILE, RunTraceSummary, Trace, use_trace
+from src.utils.run_manifest import CHECKPOINT_DB_FILE, DONE, FAILED, RUNNING, SKIPPED, RunManifest
+from src.utils.relevance import FileRelevance, RelevanceFilter, format_relevance
+from src.utils.result_store import ResultStore, get_result_store
+from src.utils.retrieval_cache import read_corpus_version
+from src.utils.verdicts import SARIF_FILE, VERDICTS_FILE, read_verdicts, relocate_verdicts, write_verdicts
+from src.utils.vector_store import VECTOR_STORE_DIR
+from langgraph.checkpoint.sqlite import SqliteSaver
+import json
 import os
+import time
+import subprocess
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def run_validation_from_git(repo_path: str, old_commit: str, new_commit: str, dir_path: str = "."):
+# Changed files whose blobs are read from the `cat-file` stream at a time
+READ_BATCH_SIZE = 16
+# Files that may wait between two pipeline stages, per worker of the receiving stage
+QUEUE_DEPTH_PER_WORKER = 2
+
+def iter_changed_files(reader: GitObjectReader, changed_files: list[ChangedFile], relevance_filter: RelevanceFilter,
+                       batch_size: int = READ_BATCH_SIZE) -> Iterator[tuple[ChangedFile, FileRelevance, str, str]]:
+    """
+    Lazily reads and scores changed files, one batch of blobs at a time, so only a
+    few files' contents are held in memory however many files changed.
+
+    Files excluded by the filter's globs are yielded without reading their content.
+
+    Yields:
+        tuple[ChangedFile, FileRelevance, str, str]: Each file with its relevance and its old and new content.
+    """
+    for start in range(0, len(changed_files), batch_size):
+        batch = changed_files[start:start + batch_size]
+        excluded = {changed_file.path: relevance_filter.excluded(changed_file.path) for changed_file in batch}
+        blobs = reader.read_blobs([sha for changed_file in batch if excluded[changed_file.path] is None
+                                   for sha in (changed_file.old_sha, changed_file.new_sha)])
+        for changed_file in batch:
+            if excluded[changed_file.path] is not None:
+                yield changed_file, FileRelevance(changed_file.path, skip_reason=excluded[changed_file.path]), "", ""
+                continue
+            # Newly added files have no old blob
+            old_code = blobs.get(changed_file.old_sha, b'').decode('utf-8', errors='replace')
+            new_code = blobs.get(changed_file.new_sha, b'').decode('utf-8', errors='replace')
+            yield changed_file, relevance_filter.assess(changed_file.path, old_code, new_code), old_code, new_code
+
+def run_validation_from_git(repo_path: str, old_commit: str, new_commit: str, dir_path: str = ".", workers: int = 1,
+                            validation_mode: str = "sequential", max_concurrency: int = 5, app=None,
+                            output_root: str = None, resume: bool = False, executive_summary: bool = True,
+                            relevance_filter: RelevanceFilter = None, dry_run: bool = False,
+                            write_workers: int = 2, use_static_checks: bool = True,
+                            raise_on_error: bool = False) -> dict[str, str]:
     """
     Fetches code from a specific directory in a Git repository and runs the validation workflow.
+
+    Files stream through a pipeline of three stages connected by bounded queues:
+    the changed files are read from Git and scored lazily in small batches, up to
+    `workers` files are run through the governance graph concurrently, and
+    `write_workers` threads save each file's artifacts as soon as its graph
+    finishes. A full queue blocks the stage feeding it, so memory stays flat
+    however many files changed and the first reports appear while later files
+    are still being read. Policy searches (CPU-bound) and LLM calls
+    (network-bound) are bounded separately inside the analysis stage, by
+    `RETRIEVAL_CONCURRENCY` and the LLM rate limiters.
+
+    The governance graph is compiled once, when the first file needs it, and
+    shared by every file (pass `app` to reuse an already compiled graph).
+    Artifacts are saved under `output_root`, which defaults to `output/<date>`
+    next to this script.
+
+    Each file's status is tracked in the output directory's `manifest.json`, and
+    every graph node is checkpointed to a SQLite database there. With `resume`,
+    files that already have a report for the same commit pair and policy version
+    are skipped, and partially processed files restart from their last completed node.
+
+    Files whose exact old and new content was already validated (in any commit
+    range) against the same policy and prompt versions and validator settings
+    (`validation_mode`, `use_static_checks`) reuse the stored artifacts without
+    running the graph. A precompiled `app` must use the same settings.
+
+    `relevance_filter` (by default, one without globs that skips files without
+    API surface signals in their changed code) drops irrelevant files before they
+    reach the graph, and the most relevant of the files waiting for an analysis
+    worker go first. With `dry_run`, the filter's decisions are printed and
+    nothing is analyzed or written.
+
+    Once every file is processed, their verdicts are aggregated into one
+    `run_report.md` in the output directory, with an LLM-written executive summary
+    of the whole change unless `executive_summary` is False, and into run-level
+    `verdicts.json` and `results.sarif` files for CI gates.
+
+    Returns:
+        dict[str, str]: The artifact directory of each analyzed file, keyed by file path.
+
+    Raises:
+        ValueError: With `raise_on_error`, if `repo_path` is not a Git repository or the
+                    commit range cannot be resolved (otherwise the error is printed and
+                    an empty dict is returned).
     """
-    import git
     print("--- Running Validation on Git Changes ---")
 
     try:
-        # Validate that the provided path is a Git repository
-        repo = git.Repo(repo_path)
+        # Validate that the provided path is a Git repository and keep one handle for the whole run
+        reader = GitObjectReader(repo_path)
         print(f"Successfully loaded Git repository from: {repo_path}")
-    except (git.exc.InvalidGitRepositoryError, git.exc.NoSuchPathError):
+    except ValueError:
+        if raise_on_error:
+            raise
         print(f"Error: The provided path '{repo_path}' is not a valid Git repository.")
-        return
+        return {}
 
-    # Create a single parent output directory for this run inside the agent's directory
-    agent_root = os.path.dirname(__file__) # Root of the agent script
-    timestamp = datetime.datetime.now().strftime("%Y%m%d")
-    parent_output_dir = os.path.join(agent_root, "output", timestamp)
-    os.makedirs(parent_output_dir, exist_ok=True)
-    print(f"--- Artifacts will be saved to: {parent_output_dir} ---")
+    with reader:
+        # Create a single parent output directory for this run inside the agent's directory
+        parent_output_dir = output_root
+        if parent_output_dir is None:
+            agent_root = os.path.dirname(__file__) # Root of the agent script
+            timestamp = datetime.datetime.now().strftime("%Y%m%d")
+            parent_output_dir = os.path.join(agent_root, "output", timestamp)
 
-    # Use the provided repo_path and dir_path to find changed files
-    # dir_path should be relative to the root of the repository
-    print(f"Searching for changed files in directory '{dir_path}'...")
-    changed_files = get_changed_files_in_dir(repo.working_dir, dir_path, old_commit, new_commit)
+        # Use the provided repo_path and dir_path to find changed files
+        # dir_path should be relative to the root of the repository
+        print(f"Searching for changed files in directory '{dir_path}'...")
+        try:
+            changed_files = reader.changed_files(old_commit, new_commit, dir_path)
+            old_sha, new_sha = reader.resolve_commit(old_commit), reader.resolve_commit(new_commit)
+        except subprocess.CalledProcessError as e:
+            message = f"An error occurred while detecting changed files: {e.stderr.decode('utf-8', errors='replace').strip()}"
+            if raise_on_error:
+                raise ValueError(message) from e
+            print(message)
+            return {}
 
-    if not changed_files:
-        print("No changed Python files found in the specified directory and commit range.")
-        return
-    print(f"Found {len(changed_files)} changed files to analyze.")
-
-    # Process each changed file
-    for file_path in changed_files:
-        print(f"\n--- Analyzing file: {file_path} ---")
-        
-        # Create a specific subdirectory for this file's artifacts
-        # Sanitize file_path to create a valid directory name
-        file_specific_dir_name = file_path.replace('/', '_').replace('.', '_')
-        file_output_dir = os.path.join(parent_output_dir, file_specific_dir_name)
-        
-        # Pass the repo_path for context and the relative file_path to git
-        old_code = get_file_content_from_commit(repo.working_dir, file_path, old_commit)
-        new_code = get_file_content_from_commit(repo.working_dir, file_path, new_commit) or ''
-
-        if old_code is None: # Handle newly added files
-             old_code = ''
-        
-        run_workflow(old_code, new_code, file_output_dir)
+        if not changed_files:
+            print("No changed Python files found in the specified directory and commit range.")
+            return {}
+        print(f"Found {len(changed_files)} changed files.")
+
+        if relevance_filter is None:
+            relevance_filter = RelevanceFilter()
+        if dry_run:
+            assessments = [relevance for _, relevance, _, _ in iter_changed_files(reader, changed_files, relevance_filter)]
+            skipped_count = sum(not relevance.relevant for relevance in assessments)
+            print(f"Relevance pre-filter: {len(assessments) - skipped_count} files to analyze, {skipped_count} skipped.")
+            print(format_relevance(assessments))
+            return {}
+
+        os.makedirs(parent_output_dir, exist_ok=True)
+        print(f"--- Artifacts will be saved to: {parent_output_dir} ---")
+
+        corpus_version = read_corpus_version(VECTOR_STORE_DIR)
+        manifest = RunManifest(parent_output_dir, old_sha, new_sha, corpus_version, resume=resume)
+        # Changes already validated in other commit ranges are looked up by blob content
+        result_store = get_result_store()
+        stored_version = results_version(validation_mode, use_static_checks)
+
+        run_start = time.perf_counter()
+        output_dirs = {}
+        prefiltered = {}
+        run_traces = RunTraceSummary()
+        compile_s = 0.0
+        app_lock = threading.Lock()
+        progress = {"finished": 0, "reused": 0}
+        progress_lock = threading.Lock()
+        analysis_queue = queue.PriorityQueue(maxsize=max(1, workers) * QUEUE_DEPTH_PER_WORKER)
+        write_queue = queue.Queue(maxsize=max(1, write_workers) * QUEUE_DEPTH_PER_WORKER)
+
+        def finish(file_path: str, message: str, reused: bool = False) -> None:
+            with progress_lock:
+                progress["finished"] += 1
+                progress["reused"] += reused
+                print(f"[{progress['finished']}/{len(changed_files)}] {message}")
+
+        def get_app():
+            # Compile the graph (LLM clients; the retriever loads on first use) once for the whole run,
+            # and only once a file needs it, so runs served from the result store never build it
+            nonlocal app, compile_s
+            with app_lock:
+                if app is None:
+                    compile_start = time.perf_counter()
+                    # Checkpoint every node so an interrupted file can be resumed from its last completed node
+                    checkpointer = SqliteSaver(sqlite3.connect(os.path.join(parent_output_dir, CHECKPOINT_DB_FILE),
+                                                               check_same_thread=False))
+                    app = create_governance_graph(validation_mode=validation_mode, max_concurrency=max_concurrency,
+                                                  checkpointer=checkpointer, use_static_checks=use_static_checks)
+                    compile_s = time.perf_counter() - compile_start
+                return app
+
+        def analyze_files():
+            # Analysis stage: runs each file through the governance graph
+            while True:
+                _, _, job = analysis_queue.get()
+                if job is None:
+                    return
+                changed_file, file_output_dir, old_code, new_code = job
+                file_path = changed_file.path
+                print(f"\n--- Analyzing file: {file_path} ---")
+                # Any failure is recorded against the file, so the worker keeps draining the queue
+                try:
+                    trace = Trace(label=file_path)
+                    manifest.update(file_path, RUNNING, output_dir=file_output_dir,
+                                    old_blob=changed_file.old_sha, new_blob=changed_file.new_sha)
+                    graph = get_app()
+                    # One checkpoint thread per file and run, so a resumed run picks up exactly where this file stopped
+                    thread_id = f"{old_sha}:{new_sha}:{corpus_version}:{file_path}" if graph.checkpointer else None
+                    final_state = invoke_workflow(old_code, new_code, graph, trace, thread_id=thread_id, resume=resume)
+                except Exception as e:
+                    print(f"ERROR: Validation failed for '{file_path}': {e}")
+                    manifest.update(file_path, FAILED, error=str(e))
+                    finish(file_path, f"Failed '{file_path}'.")
+                    continue
+                write_queue.put((changed_file, file_output_dir, (old_code, new_code, final_state, trace, graph, thread_id)))
+
+        def write_files():
+            # Write stage: saves each file's artifacts as soon as its analysis (or reuse) is done
+            while True:
+                job = write_queue.get()
+                if job is None:
+                    return
+                changed_file, file_output_dir, result = job
+                file_path = changed_file.path
+                try:
+                    if isinstance(result, dict):
+                        ResultStore.restore(result, file_output_dir)
+                        # The same content may have been stored under another path
+                        relocate_verdicts(file_output_dir, file_path)
+                        manifest.update(file_path, DONE, output_dir=file_output_dir, reused=True,
+                                        old_blob=changed_file.old_sha, new_blob=changed_file.new_sha)
+                        finish(file_path, f"Reused the stored result for '{file_path}' (unchanged content). "
+                                          f"Artifacts saved in: {file_output_dir}", reused=True)
+                        continue
+
+                    old_code, new_code, final_state, trace, graph, thread_id = result
+                    save_artifacts(file_output_dir, old_code, new_code, final_state, trace, file_path=file_path)
+                    if thread_id is not None:
+                        # The report is saved, so the checkpoints are no longer needed
+                        graph.checkpointer.delete_thread(thread_id)
+                    if result_store is not None and not final_state.get("error"):
+                        result_store.put(changed_file.old_sha, changed_file.new_sha, corpus_version, stored_version,
+                                         file_output_dir)
+                    run_traces.add(trace)
+                    if final_state.get("error"):
+                        # Failed files are retried by a resumed run and reported as failed
+                        manifest.update(file_path, FAILED, error=final_state["error"])
+                        finish(file_path, f"Failed '{file_path}': {final_state['error']}")
+                        continue
+                    manifest.update(file_path, DONE, skip_reason=final_state.get("skip_reason"))
+                    finish(file_path, f"Saved the report for '{file_path}' in: {file_output_dir}")
+                except Exception as e:
+                    print(f"ERROR: Saving the artifacts of '{file_path}' failed: {e}")
+                    manifest.update(file_path, FAILED, error=str(e))
+                    finish(file_path, f"Failed '{file_path}'.")
+
+        print(f"--- Processing files with {workers} analysis and {write_workers} write workers ---")
+        analysis_threads = [threading.Thread(target=analyze_files, daemon=True) for _ in range(max(1, workers))]
+        write_threads = [threading.Thread(target=write_files, daemon=True) for _ in range(max(1, write_workers))]
+        for thread in analysis_threads + write_threads:
+            thread.start()
+
+        # Read stage (this thread): streams the changed files into the analysis and write queues
+        seq = 0
+        try:
+            for changed_file, relevance, old_code, new_code in iter_changed_files(reader, changed_files, relevance_filter):
+                file_path = changed_file.path
+                if not relevance.relevant:
+                    prefiltered[file_path] = relevance.skip_reason
+                    manifest.update(file_path, SKIPPED, skip_reason=relevance.skip_reason)
+                    finish(file_path, f"Skipped '{file_path}': {relevance.skip_reason}")
+                    continue
+
+                # Create a specific subdirectory for this file's artifacts
+                # Sanitize file_path to create a valid directory name
+                file_specific_dir_name = file_path.replace('/', '_').replace('.', '_')
+                file_output_dir = os.path.join(parent_output_dir, file_specific_dir_name)
+                output_dirs[file_path] = file_output_dir
+                if resume and manifest.is_done(file_path):
+                    finish(file_path, f"Skipping '{file_path}': already validated for this commit pair and policy version.")
+                    continue
+
+                artifacts = None
+                if result_store is not None:
+                    artifacts = result_store.get(changed_file.old_sha, changed_file.new_sha, corpus_version, stored_version)
+                if artifacts is not None:
+                    write_queue.put((changed_file, file_output_dir, artifacts))
+                    continue
+                # The most relevant of the queued files are analyzed first
+                seq += 1
+                analysis_queue.put((-relevance.score, seq, (changed_file, file_output_dir, old_code, new_code)))
+        finally:
+            # Drain the stages in order: every analyzed file is queued for writing before the writers stop
+            for _ in analysis_threads:
+                seq += 1
+                analysis_queue.put((math.inf, seq, None))
+            for thread in analysis_threads:
+                thread.join()
+            for _ in write_threads:
+                write_queue.put(None)
+            for thread in write_threads:
+                thread.join()
+
+    print(f"Relevance pre-filter: {len(changed_files) - len(prefiltered)} files analyzed, {len(prefiltered)} skipped.")
+    if result_store is not None:
+        print(f"Reused stored results for {progress['reused']} of {len(changed_files) - len(prefiltered)} files.")
+    llm_cache = get_llm_cache()
+    if llm_cache is not None:
+        print(f"--- LLM cache: {llm_cache.stats()} ---")
+    print(f"--- Retrieval cache: {get_retrieval_cache().stats()} ---")
+    verdict_cache = get_verdict_cache()
+    if verdict_cache is not None:
+        print(f"--- Verdict cache: {verdict_cache.stats()} ---")
+    if result_store is not None:
+        print(f"--- Result store: {result_store.stats()} ---")
+    print(f"--- LLM deployments: {router_metrics()} ---")
+
+    print(f"--- Manifest: {manifest.counts()} (saved to {manifest.path}) ---")
+
+    # Aggregate the verdicts of every file (including reused and resumed ones) into one report
+    report_trace = Trace(label=RUN_REPORT_FILE)
+    with use_trace(report_trace):
+        run_report_path = write_run_report(parent_output_dir, output_dirs, manifest, old_sha, new_sha,
+                                           prefiltered=prefiltered, executive_summary=executive_summary)
+    print(f"--- Run report saved to {run_report_path} (verdicts in {VERDICTS_FILE} and {SARIF_FILE}) ---")
+
+    # Aggregate the per-file traces into one run summary
+    run_traces.add(report_trace, stage=True)
+    run_summary = run_traces.to_dict(time.perf_counter() - run_start)
+    run_summary["graph_compile_s"] = round(compile_s, 6)
+    run_summary["llm_deployments"] = router_metrics()
+    with open(os.path.join(parent_output_dir, RUN_TRACE_FILE), "w") as f:
+        json.dump(run_summary, f, indent=2)
+    llm_summary = run_summary["summary"]["llm"]
+    print(f"--- Run trace: {run_summary['files']} files in {run_summary['wall_time_s']:.1f}s, "
+          f"{llm_summary['calls']} LLM calls ({llm_summary['cached_calls']} cached), "
+          f"{llm_summary['prompt_tokens']} prompt / {llm_summary['completion_tokens']} completion tokens. "
+          f"Saved to {os.path.join(parent_output_dir, RUN_TRACE_FILE)} ---")
+
+    return output_dirs
+
+def write_run_report(parent_output_dir: str, output_dirs: dict[str, str], manifest: RunManifest,
+                     old_sha: str, new_sha: str, prefiltered: dict[str, str] = None, executive_summary: bool = True) -> str:
+    """
+    Writes `run_report.md`, `verdicts.json` and `results.sarif` from the
+    verdicts of every file of a run.
+
+    Files that ended early or were `prefiltered` are listed with their skip reason,
+    and files without verdicts (failed or interrupted) with their error. Returns
+    the report's path.
+    """
+    file_verdicts, skipped, errors = {}, dict(prefiltered or {}), {}
+    for file_path, file_output_dir in sorted(output_dirs.items()):
+        document = read_verdicts(file_output_dir) if manifest.status(file_path) == DONE else None
+        if document is None or document.get("error"):
+            errors[file_path] = ((document or {}).get("error") or manifest.data["files"].get(file_path, {}).get("error")
+                                 or "No report was produced.")
+        elif document.get("skip_reason"):
+            skipped[file_path] = document["skip_reason"]
+        else:
+            file_verdicts[file_path] = document["verdicts"]
+
+    report = ReporterAgent().generate_run_report(
+        file_verdicts, errors, skipped=dict(sorted(skipped.items())), title=f"API Governance Report: {old_sha[:12]}..{new_sha[:12]}",
+        executive_summary=executive_summary,
+    )
+    run_report_path = os.path.join(parent_output_dir, RUN_REPORT_FILE)
+    with open(run_report_path, "w") as f:
+        f.write(report)
+    all_verdicts = [verdict for verdicts in file_verdicts.values() for verdict in verdicts]
+    write_verdicts(parent_output_dir, all_verdicts, old_commit=old_sha, new_commit=new_sha,
+                   skipped_files=skipped, failed_files=errors)
+    return run_report_path
 
 def run_validation_from_demo():
     """Runs the validation workflow on hardcoded demo code."""
@@ -93,34 +419,83 @@ if __name__ == "__main__":
     run_workflow(OLD_CODE, NEW_CODE, output_dir)
 
 
-def run_workflow(old_code: str, new_code: str, output_dir: str):
+def run_workflow(old_code: str, new_code: str, output_dir: str, app=None, trace: Trace = None,
+                 thread_id: str = None, resume: bool = False, file_path: str = "") -> GovernanceState:
     """
     Initializes and runs the API governance validation workflow, saving all
     artifacts to the specified output directory.
+
+    Pass a compiled graph as `app` to reuse it across calls; otherwise a new
+    one is created. Node timings, LLM calls and cache hits are recorded into
+    `trace` (a new one if not given) and saved as `trace.json`.
+
+    If the graph has a checkpointer, pass a `thread_id`. With `resume`, a run that
+    was interrupted on that thread continues from its last completed node instead
+    of starting over. The structured verdicts are saved as `verdicts.json` and
+    `results.sarif`, located in `file_path` (the file's path in its repository).
+    Returns the final workflow state.
     """
-    os.makedirs(output_dir, exist_ok=True)
+    if trace is None:
+        trace = Trace(label=output_dir)
+    if app is None:
+        app = create_governance_graph()
 
-    # Save input code to files
-    with open(os.path.join(output_dir, "old_code.py"), "w") as f:
-        f.write(old_code)
-    with open(os.path.join(output_dir, "new_code.py"), "w") as f:
-        f.write(new_code)
+    final_state = invoke_workflow(old_code, new_code, app, trace, thread_id=thread_id, resume=resume)
+    save_artifacts(output_dir, old_code, new_code, final_state, trace, file_path=file_path)
+    if thread_id is not None:
+        # The report is saved, so the checkpoints are no longer needed
+        app.checkpointer.delete_thread(thread_id)
+    return final_state
 
-    # Initialize and Run the Graph
-    app = create_governance_graph()
 
+def invoke_workflow(old_code: str, new_code: str, app, trace: Trace, thread_id: str = None,
+                    resume: bool = False) -> GovernanceState:
+    """
+    Runs a compiled governance graph on one change without writing anything.
+    See `run_workflow` for `thread_id` and `resume`. Returns the final workflow state.
+    """
     initial_state: GovernanceState = {
         "old_code": old_code,
         "new_code": new_code,
         "changed_code": "",
         "query": "",
+        "changed_units": [],
+        "unit_results": [],
         "relevant_docs": [],
         "validation_results": [],
+        "verdicts": [],
         "report": "",
+        "skip_reason": None,
         "error": None,
     }
 
-    final_state = app.invoke(initial_state)
+    config = {"configurable": {"trace": trace}}
+    graph_input = initial_state
+    if thread_id is not None:
+        config["configurable"]["thread_id"] = thread_id
+        snapshot = app.get_state(config) if resume else None
+        if snapshot is not None and snapshot.values:
+            # Passing no input continues the thread from its latest checkpoint
+            print(f"Resuming from checkpoint; remaining nodes: {', '.join(snapshot.next) or 'none'}")
+            graph_input = None
+        else:
+            # A fresh run must not pick up checkpoints of an earlier attempt
+            app.checkpointer.delete_thread(thread_id)
+
+    with use_trace(trace):
+        return app.invoke(graph_input, config=config)
+
+
+def save_artifacts(output_dir: str, old_code: str, new_code: str, final_state: GovernanceState, trace: Trace,
+                   file_path: str = "") -> None:
+    """Saves the input code, report, verdicts and trace of one validated change to `output_dir`."""
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Save input code to files
+    with open(os.path.join(output_dir, "old_code.py"), "w") as f:
+        f.write(old_code)
+    with open(os.path.join(output_dir, "new_code.py"), "w") as f:
+        f.write(new_code)
 
     # Save the results from the final state
     with open(os.path.join(output_dir, "changed_snippet.txt"), "w") as f:
@@ -129,6 +504,12 @@ def run_workflow(old_code: str, new_code: str, output_dir: str):
     with open(os.path.join(output_dir, "report.md"), "w") as f:
         f.write(final_state.get("report", "No report was generated."))
 
+    # Machine-readable verdicts, aggregated into the run's report and SARIF log
+    verdicts = [{**verdict, "file": file_path} for verdict in final_state.get("verdicts", [])]
+    write_verdicts(output_dir, verdicts, file=file_path, skip_reason=final_state.get("skip_reason"),
+                   error=final_state.get("error"))
+
+    trace.write(os.path.join(output_dir, TRACE_FILE))
 
     # Display the Final Report
     print("\n--- Governance Report ---")
@@ -141,12 +522,6 @@ def run_workflow(old_code: str, new_code: str, output_dir: str):
 
 
 def main():
-    # --- Verify API Key ---
-    if not os.getenv("OPENAI_API_KEY"):
-        print("FATAL: OPENAI_API_KEY is not set.")
-        print("Please create a .env file and add your key.")
-        return
-
     parser = argparse.ArgumentParser(description="API Governance Agent powered by LLMs.")
     parser.add_argument(
         '--repo-path', 
@@ -169,11 +544,93 @@ def main():
         type=str, 
         help="The new commit hash or reference (e.g., 'HEAD')."
     )
+    parser.add_argument(
+        '--workers', 
+        type=int, 
+        default=1, 
+        help="Number of files to validate concurrently. Defaults to 1 (sequential)."
+    )
+    parser.add_argument(
+        '--write-workers',
+        type=int,
+        default=2,
+        help="Number of threads saving finished files' artifacts while other files are validated. Defaults to 2."
+    )
+    parser.add_argument(
+        '--validation-mode', 
+        choices=VALIDATION_MODES, 
+        default="sequential", 
+        help="How each snippet is checked against its rules: one call per rule ('sequential'), "
+             "parallel calls per rule ('concurrent') or one call for all rules ('single')."
+    )
+    parser.add_argument(
+        '--max-concurrency', 
+        type=int, 
+        default=5, 
+        help="Maximum number of rule checks in flight per snippet in 'concurrent' mode. Defaults to 5."
+    )
+    parser.add_argument(
+        '--output-dir',
+        type=str,
+        help="Directory for this run's artifacts, manifest and checkpoints. Defaults to output/<YYYYMMDD>."
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help="Resume an interrupted run in the same output directory: skip files that already have a report "
+             "for this commit pair and policy version, and continue partially processed files from their last completed node."
+    )
+    parser.add_argument(
+        '--no-executive-summary',
+        action='store_true',
+        help="Build the run report from templates only, without the LLM-written executive summary."
+    )
+    parser.add_argument(
+        '--include',
+        action='append',
+        default=[],
+        metavar='GLOB',
+        help="Only analyze changed files whose repository path matches this glob (e.g. 'services/*/api/*'). Repeatable."
+    )
+    parser.add_argument(
+        '--exclude',
+        action='append',
+        default=[],
+        metavar='GLOB',
+        help="Skip changed files whose repository path matches this glob (e.g. 'tests/*'). Repeatable."
+    )
+    parser.add_argument(
+        '--min-relevance',
+        type=int,
+        default=1,
+        help="Skip files whose changed code scores below this on API surface signals "
+             "(route decorators, router registration, responses, auth). 0 analyzes every file. Defaults to 1."
+    )
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help="List which changed files would be analyzed or skipped, and why, without loading any model."
+    )
     
     args = parser.parse_args()
+    has_git_args = bool(args.repo_path and args.old_commit and args.new_commit)
+    if args.dry_run and not has_git_args:
+        # The demo has no changed files to filter; it would only run the full workflow
+        parser.error("--dry-run requires --repo-path, --old-commit and --new-commit.")
+
+    # --- Verify API Key (a dry run loads no model) ---
+    if not args.dry_run and not os.getenv("OPENAI_API_KEY"):
+        print("FATAL: OPENAI_API_KEY is not set.")
+        print("Please create a .env file and add your key.")
+        return
 
-    if args.repo_path and args.old_commit and args.new_commit:
-        run_validation_from_git(args.repo_path, args.old_commit, args.new_commit, args.dir_path)
+    if has_git_args:
+        run_validation_from_git(args.repo_path, args.old_commit, args.new_commit, args.dir_path, workers=args.workers,
+                                validation_mode=args.validation_mode, max_concurrency=args.max_concurrency,
+                                output_root=args.output_dir, resume=args.resume,
+                                executive_summary=not args.no_executive_summary,
+                                relevance_filter=RelevanceFilter(args.include, args.exclude, args.min_relevance),
+                                dry_run=args.dry_run, write_workers=args.write_workers)
     else:
         print("No Git arguments provided (--repo-path, --old-commit, --new-commit are required). Running demo...")
         run_validation_from_demo()
@@ -0,0 +1,218 @@
+import argparse
+import datetime
+import json
+import os
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from dotenv import load_dotenv
+
+from main import run_workflow, run_validation_from_git
+from src.agents.reporter import RUN_REPORT_FILE
+from src.utils.verdicts import SARIF_FILE, VERDICTS_FILE
+from src.agents.validator import VALIDATION_MODES
+from src.graph.workflow import create_governance_graph
+from src.llm.router import router_metrics
+
+load_dotenv()
+
+# --- Configuration ---
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_FINISHED_JOBS = 1000
+
+
+class ValidationService:
+    """
+    Keeps a compiled governance graph (LLM clients, plus the embedding model and
+    vector store when it was created with `warm_up=True`) resident and runs
+    validation jobs from a bounded queue.
+
+    Jobs are either a code pair (`old_code`/`new_code`) or a Git commit range
+    (`repo_path`/`old_commit`/`new_commit`, optional `dir_path`). When the queue
+    is full new jobs are rejected so that clients back off.
+    """
+
+    def __init__(self, app, job_workers: int = 1, queue_size: int = 16, file_workers: int = 1,
+                 validation_mode: str = "sequential"):
+        self.app = app
+        # The mode `app` was compiled with, so stored results are only reused for the same mode
+        self.validation_mode = validation_mode
+        self.file_workers = file_workers
+        self.jobs = queue.Queue(maxsize=queue_size)
+        self.results = OrderedDict()
+        self._results_lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"validation-worker-{i}", daemon=True)
+            for i in range(job_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, job: dict) -> str:
+        """
+        Queues a job and returns its ID.
+
+        Raises:
+            ValueError: If the job is missing required fields.
+            queue.Full: If the job queue is at capacity.
+        """
+        if not ({"old_code", "new_code"} <= job.keys() or {"repo_path", "old_commit", "new_commit"} <= job.keys()):
+            raise ValueError("A job needs either 'old_code' and 'new_code', or 'repo_path', 'old_commit' and 'new_commit'.")
+
+        job_id = uuid.uuid4().hex
+        self._set_status(job_id, {"status": "queued"})
+        try:
+            self.jobs.put_nowait((job_id, job))
+        except queue.Full:
+            with self._results_lock:
+                self.results.pop(job_id, None)
+            raise
+        return job_id
+
+    def status(self, job_id: str):
+        """Returns the status (and result, once finished) of a job, or None if it is unknown."""
+        with self._results_lock:
+            return self.results.get(job_id)
+
+    def _set_status(self, job_id: str, status: dict) -> None:
+        with self._results_lock:
+            self.results[job_id] = status
+            self.results.move_to_end(job_id)
+            # Forget the oldest finished jobs so the registry stays bounded
+            while len(self.results) > MAX_FINISHED_JOBS:
+                oldest = next(iter(self.results.values()))
+                if oldest["status"] in ("queued", "running"):
+                    break
+                self.results.popitem(last=False)
+
+    def _worker(self) -> None:
+        while True:
+            job_id, job = self.jobs.get()
+            self._set_status(job_id, {"status": "running"})
+            try:
+                result = self._run(job_id, job)
+                self._set_status(job_id, {"status": "done", "result": result})
+            except Exception as e:
+                print(f"ERROR: Job {job_id} failed: {e}")
+                self._set_status(job_id, {"status": "failed", "error": str(e)})
+            finally:
+                self.jobs.task_done()
+
+    def _run(self, job_id: str, job: dict) -> dict:
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_dir = os.path.join(os.path.dirname(__file__), "output", f"server_{timestamp}_{job_id[:8]}")
+        if "old_code" in job:
+            final_state = run_workflow(job["old_code"], job["new_code"], output_dir, app=self.app)
+            return _file_result(output_dir, final_state)
+
+        # Each job gets its own directory so concurrent jobs don't share a run manifest
+        output_dirs = run_validation_from_git(
+            job["repo_path"], job["old_commit"], job["new_commit"], job.get("dir_path", "."),
+            workers=self.file_workers, validation_mode=self.validation_mode, app=self.app, output_root=output_dir,
+            raise_on_error=True,
+        )
+        result = {"files": {file_path: _file_result(file_output_dir) for file_path, file_output_dir in output_dirs.items()}}
+        run_report_path = os.path.join(output_dir, RUN_REPORT_FILE)
+        if not os.path.exists(run_report_path):
+            # No changed Python files in the range, so no run artifacts were written
+            return result
+        return {**result,
+                "run_report_path": os.path.abspath(run_report_path),
+                "verdicts_path": os.path.abspath(os.path.join(output_dir, VERDICTS_FILE)),
+                "sarif_path": os.path.abspath(os.path.join(output_dir, SARIF_FILE))}
+
+
+def _file_result(output_dir: str, final_state=None) -> dict:
+    """Describes the artifacts of one validated file."""
+    result = {"output_dir": os.path.abspath(output_dir), "report_path": os.path.abspath(os.path.join(output_dir, "report.md")),
+              "verdicts_path": os.path.abspath(os.path.join(output_dir, VERDICTS_FILE))}
+    if final_state is not None:
+        result["report"] = final_state.get("report", "")
+        result["skip_reason"] = final_state.get("skip_reason")
+        result["error"] = final_state.get("error")
+    return result
+
+
+def make_handler(service: ValidationService):
+    """Builds the HTTP request handler bound to a validation service."""
+
+    class ValidationRequestHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status: int, body: dict, headers: dict = None) -> None:
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json(200, {"status": "ok", "queued": service.jobs.qsize(), "capacity": service.jobs.maxsize,
+                                      "llm_deployments": router_metrics()})
+                return
+            if self.path.startswith("/jobs/"):
+                status = service.status(self.path[len("/jobs/"):])
+                if status is None:
+                    self._send_json(404, {"error": "Unknown job."})
+                else:
+                    self._send_json(200, status)
+                return
+            self._send_json(404, {"error": "Not found."})
+
+        def do_POST(self):
+            if self.path != "/jobs":
+                self._send_json(404, {"error": "Not found."})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                job = json.loads(self.rfile.read(length) or b"{}")
+                job_id = service.submit(job)
+            except (json.JSONDecodeError, ValueError) as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            except queue.Full:
+                # Backpressure: tell the client to retry later
+                self._send_json(503, {"error": "Job queue is full."}, headers={"Retry-After": "5"})
+                return
+            self._send_json(202, {"job_id": job_id})
+
+        def log_message(self, format, *args):
+            print(f"[server] {self.address_string()} - {format % args}")
+
+    return ValidationRequestHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Long-running API Governance validation service.")
+    parser.add_argument('--host', type=str, default=DEFAULT_HOST, help=f"Interface to bind. Defaults to {DEFAULT_HOST}.")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"Port to listen on. Defaults to {DEFAULT_PORT}.")
+    parser.add_argument('--job-workers', type=int, default=2, help="Number of jobs processed concurrently. Defaults to 2.")
+    parser.add_argument('--queue-size', type=int, default=16, help="Maximum number of queued jobs before new ones are rejected. Defaults to 16.")
+    parser.add_argument('--workers', type=int, default=1, help="Files validated concurrently within a Git job. Defaults to 1.")
+    parser.add_argument('--validation-mode', choices=VALIDATION_MODES, default="sequential", help="How each snippet is checked against its rules.")
+    parser.add_argument('--max-concurrency', type=int, default=5, help="Maximum number of rule checks in flight per snippet in 'concurrent' mode.")
+    args = parser.parse_args()
+
+    print("--- Warming up: compiling governance graph and loading the embedding model and vector store ---")
+    app = create_governance_graph(validation_mode=args.validation_mode, max_concurrency=args.max_concurrency,
+                                  warm_up=True)
+    service = ValidationService(app, job_workers=args.job_workers, queue_size=args.queue_size, file_workers=args.workers,
+                                validation_mode=args.validation_mode)
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    print(f"--- Validation service listening on http://{args.host}:{args.port} ---")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Shutting down...")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,10 @@ from langchain_core.output_parsers import StrOutputParser
 from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
 from src.llm.model import create_llm
+from src.llm.tokens import count_tokens
+from src.utils.code_diff import changed_regions, diff_definitions, is_api_module, summarize_changes
 
-from src.graph.state import GovernanceState
+from src.graph.state import ChangeUnit, GovernanceState
 
 load_dotenv()
 
@@ -20,7 +22,7 @@ class CodeChangeDetectorAgent:
         # if not api_key:
         #     raise ValueError("OPENAI_API_KEY not found in environment variables.")
         
-        self.llm = create_llm() #ChatOpenAI(api_key=api_key, model="gpt-5", temperature=0)
+        self.llm = create_llm(role="detector") #ChatOpenAI(api_key=api_key, model="gpt-5", temperature=0)
 
     def _create_change_detection_chain(self):
         """Creates a chain to identify and summarize code changes."""
@@ -30,7 +32,8 @@ class CodeChangeDetectorAgent:
                 "You must respond in a specific JSON format."
             )),
             ("user", (
-                "Below are two versions of a Python file. Please analyze the changes from the old code to the new code.\n\n"
+                "Below are two versions of a Python file. Please analyze the changes from the old code to the new code. "
+                "Unchanged parts of the file may be omitted and marked with `# ... lines X-Y unchanged ...` comments.\n\n"
                 "## Old Code:\n"
                 "```python\n{old_code}\n```\n\n"
                 "## New Code:\n"
@@ -43,32 +46,119 @@ class CodeChangeDetectorAgent:
         ])
         return prompt | self.llm | StrOutputParser()
 
+    def _scope_to_changed_regions(self, old_code: str, new_code: str) -> tuple[str, str]:
+        """
+        Reduces both files to the diff hunks expanded to their enclosing function or
+        class, so the prompt only carries the code that changed. Keeps the full files
+        if that would not be smaller.
+        """
+        old_excerpt, new_excerpt = changed_regions(old_code, new_code)
+        full_tokens = count_tokens(old_code) + count_tokens(new_code)
+        scoped_tokens = count_tokens(old_excerpt) + count_tokens(new_excerpt)
+
+        if scoped_tokens >= full_tokens:
+            print(f"Detector input: {full_tokens} tokens (whole files).")
+            return old_code, new_code
+
+        saved = 100 * (full_tokens - scoped_tokens) / full_tokens
+        print(f"Detector input: {full_tokens} tokens for whole files -> {scoped_tokens} tokens for changed regions ({saved:.0f}% saved).")
+        return old_excerpt, new_excerpt
+
+    def triage(self, state: GovernanceState) -> GovernanceState:
+        """
+        Cheaply decides whether a file needs change detection at all, without an
+        LLM call. Sets `skip_reason` for unchanged files and for modules where
+        neither version can define HTTP endpoints (tests, utilities, models).
+        """
+        print("---AGENT: Triaging file---")
+        old_code = state["old_code"]
+        new_code = state["new_code"]
+
+        if old_code == new_code:
+            return {"skip_reason": "The file content did not change."}
+        # Unparsable code is left to the detector, which can fall back to the LLM
+        if is_api_module(old_code) is False and is_api_module(new_code) is False:
+            print("Neither version of the file imports a web framework or declares routes.")
+            return {"skip_reason": "The file does not define or register any API endpoints."}
+        return {"skip_reason": None}
+
     def find_and_summarize_changes(self, state: GovernanceState) -> GovernanceState:
-        """Analyzes code versions and updates the state with the findings."""
+        """
+        Analyzes code versions and returns the state keys it sets. Only the changed
+        keys are returned: `unit_results` has an additive reducer, so echoing the
+        whole state back would add existing results again.
+        """
         print("---AGENT: Detecting code changes---")
         old_code = state["old_code"]
         new_code = state["new_code"]
 
         if old_code == new_code:
-            return {**state, "changed_code": "", "query": "No changes detected."}
+            return {"changed_code": "", "query": "No changes detected.", "changed_units": []}
+
+        # Prefer a deterministic AST diff; only fall back to the LLM when it can't decide
+        changes = diff_definitions(old_code, new_code)
+        if changes is not None:
+            if not changes:
+                print("No added or modified definitions found.")
+                return {"changed_code": "", "query": "No changes detected.", "changed_units": []}
+
+            # One unit per changed definition, so each endpoint gets its own retrieval and validation
+            units = [
+                ChangeUnit(
+                    name=change.definition.name,
+                    code=change.definition.source,
+                    query=summarize_changes([change]),
+                    start_line=change.definition.start_line,
+                    end_line=change.definition.end_line,
+                )
+                for change in changes
+            ]
+            changed_code = "\n\n".join(unit["code"] for unit in units)
+            summary = summarize_changes(changes)
+
+            print(f"Detected Change: {summary}")
+            print(f"Changed Snippet:\n{changed_code}")
+
+            return {"changed_code": changed_code, "query": summary, "changed_units": units}
+
+        print("AST comparison was inconclusive. Falling back to LLM change detection.")
+        old_excerpt, new_excerpt = self._scope_to_changed_regions(old_code, new_code)
 
         change_detection_chain = self._create_change_detection_chain()
-        llm_response = change_detection_chain.invoke({"old_code": old_code, "new_code": new_code})
+        llm_response = change_detection_chain.invoke({"old_code": old_excerpt, "new_code": new_excerpt})
 
         try:
-            # The response might be in a markdown code block, so we clean it up
-            cleaned_response = llm_response.strip().replace("```json", "").replace("```", "")
-            response_json = json.loads(cleaned_response)
-            
-            changed_code = response_json.get("changed_code_snippet", "")
-            summary = response_json.get("change_summary", "No summary provided.")
+            # The response might be in a markdown code block or surrounded by prose,
+            # so we parse the outermost JSON object
+            start, end = llm_response.find("{"), llm_response.rfind("}")
+            if start == -1 or end < start:
+                raise json.JSONDecodeError("No JSON object found", llm_response, 0)
+            response_json = json.loads(llm_response[start:end + 1])
+            # A reply of the wrong shape is a parse failure, not a crash of the node
+            if not isinstance(response_json, dict):
+                raise json.JSONDecodeError("The response is not a JSON object", llm_response, start)
+            changed_code = response_json.get("changed_code_snippet") or ""
+            summary = response_json.get("change_summary") or "No summary provided."
+            if not isinstance(changed_code, str) or not isinstance(summary, str):
+                raise json.JSONDecodeError("The snippet and summary must be strings", llm_response, start)
 
             print(f"Detected Change: {summary}")
             print(f"Changed Snippet:\n{changed_code}")
 
-            return {**state, "changed_code": changed_code, "query": summary}
+            units = [_locate_unit(changed_code, summary, new_code)] if changed_code else []
+            return {"changed_code": changed_code, "query": summary, "changed_units": units}
         except json.JSONDecodeError:
             error_message = "Failed to parse change detection response from LLM."
             print(f"ERROR: {error_message}")
             print(f"LLM Response was: {llm_response}")
-            return {**state, "error": error_message}
+            return {"error": error_message}
+
+
+def _locate_unit(code: str, summary: str, new_code: str) -> ChangeUnit:
+    """Builds a change unit for an LLM-extracted snippet, finding its line span in the new code if it appears verbatim."""
+    start_line = end_line = 0
+    offset = new_code.find(code.strip())
+    if offset != -1:
+        start_line = new_code.count("\n", 0, offset) + 1
+        end_line = start_line + code.strip().count("\n")
+    return ChangeUnit(name="", code=code, query=summary, start_line=start_line, end_line=end_line)
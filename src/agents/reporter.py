@@ -4,53 +4,208 @@ from langchain_core.output_parsers import StrOutputParser
 from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
 from src.llm.model import create_llm
-from src.graph.state import GovernanceState
+from src.graph.state import GovernanceState, Verdict
+from src.utils.verdicts import COMPLIANT, NON_COMPLIANT, NOT_EVALUATED, count_verdicts, verdict_from_text
 
 load_dotenv()
 
+# The aggregated report of a multi-file run
+RUN_REPORT_FILE = "run_report.md"
+
+# Non-compliant verdicts sent to the executive summary, to keep its prompt bounded
+MAX_SUMMARY_VERDICTS = 50
+
+
+def _location(verdict: Verdict) -> str:
+    if verdict["start_line"]:
+        return f" (lines {verdict['start_line']}-{verdict['end_line']})"
+    return ""
+
+
+def _describe(verdict: Verdict) -> str:
+    rule = f"Rule {verdict['rule_id']}: " if verdict["rule_id"] else ""
+    return f"{rule}{verdict['message']}"
+
+
+def render_verdicts(verdicts: list[Verdict], heading_level: int = 2) -> str:
+    """
+    Renders verdicts as markdown sections grouped by status and change unit.
+
+    Args:
+        verdicts (list[Verdict]): The verdicts to render, in report order.
+        heading_level (int): The markdown level of the status headings.
+    """
+    heading = "#" * heading_level
+    sections = []
+    for status, title in ((NON_COMPLIANT, "Non-compliant Issues"), (COMPLIANT, "Compliant Checks"),
+                          (NOT_EVALUATED, "Not Evaluated")):
+        selected = [verdict for verdict in verdicts if verdict["status"] == status]
+        if not selected and status == NOT_EVALUATED:
+            continue
+        lines = [f"{heading} {title}"]
+        if not selected:
+            lines.extend(["", "- None."])
+        current_unit = None
+        for verdict in selected:
+            if verdict["unit"] and verdict["unit"] != current_unit:
+                current_unit = verdict["unit"]
+                lines.extend(["", f"{heading}# {current_unit}{_location(verdict)}", ""])
+            elif len(lines) == 1:
+                lines.append("")
+            lines.append(f"- {_describe(verdict)}")
+        sections.append("\n".join(lines))
+    return "\n\n".join(sections)
+
+
+def _summary_line(counts: dict[str, int]) -> str:
+    total = sum(counts.values())
+    return (f"{total} checks: {counts[COMPLIANT]} compliant, {counts[NON_COMPLIANT]} non-compliant, "
+            f"{counts[NOT_EVALUATED]} not evaluated.")
+
+
 class ReporterAgent:
     """
-    An agent that compiles validation results into a final report.
+    An agent that compiles validation results into reports.
+
+    Per-file reports are rendered from a deterministic template. The LLM is only
+    used for the optional executive summary of a whole run.
     """
 
     def __init__(self):
         # api_key = os.getenv("OPENAI_API_KEY")
         # if not api_key:
         #     raise ValueError("OPENAI_API_KEY not found in environment variables.")
-        
-        self.llm = create_llm() #ChatOpenAI(api_key=api_key, model="gpt-5", temperature=0)
 
-    def _create_reporting_chain(self):
-        """Creates a chain to generate a formatted report from validation results."""
+        self.llm = create_llm(role="reporter") #ChatOpenAI(api_key=api_key, model="gpt-5", temperature=0)
+
+    def _create_summary_chain(self):
+        """Creates a chain to write an executive summary of a run's verdicts."""
         prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are an expert in API governance reporting. Your task is to create a clear, concise, and actionable summary report from a list of validation findings."),
+            ("system", "You are an expert in API governance reporting. Your task is to create a clear, concise, and actionable executive summary of an API governance review."),
             ("user", (
-                "Please generate a markdown report based on the following validation results for the provided code snippet.\n\n"
-                "## Code Under Review:\n"
-                "```\n{code}\n```\n\n"
-                "## Validation Findings:\n"
-                "{findings}\n\n"
-                "Structure the report with two main sections: '## Compliant Checks' and '## Non-compliant Issues'. "
-                "If there are non-compliant issues, provide a '### Recommendations' section with suggested fixes."
+                "Please write an executive summary of the governance review of a code change spanning several files.\n\n"
+                "## Totals:\n{totals}\n\n"
+                "## Non-compliant Findings:\n"
+                "{verdicts}\n\n"
+                "In at most two short paragraphs, state whether the change is ready to merge, the most important issues and "
+                "any pattern across files. Finish with a short '### Recommendations' list of suggested fixes, if there are issues. "
+                "Respond in markdown without a top-level heading."
             ))
         ])
         return prompt | self.llm | StrOutputParser()
 
     def generate_report(self, state: GovernanceState) -> GovernanceState:
-        """Generates a final report from the validation results."""
+        """
+        Generates a file's report from its validation results, merging the results
+        of every change unit into one templated report (no LLM call).
+        """
         print("---AGENT: Generating final report---")
         code = state["changed_code"]
-        results = state["validation_results"]
+        unit_results = sorted(state.get("unit_results", []), key=lambda result: result["unit"]["start_line"])
+
+        if unit_results:
+            results = [res for unit_result in unit_results for res in unit_result["validation_results"]]
+            relevant_docs = list(dict.fromkeys(doc for unit_result in unit_results for doc in unit_result["relevant_docs"]))
+            verdicts = [verdict for unit_result in unit_results for verdict in unit_result["verdicts"]]
+        else:
+            results = state["validation_results"]
+            relevant_docs = state["relevant_docs"]
+            verdicts = state.get("verdicts") or [verdict_from_text(res) for res in results]
 
+        # Only return the updated keys: `unit_results` has an additive reducer, so
+        # echoing the whole state back would duplicate it
         if not results:
-            return {**state, "report": "No validation was performed."}
+            return {"report": "No validation was performed.", "verdicts": []}
+
+        report = "\n\n".join([
+            "# API Governance Report",
+            f"**Summary:** {_summary_line(count_verdicts(verdicts))}",
+            render_verdicts(verdicts),
+            f"## Code Under Review\n\n```\n{code}\n```",
+        ]) + "\n"
 
-        findings_str = "\n".join(f"- {res}" for res in results)
-        
-        reporting_chain = self._create_reporting_chain()
-        report = reporting_chain.invoke({"code": code, "findings": findings_str})
-        
         print("---REPORT---")
         print(report)
-        
-        return {**state, "report": report}
+
+        return {"report": report, "verdicts": verdicts, "validation_results": results, "relevant_docs": relevant_docs}
+
+    def report_skipped(self, state: GovernanceState) -> GovernanceState:
+        """
+        Terminal step for files that need no rule checks or whose change detection
+        failed: records why validation ended early in the report, without an LLM
+        call. A detection error stays in `error` rather than becoming a skip reason,
+        so the file counts as failed.
+        """
+        if state.get("error"):
+            reason = f"Change detection failed: {state['error']}"
+            print(f"---AGENT: Validation failed: {reason}---")
+            return {"report": f"# API Governance Report\n\n**Validation failed:** {reason}\n", "verdicts": []}
+        reason = state.get("skip_reason") or "No added or modified definitions were found."
+        print(f"---AGENT: Skipping validation: {reason}---")
+        report = f"# API Governance Report\n\n**Validation skipped:** {reason}\n"
+        return {"report": report, "skip_reason": reason, "verdicts": []}
+
+    def summarize_run(self, file_verdicts: dict[str, list[Verdict]]) -> str:
+        """
+        Writes an executive summary of a whole run with a single LLM call.
+
+        Args:
+            file_verdicts (dict[str, list[Verdict]]): The verdicts of every file, keyed by file path.
+
+        Returns:
+            str: The summary in markdown.
+        """
+        print("---AGENT: Generating executive summary---")
+        totals = "\n".join(f"- {file_path}: {_summary_line(count_verdicts(verdicts))}"
+                           for file_path, verdicts in file_verdicts.items())
+        issues = [f"- {file_path}{_location(verdict)}: {verdict['unit'] + ' - ' if verdict['unit'] else ''}{_describe(verdict)}"
+                  for file_path, verdicts in file_verdicts.items()
+                  for verdict in verdicts if verdict["status"] == NON_COMPLIANT]
+        if len(issues) > MAX_SUMMARY_VERDICTS:
+            issues = issues[:MAX_SUMMARY_VERDICTS] + [f"- ... and {len(issues) - MAX_SUMMARY_VERDICTS} more."]
+        return self._create_summary_chain().invoke({"totals": totals, "verdicts": "\n".join(issues) or "None."})
+
+    def generate_run_report(self, file_verdicts: dict[str, list[Verdict]], errors: dict[str, str] = None,
+                            skipped: dict[str, str] = None, title: str = "API Governance Run Report",
+                            executive_summary: bool = True) -> str:
+        """
+        Aggregates the verdicts of every file of a run into one markdown report.
+
+        Args:
+            file_verdicts (dict[str, list[Verdict]]): The verdicts of every validated file, keyed by file path.
+            errors (dict[str, str]): Files that could not be validated, with their error.
+            skipped (dict[str, str]): Files that needed no rule checks, with the reason.
+            title (str): The report's title.
+            executive_summary (bool): Add an LLM-written summary of the whole run (one call).
+
+        Returns:
+            str: The run report in markdown.
+        """
+        errors = errors or {}
+        skipped = skipped or {}
+        all_verdicts = [verdict for verdicts in file_verdicts.values() for verdict in verdicts]
+        sections = [f"# {title}", f"**Summary:** {len(file_verdicts)} files validated, {len(skipped)} skipped, "
+                                  f"{len(errors)} failed; {_summary_line(count_verdicts(all_verdicts))}"]
+
+        if executive_summary and all_verdicts:
+            sections.append(f"## Executive Summary\n\n{self.summarize_run(file_verdicts).strip()}")
+
+        table = ["| File | Compliant | Non-compliant | Not evaluated |", "| --- | --- | --- | --- |"]
+        for file_path, verdicts in file_verdicts.items():
+            counts = count_verdicts(verdicts)
+            table.append(f"| `{file_path}` | {counts[COMPLIANT]} | {counts[NON_COMPLIANT]} | {counts[NOT_EVALUATED]} |")
+        for file_path in errors:
+            table.append(f"| `{file_path}` | - | - | - |")
+        if file_verdicts or errors:
+            sections.append("## Files\n\n" + "\n".join(table))
+
+        for file_path, verdicts in file_verdicts.items():
+            if verdicts:
+                sections.append(f"## `{file_path}`\n\n{render_verdicts(verdicts, heading_level=3)}")
+            else:
+                sections.append(f"## `{file_path}`\n\nNo validation was performed.")
+        if skipped:
+            sections.append("## Skipped Files\n\n" + "\n".join(f"- `{file_path}`: {reason}" for file_path, reason in skipped.items()))
+        if errors:
+            sections.append("## Failed Files\n\n" + "\n".join(f"- `{file_path}`: {error}" for file_path, error in errors.items()))
+        return "\n\n".join(sections) + "\n"
@@ -1,36 +1,120 @@
 import os
+import threading
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
 from src.llm.model import create_llm
-from src.graph.state import GovernanceState
+from src.graph.state import GovernanceState, UnitResult, Verdict
 from src.utils.vector_store import get_retriever
+from src.utils.hybrid_retriever import HybridRetriever
+from src.utils.rule_checks import split_rules, extract_snippet_facts, check_rule
+from src.utils.verdict_cache import get_verdict_cache
+from src.utils.verdicts import NOT_EVALUATED, make_verdict, parse_verdict, parse_verdict_list, verdict_from_text, verdict_text
+from src.utils.tracing import span
 
 load_dotenv()
 
+# Supported ways of checking a snippet against its retrieved rules:
+#   sequential - one blocking LLM call per rule (original behaviour)
+#   concurrent - one LLM call per rule, sent in parallel via the chain's batch API
+#   single     - one LLM call that judges the snippet against all rules at once
+VALIDATION_MODES = ("sequential", "concurrent", "single")
+
+# Policy searches (query embedding and scoring) run at once across every file and
+# unit, bounded separately from the network-bound LLM calls since they are CPU-bound
+RETRIEVAL_CONCURRENCY = int(os.environ.get("RETRIEVAL_CONCURRENCY", str(os.cpu_count() or 1)))
+_retrieval_slots = threading.BoundedSemaphore(RETRIEVAL_CONCURRENCY)
+
 class ValidatorAgent:
     """
     An agent that validates code changes against API governance policies.
     """
 
-    def __init__(self):
+    def __init__(self, validation_mode: str = "sequential", max_concurrency: int = 5, use_static_checks: bool = True,
+                 use_verdict_cache: bool = True):
+        if validation_mode not in VALIDATION_MODES:
+            raise ValueError(f"Unknown validation mode '{validation_mode}'. Expected one of {VALIDATION_MODES}.")
+        self.validation_mode = validation_mode
+        self.max_concurrency = max_concurrency
+        self.use_static_checks = use_static_checks
+
         # api_key = os.getenv("OPENAI_API_KEY")
         # if not api_key:
         #     raise ValueError("OPENAI_API_KEY not found in environment variables.")
         
         # Using a more advanced model for better reasoning
-        self.llm = create_llm() #ChatOpenAI(api_key=api_key, model="gpt-5", temperature=0)
+        self.llm = create_llm(role="validator") #ChatOpenAI(api_key=api_key, model="gpt-5", temperature=0)
 
-        self.retriever = get_retriever(k_results=5)
+        # Loaded on first use, so runs whose files all end early never load the embedding model
+        self._retriever = None
+        self._retriever_lock = threading.Lock()
+        self.verdict_cache = get_verdict_cache() if use_verdict_cache else None
 
 
 
+    @property
+    def retriever(self):
+        """The policy retriever, created on first use."""
+        with self._retriever_lock:
+            if self._retriever is None:
+                self._retriever = get_retriever(k_results=5)
+            return self._retriever
+
+    def warm_up(self) -> None:
+        """
+        Loads the retriever (vector store or index) and the embedding model now
+        rather than on the first query, so a long-running service pays for them
+        at startup instead of on its first job.
+        """
+        retriever = self.retriever
+        # Every backend keeps its embeddings on the retriever, or on its vector store (Chroma)
+        embeddings = getattr(retriever, "embeddings", None) or getattr(getattr(retriever, "vectorstore", None), "embeddings", None)
+        if embeddings is not None:
+            # Embeds directly rather than through the retrieval cache, which could serve it without the model
+            embeddings.embed_query("warm-up")
+
     def _create_validation_chain(self):
         """Creates a chain to validate code against a specific rule."""
         prompt = ChatPromptTemplate.from_messages([
             ("system", "You are an API governance expert. Your task is to validate a code snippet against a specific governance rule. Be precise and clear in your judgment."),
-            ("user", "Does the following code comply with this rule?\n\nRule: {rule}\n\nCode:\n```\n{code}\n```\n\nRespond with 'Compliant' or 'Non-compliant', followed by a brief, one-sentence explanation.")
+            ("user", (
+                "Does the following code comply with this rule?\n\nRule: {rule}\n\nCode:\n```\n{code}\n```\n\n"
+                "Respond with a single JSON object with the keys `verdict` ('Compliant' or 'Non-compliant'), "
+                "`explanation` (a brief, one-sentence explanation) and `confidence` (your confidence in the verdict, from 0 to 1)."
+            ))
+        ])
+        return prompt | self.llm | StrOutputParser()
+
+    def _create_multi_rule_validation_chain(self):
+        """Creates a chain to validate code against several rules in a single call."""
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", (
+                "You are an API governance expert. Your task is to validate a code snippet against a numbered list of governance rules. "
+                "Judge each rule independently. Be precise and clear in your judgment. You must respond in a specific JSON format."
+            )),
+            ("user", (
+                "Does the following code comply with each of these rules?\n\n"
+                "Rules:\n{rules}\n\n"
+                "Code:\n```\n{code}\n```\n\n"
+                "Respond with a single JSON array containing exactly one object per rule, in the same order as the rules. "
+                "Each object must have the keys `rule` (the rule number), `verdict` ('Compliant' or 'Non-compliant'), "
+                "`explanation` (a brief, one-sentence explanation) and `confidence` (your confidence in the verdict, from 0 to 1)."
+            ))
+        ])
+        return prompt | self.llm | StrOutputParser()
+
+    def _create_repair_chain(self):
+        """Creates a chain that rewrites a malformed validation response into the expected JSON."""
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", "You fix API governance validation responses that do not match the required JSON format. You must respond with JSON only."),
+            ("user", (
+                "This response to a validation request is invalid: {error}.\n\n"
+                "Response:\n{response}\n\n"
+                "Rewrite it as {expected}, where each object has the keys `verdict` ('Compliant' or 'Non-compliant'), "
+                "`explanation` (a brief, one-sentence explanation) and `confidence` (a number from 0 to 1). "
+                "Keep the original verdicts and explanations."
+            ))
         ])
         return prompt | self.llm | StrOutputParser()
 
@@ -55,13 +139,47 @@ class ValidatorAgent:
             print("No changes detected or query is empty. Skipping document retrieval.")
             return {**state, "relevant_docs": []}
             
-        retrieved_docs = self.retriever.invoke(query)
+        retriever = self.retriever
+        with _retrieval_slots, span("retrieval", "policy_search") as fields:
+            if isinstance(retriever, HybridRetriever):
+                # The hybrid retriever narrows policy categories using signals in the code
+                retrieved_docs = retriever.invoke(query, code=state.get("changed_code", ""))
+            else:
+                retrieved_docs = retriever.invoke(query)
+            fields["documents"] = len(retrieved_docs)
         print(f"Found {len(retrieved_docs)} documents.")
         
         # Storing just the page content for simplicity
         doc_contents = [doc.page_content for doc in retrieved_docs]
         return {**state, "relevant_docs": doc_contents}
 
+    def validate_unit(self, payload: dict) -> dict:
+        """
+        Retrieves policies for and validates a single change unit. Runs as a
+        fan-out branch of the graph, one branch per unit.
+
+        Args:
+            payload (dict): `{"unit": ChangeUnit}`, as sent by the graph's fan-out step.
+
+        Returns:
+            dict: A state update that appends this unit's result to `unit_results`.
+        """
+        unit = payload["unit"]
+        print(f"---AGENT: Validating change unit: {unit['query']}---")
+        unit_state = {"changed_code": unit["code"], "query": unit["query"], "relevant_docs": [], "validation_results": []}
+        unit_state = self.retrieve_documents(unit_state)
+        unit_state = self.validate_code(unit_state)
+
+        verdicts = [{**verdict, "unit": unit["query"], "start_line": unit["start_line"], "end_line": unit["end_line"]}
+                    for verdict in unit_state["verdicts"]]
+        result = UnitResult(
+            unit=unit,
+            relevant_docs=unit_state["relevant_docs"],
+            validation_results=unit_state["validation_results"],
+            verdicts=verdicts,
+        )
+        return {"unit_results": [result]}
+
     def validate_code(self, state: GovernanceState) -> GovernanceState:
         """Validates the code against each retrieved document."""
         print("---AGENT: Validating code against documents---")
@@ -69,14 +187,154 @@ class ValidatorAgent:
         docs = state["relevant_docs"]
         
         if not docs:
-            return {**state, "validation_results": ["No relevant governance documents found to validate against."]}
+            verdicts = [make_verdict(NOT_EVALUATED, "No relevant governance documents found to validate against.")]
+            return {**state, "validation_results": [verdict_text(verdicts[0])], "verdicts": verdicts}
 
-        validation_chain = self._create_validation_chain()
-        results = []
-        
-        for doc in docs:
-            result = validation_chain.invoke({"rule": doc, "code": code})
-            results.append(result)
+        verdicts = []
+        if self.use_static_checks:
+            static_verdicts, docs = self._apply_static_checks(code, docs)
+            verdicts.extend(static_verdicts)
+
+        # Only rules without a conclusive static verdict go to the LLM
+        if docs:
+            verdicts.extend(self._validate_with_memo(code, docs))
+
+        results = [verdict_text(verdict) for verdict in verdicts]
+        for result in results:
             print(f"  - Validation Result: {result}")
             
-        return {**state, "validation_results": results}
+        return {**state, "validation_results": results, "verdicts": verdicts}
+
+    def _apply_static_checks(self, code: str, docs: list[str]) -> tuple[list[Verdict], list[str]]:
+        """
+        Resolves rules that have a deterministic checker directly on the snippet.
+
+        Returns:
+            tuple[list[Verdict], list[str]]: The static verdicts, and the documents
+            (reduced to their unresolved rules) that still need an LLM check.
+        """
+        facts = extract_snippet_facts(code)
+        results = []
+        remaining_docs = []
+        for doc in docs:
+            rules = split_rules(doc)
+            unresolved = []
+            for rule_id, rule_text in rules:
+                outcome = check_rule(rule_id, facts) if rule_id else None
+                if outcome is None:
+                    unresolved.append((rule_id, rule_text))
+                else:
+                    results.append(make_verdict(outcome.status, outcome.message, rule_id, confidence=1.0, source="static"))
+            # Headings left over once every rule in a chunk is resolved don't need a check
+            has_rules = any(rule_id for rule_id, _ in rules)
+            if unresolved and (not has_rules or any(rule_id for rule_id, _ in unresolved)):
+                remaining_docs.append("\n".join(rule_text for _, rule_text in unresolved))
+
+        print(f"Resolved {len(results)} rules statically; {len(remaining_docs)} of {len(docs)} documents need an LLM check.")
+        return results, remaining_docs
+
+    def _validate_with_memo(self, code: str, docs: list[str]) -> list[Verdict]:
+        """
+        Validates documents with the LLM, reusing memoized verdicts for rules this
+        exact snippet has already been checked against.
+
+        Returns:
+            list[Verdict]: One verdict per document, in document order.
+        """
+        if self.verdict_cache is None:
+            return self._validate_with_llm(code, docs)
+
+        rule_ids = [_rule_id(doc) for doc in docs]
+        model = self.llm._get_llm_string()
+        # "single" judges rules side by side with a different prompt, so its verdicts are kept apart
+        chain = self._create_multi_rule_validation_chain() if self.validation_mode == "single" else self._create_validation_chain()
+        prompt = chain.first.pretty_repr()
+        verdicts = [self.verdict_cache.get(code, rule_id, doc, model, prompt) for rule_id, doc in zip(rule_ids, docs)]
+        pending = [i for i, verdict in enumerate(verdicts) if verdict is None]
+        print(f"Reused {len(docs) - len(pending)} memoized verdicts; {len(pending)} documents need an LLM check.")
+
+        if pending:
+            fresh_verdicts = self._validate_with_llm(code, [docs[i] for i in pending])
+            for i, verdict in zip(pending, fresh_verdicts):
+                verdicts[i] = verdict
+                # Free-text fallbacks of unrepairable responses have no confidence; leave them to be retried
+                if verdict["source"] == "llm" and verdict["confidence"] > 0:
+                    self.verdict_cache.put(code, rule_ids[i], docs[i], verdict, model, prompt)
+        return verdicts
+
+    def _validate_with_llm(self, code: str, docs: list[str]) -> list[Verdict]:
+        """Validates documents with the LLM according to the validation mode."""
+        if self.validation_mode == "single":
+            return self._validate_in_single_call(code, docs)
+        if self.validation_mode == "concurrent":
+            return self._validate_concurrently(code, docs)
+        return self._validate_sequentially(code, docs)
+
+    def _validate_sequentially(self, code: str, docs: list[str]) -> list[Verdict]:
+        """Checks each rule with its own blocking LLM call."""
+        validation_chain = self._create_validation_chain()
+        responses = [validation_chain.invoke({"rule": doc, "code": code}) for doc in docs]
+        return self._parse_verdicts(docs, responses)
+
+    def _validate_concurrently(self, code: str, docs: list[str]) -> list[Verdict]:
+        """Checks every rule in parallel, with at most `max_concurrency` requests in flight."""
+        validation_chain = self._create_validation_chain()
+        inputs = [{"rule": doc, "code": code} for doc in docs]
+        responses = validation_chain.batch(inputs, config={"max_concurrency": self.max_concurrency})
+        return self._parse_verdicts(docs, responses)
+
+    def _parse_verdicts(self, docs: list[str], responses: list[str]) -> list[Verdict]:
+        """
+        Parses per-rule responses into verdicts. Responses that don't match the
+        verdict schema get one repair call; if that fails too, the verdict is read
+        from the text (with zero confidence).
+        """
+        verdicts: list = [None] * len(docs)
+        invalid = {}
+        for i, (doc, response) in enumerate(zip(docs, responses)):
+            try:
+                verdicts[i] = parse_verdict(response, _rule_id(doc))
+            except ValueError as e:
+                invalid[i] = str(e)
+
+        if invalid:
+            print(f"WARNING: {len(invalid)} validation responses did not match the verdict schema. Repairing them.")
+            repair_chain = self._create_repair_chain()
+            inputs = [{"error": error, "response": responses[i], "expected": "a single JSON object"} for i, error in invalid.items()]
+            repaired = repair_chain.batch(inputs, config={"max_concurrency": self.max_concurrency})
+            for i, response in zip(invalid, repaired):
+                try:
+                    verdicts[i] = parse_verdict(response, _rule_id(docs[i]))
+                except ValueError as e:
+                    print(f"WARNING: Could not repair a validation response ({e}). Reading the verdict from its text.")
+                    verdicts[i] = verdict_from_text(responses[i], _rule_id(docs[i]))
+        return verdicts
+
+    def _validate_in_single_call(self, code: str, docs: list[str]) -> list[Verdict]:
+        """
+        Checks the snippet against all rules with one LLM call. A response that
+        doesn't match the verdict schema gets one repair call; if that fails too,
+        falls back to concurrent per-rule checks.
+        """
+        rules = "\n\n".join(f"{i}. {doc}" for i, doc in enumerate(docs, start=1))
+        rule_ids = [_rule_id(doc) for doc in docs]
+        multi_rule_chain = self._create_multi_rule_validation_chain()
+        llm_response = multi_rule_chain.invoke({"rules": rules, "code": code})
+
+        try:
+            return parse_verdict_list(llm_response, rule_ids)
+        except ValueError as e:
+            print(f"WARNING: The single-call validation response did not match the verdict schema ({e}). Repairing it.")
+            repaired = self._create_repair_chain().invoke({
+                "error": str(e), "response": llm_response, "expected": f"a single JSON array of exactly {len(docs)} objects, one per rule in order",
+            })
+        try:
+            return parse_verdict_list(repaired, rule_ids)
+        except ValueError as e:
+            print(f"WARNING: Could not repair the single-call validation response ({e}). Falling back to per-rule checks.")
+            return self._validate_concurrently(code, docs)
+
+
+def _rule_id(doc: str) -> str:
+    """The IDs of the rules in a policy document, comma-separated (empty if it has none)."""
+    return ",".join(rule_id for rule_id, _ in split_rules(doc) if rule_id)
@@ -1,4 +1,68 @@
-from typing import List, TypedDict, Optional
+import operator
+from typing import Annotated, List, TypedDict, Optional
+
+# Version of the prompts and validation logic. Stored results and memoized
+# verdicts are keyed by it, so bump it whenever a change to the agents could
+# change a report.
+PROMPT_VERSION = "6"
+
+class ChangeUnit(TypedDict):
+    """
+    A single changed endpoint, function or class detected in a file.
+
+    Attributes:
+        name: The name of the changed definition (empty if unknown).
+        code: The source code of the changed definition.
+        query: A one-sentence summary of the change, used to retrieve policies.
+        start_line: First line of the definition in the new code (0 if unknown).
+        end_line: Last line of the definition in the new code (0 if unknown).
+    """
+    name: str
+    code: str
+    query: str
+    start_line: int
+    end_line: int
+
+class Verdict(TypedDict):
+    """
+    The structured outcome of checking a change against one policy rule.
+
+    Attributes:
+        rule_id: The ID of the rule, e.g. "5.1" (comma-separated for a multi-rule chunk; empty if unknown).
+        status: "Compliant", "Non-compliant" or "Not evaluated".
+        message: The explanation given for the verdict.
+        confidence: The checker's confidence in the verdict, from 0 to 1 (1 for
+                    static checks, 0 when it could not be determined).
+        source: What produced the verdict: "static" or "llm".
+        file: The path of the validated file (empty until the verdict is saved for a file).
+        unit: The summary of the change unit the verdict belongs to (empty if unknown).
+        start_line: First line of that unit in the new code (0 if unknown).
+        end_line: Last line of that unit in the new code (0 if unknown).
+    """
+    rule_id: str
+    status: str
+    message: str
+    confidence: float
+    source: str
+    file: str
+    unit: str
+    start_line: int
+    end_line: int
+
+class UnitResult(TypedDict):
+    """
+    The retrieval and validation outcome for one change unit.
+
+    Attributes:
+        unit: The change unit that was validated.
+        relevant_docs: The policy documents retrieved for this unit.
+        validation_results: The validation results for this unit, as text.
+        verdicts: The structured verdicts for this unit.
+    """
+    unit: ChangeUnit
+    relevant_docs: List[str]
+    validation_results: List[str]
+    verdicts: List[Verdict]
 
 class GovernanceState(TypedDict):
     """
@@ -7,19 +71,29 @@ class GovernanceState(TypedDict):
     Attributes:
         old_code: The original code before changes.
         new_code: The new code with modifications.
-        changed_code: The specific code snippet that has changed.
+        changed_code: The specific code snippet that has changed (all change units joined).
         query: The generated query for the vector store based on the code changes.
+        changed_units: The individual changed endpoints, functions or classes. Each one
+                       is retrieved and validated independently.
+        unit_results: The per-unit validation outcomes. Parallel validation branches
+                      append to this list, so it uses an additive reducer.
         relevant_docs: A list of relevant policy documents retrieved from the vector store.
         validation_results: A list of strings, where each string is a validation result
                             (e.g., "Compliant: Rule X" or "Non-compliant: Rule Y").
-        report: The final, formatted markdown report of all findings.
+        verdicts: The structured verdicts of every change unit, which the report is rendered from.
+        report: The final, formatted markdown report of all verdicts.
+        skip_reason: Why validation ended early without checking any rules (None if it ran).
         error: An optional string to capture any errors that occur during the process.
     """
     old_code: str
     new_code: str
     changed_code: str
     query: str
+    changed_units: List[ChangeUnit]
+    unit_results: Annotated[List[UnitResult], operator.add]
     relevant_docs: List[str]
     validation_results: List[str]
+    verdicts: List[Verdict]
     report: str
+    skip_reason: Optional[str]
     error: Optional[str]
@@ -1,40 +1,85 @@
 from langgraph.graph import StateGraph, END
+from langgraph.types import Send
 
-from src.graph.state import GovernanceState
+from src.graph.state import PROMPT_VERSION, GovernanceState
 from src.agents.detector import CodeChangeDetectorAgent
 from src.agents.validator import ValidatorAgent
 from src.agents.reporter import ReporterAgent
+from src.utils.tracing import traced_node
 
-def create_governance_graph():
+def route_after_triage(state: GovernanceState) -> str:
+    """Skips change detection for files that triage ruled out."""
+    return "finish_early" if state.get("skip_reason") else "detect_changes"
+
+def fan_out_units(state: GovernanceState):
+    """
+    Sends every detected change unit to its own validation branch, or ends
+    early (without loading the retriever or calling the LLM) when detection
+    failed or found nothing to validate.
+    """
+    units = state.get("changed_units") or []
+    if state.get("error") or not units:
+        return "finish_early"
+    return [Send("validate_unit", {"unit": unit}) for unit in units]
+
+def results_version(validation_mode: str = "sequential", use_static_checks: bool = True) -> str:
+    """
+    The version stored results are keyed by: the prompt version plus the
+    validator settings that change a report, so a result is only reused by a
+    run configured the same way.
+    """
+    return f"{PROMPT_VERSION}:{validation_mode}:{'static' if use_static_checks else 'llm-only'}"
+
+def create_governance_graph(validation_mode: str = "sequential", max_concurrency: int = 5, checkpointer=None,
+                            use_static_checks: bool = True, warm_up: bool = False):
     """
     Creates and configures the LangGraph workflow for API governance.
+
+    Args:
+        validation_mode (str): How the validator checks rules ("sequential", "concurrent" or "single").
+        max_concurrency (int): Maximum number of in-flight rule checks in "concurrent" mode.
+        checkpointer: Optional LangGraph checkpointer. When set, every node's output is
+                      saved per `thread_id` so an interrupted run can be resumed.
+        use_static_checks (bool): Decide rules with deterministic AST checks where possible, before asking the LLM.
+        warm_up (bool): Load the retriever and embedding model now instead of on first use
+                        (for long-running services; CLI runs whose files all end early never load them).
     """
     # Initialize agents
     detector = CodeChangeDetectorAgent()
-    validator = ValidatorAgent()
+    validator = ValidatorAgent(validation_mode=validation_mode, max_concurrency=max_concurrency,
+                               use_static_checks=use_static_checks)
+    if warm_up:
+        validator.warm_up()
     reporter = ReporterAgent()
 
     # Initialize the graph with the state object
     graph = StateGraph(GovernanceState)
 
     # --- Define Nodes ---
-    # Each node is a function or method that the graph will call.
-    graph.add_node("detect_changes", detector.find_and_summarize_changes)
-    graph.add_node("retrieve_documents", validator.retrieve_documents)
-    graph.add_node("validate_code", validator.validate_code)
-    graph.add_node("generate_report", reporter.generate_report)
+    # Each node is a function or method that the graph will call. Nodes are wrapped
+    # so their wall time is recorded in the trace passed via `config["configurable"]`.
+    graph.add_node("triage", traced_node("triage", detector.triage))
+    graph.add_node("detect_changes", traced_node("detect_changes", detector.find_and_summarize_changes))
+    graph.add_node("validate_unit", traced_node("validate_unit", validator.validate_unit))
+    graph.add_node("generate_report", traced_node("generate_report", reporter.generate_report))
+    graph.add_node("finish_early", traced_node("finish_early", reporter.report_skipped))
 
     # --- Define Edges ---
     # This defines the flow of control between the nodes.
-    graph.set_entry_point("detect_changes")
-    graph.add_edge("detect_changes", "retrieve_documents")
-    graph.add_edge("retrieve_documents", "validate_code")
-    graph.add_edge("validate_code", "generate_report")
+    # Unchanged and non-API files, detection errors and changes without definitions
+    # go straight to `finish_early`, which records why validation was skipped.
+    graph.set_entry_point("triage")
+    graph.add_conditional_edges("triage", route_after_triage, ["detect_changes", "finish_early"])
+    # Fan out: each changed unit is retrieved and validated in its own parallel branch.
+    # The branches' results are merged through the `unit_results` reducer.
+    graph.add_conditional_edges("detect_changes", fan_out_units, ["validate_unit", "finish_early"])
+    graph.add_edge("validate_unit", "generate_report")
     graph.add_edge("generate_report", END)
+    graph.add_edge("finish_early", END)
 
     # --- Compile the Graph ---
     # The compiled graph is a runnable object.
-    app = graph.compile()
+    app = graph.compile(checkpointer=checkpointer)
     
     return app
 
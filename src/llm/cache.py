@@ -0,0 +1,74 @@
+import os
+import json
+import hashlib
+import threading
+from typing import Any, Optional, Sequence
+from dotenv import load_dotenv
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+
+from src.utils.kv_store import SQLiteKVStore
+from src.utils.tracing import record_event
+
+load_dotenv()
+
+# --- Configuration ---
+LLM_CACHE_PATH = os.environ.get("LLM_CACHE_PATH", os.path.join(".cache", "llm_cache.sqlite3"))
+LLM_CACHE_MAX_MB = int(os.environ.get("LLM_CACHE_MAX_MB", "256"))
+
+
+class PersistentLLMCache(BaseCache):
+    """
+    A content-addressed, on-disk cache of LLM responses.
+
+    Entries are keyed by a SHA-256 hash of the rendered prompt together with the
+    LangChain `llm_string`, which serializes the model parameters (Azure
+    deployment, temperature, ...). Plug it into any chat model via its `cache` argument.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, max_bytes: int = LLM_CACHE_MAX_MB * 1024 * 1024):
+        self.store = SQLiteKVStore(path, max_bytes=max_bytes, table="llm_responses")
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        """Returns the cached generations for this prompt and model, or None on a miss."""
+        value = self.store.get(self._key(prompt, llm_string))
+        record_event("cache", "llm", hit=value is not None)
+        if value is None:
+            return None
+        return [loads(generation, allowed_objects="core") for generation in json.loads(value)]
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        """Stores the generations returned for this prompt and model."""
+        value = json.dumps([dumps(generation) for generation in return_val])
+        self.store.put(self._key(prompt, llm_string), value.encode("utf-8"))
+
+    def clear(self, **kwargs: Any) -> None:
+        """Removes every cached response."""
+        self.store.clear()
+
+    def stats(self) -> dict:
+        """Returns the hit/miss counters and size of the cache."""
+        return self.store.stats()
+
+
+_llm_cache: Optional[PersistentLLMCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[PersistentLLMCache]:
+    """
+    Returns the process-wide LLM response cache shared by all agents, or None
+    when caching is disabled with `LLM_CACHE_DISABLED=1`.
+    """
+    global _llm_cache
+    if os.environ.get("LLM_CACHE_DISABLED", "").lower() in ("1", "true", "yes"):
+        return None
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = PersistentLLMCache()
+        return _llm_cache
@@ -0,0 +1,69 @@
+import re
+import json
+import time
+import hashlib
+from typing import Any, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from src.llm.tokens import count_tokens
+
+NEW_CODE_PATTERN = re.compile(r"## New Code:\n```python\n(.*?)\n```", re.DOTALL)
+NUMBERED_RULE_PATTERN = re.compile(r"^(\d+)\. ", re.MULTILINE)
+
+
+class FakeGovernanceLLM(BaseChatModel):
+    """
+    A deterministic local stand-in for the Azure chat model, used for offline
+    benchmarks (`LLM_BACKEND=fake`).
+
+    It recognizes the detector, validator and reporter prompts and answers each
+    with a well-formed canned response after `latency_ms`, so the whole graph
+    runs without network access. The same prompt always gets the same verdict.
+    """
+
+    latency_ms: float = 0.0
+    # Roughly one in `non_compliant_every` rule checks is judged non-compliant
+    non_compliant_every: int = 4
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-governance"
+
+    def _verdict(self, text: str) -> str:
+        digest = int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16)
+        return "Non-compliant" if digest % self.non_compliant_every == 0 else "Compliant"
+
+    def _respond(self, prompt: str) -> str:
+        if "`changed_code_snippet` and `change_summary`" in prompt:
+            match = NEW_CODE_PATTERN.search(prompt)
+            return json.dumps({
+                "changed_code_snippet": match.group(1) if match else "",
+                "change_summary": "The API endpoints in this file were modified.",
+            })
+        if "single JSON array" in prompt:
+            rule_numbers = [int(n) for n in NUMBERED_RULE_PATTERN.findall(prompt.split("Code:\n```")[0])]
+            return json.dumps([
+                {"rule": n, "verdict": self._verdict(f"{n}\n{prompt}"), "explanation": "Synthetic verdict.", "confidence": 0.9}
+                for n in range(1, max(rule_numbers, default=0) + 1)
+            ])
+        if "comply with this rule" in prompt:
+            return json.dumps({"verdict": self._verdict(prompt), "explanation": "Synthetic verdict.", "confidence": 0.9})
+        if "executive summary" in prompt:
+            return "Synthetic executive summary.\n\n### Recommendations\n\n- None."
+        return "OK"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        prompt = "\n".join(str(message.content) for message in messages)
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        content = self._respond(prompt)
+        input_tokens, output_tokens = count_tokens(prompt), count_tokens(content)
+        message = AIMessage(content=content, usage_metadata={
+            "input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens,
+        })
+        return ChatResult(generations=[ChatGeneration(message=message)])
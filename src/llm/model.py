@@ -1,31 +1,33 @@
-import os
 from dotenv import load_dotenv
-from langchain_openai import AzureChatOpenAI
+from langchain_core.language_models.chat_models import BaseChatModel
+from src.llm.cache import get_llm_cache
+from src.llm.router import RoutedChatModel, get_router
+from src.utils.tracing import TraceCallbackHandler
 
 load_dotenv()
 
-def create_llm() -> AzureChatOpenAI:
-    api_key = os.environ.get("OPENAI_API_KEY")
-    if not api_key:
-        raise RuntimeError("OPENAI_API_KEY is not set in environment.")
+def create_llm(role: str = "default", use_cache: bool = True) -> BaseChatModel:
+    """
+    Creates the chat model used by an agent.
 
-    endpoint = os.environ.get("API_AZURE_ENDPOINT")
-    if not endpoint:
-        raise RuntimeError("API_AZURE_ENDPOINT is not set in environment.")
-    
-    deployment = os.environ.get("API_AZURE_MODEL_DEPLOYMENT")
-    if not deployment:
-        raise RuntimeError("API_AZURE_MODEL_DEPLOYMENT is not set in environment.")
+    Requests are routed to the deployments of the tier configured for `role`
+    ("detector", "validator" or "reporter") in `LLM_DEPLOYMENTS_FILE`, with
+    per-deployment rate limits and failover (see `src/llm/router.py`). Without
+    that file, the single Azure deployment configured by `API_AZURE_*` serves
+    every role.
 
-    api_version = os.environ.get("API_ENDPOINT_VERSION")
-    if not api_version:
-        raise RuntimeError("API_ENDPOINT_VERSION is not set in environment.")
+    Set `LLM_BACKEND=fake` to get a deterministic local model instead (see
+    `src/llm/fake.py`), with `FAKE_LLM_LATENCY_MS` of simulated latency per call.
 
-
-    return AzureChatOpenAI(
-        azure_endpoint=endpoint,
-        api_key=api_key,
-        azure_deployment=deployment,
-        api_version=api_version,
-        temperature=1
-    )
\ No newline at end of file
+    Args:
+        role (str): The agent role the model is for.
+        use_cache (bool): Whether to serve repeated prompts from the shared on-disk
+                          response cache (see `src/llm/cache.py`).
+    """
+    return RoutedChatModel(
+        router=get_router(),
+        role=role,
+        cache=get_llm_cache() if use_cache else False,
+        # Records latency and token usage of every call into the current trace
+        callbacks=[TraceCallbackHandler()],
+    )
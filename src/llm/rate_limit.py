@@ -0,0 +1,270 @@
+import os
+import time
+import random
+import threading
+from typing import Callable, Optional, TypeVar
+
+import openai
+
+from src.utils.tracing import record_event
+
+# --- Configuration ---
+# Requests and tokens per minute allowed by the deployment's quota (0 disables that budget)
+LLM_RPM = int(os.environ.get("LLM_RPM", "0"))
+LLM_TPM = int(os.environ.get("LLM_TPM", "0"))
+# Bounds of the adaptive concurrency limit
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "16"))
+LLM_MIN_CONCURRENCY = int(os.environ.get("LLM_MIN_CONCURRENCY", "1"))
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "6"))
+LLM_BACKOFF_BASE_S = float(os.environ.get("LLM_BACKOFF_BASE_S", "1.0"))
+LLM_BACKOFF_MAX_S = float(os.environ.get("LLM_BACKOFF_MAX_S", "60.0"))
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket refilled at `per_minute / 60` per second.
+
+    Callers reserve capacity up front and sleep off any debt, so concurrent
+    callers queue fairly without polling. The balance can be corrected once the
+    real cost of a request is known.
+    """
+
+    def __init__(self, per_minute: int):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Takes `amount` from the bucket and returns how many seconds the caller must wait for it."""
+        with self._lock:
+            self._refill()
+            self._tokens -= amount
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def wait_time(self, amount: float) -> float:
+        """Returns how many seconds a reservation of `amount` would wait now, without taking anything."""
+        with self._lock:
+            self._refill()
+            return 0.0 if self._tokens >= amount else (amount - self._tokens) / self.rate
+
+    def adjust(self, amount: float) -> None:
+        """Takes `amount` more from the bucket (or returns it, if negative)."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens - amount)
+
+
+class AdaptiveConcurrencyLimit:
+    """
+    An AIMD concurrency limit: it grows by roughly one slot per limit's worth of
+    successful requests and halves on a throttling or server error.
+
+    Failures of requests that started before the last decrease don't decrease
+    the limit again, so one burst of 429s halves it once rather than collapsing it.
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int, decrease_factor: float = 0.5):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> float:
+        """Blocks until a slot is free; returns the start time to pass to `release`."""
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+            return time.monotonic()
+
+    def release(self, started_at: float, overloaded: bool) -> None:
+        with self._condition:
+            self.in_flight -= 1
+            if overloaded:
+                if started_at >= self._last_decrease:
+                    self.limit = max(self.minimum, self.limit * self.decrease_factor)
+                    self._last_decrease = time.monotonic()
+            else:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+
+
+def failure_kind(error: BaseException) -> Optional[str]:
+    """Classifies a failed request as "throttled", "server_error" or "connection", or None if it should not be retried."""
+    status = getattr(error, "status_code", None)
+    if status == 429:
+        return "throttled"
+    if status is not None and status >= 500:
+        return "server_error"
+    if isinstance(error, openai.APIConnectionError):
+        return "connection"
+    return None
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Returns the server's requested delay in seconds, from `retry-after-ms` or `retry-after`."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    for header, scale in (("retry-after-ms", 1000.0), ("retry-after", 1.0)):
+        try:
+            return float(headers.get(header)) / scale
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+class LLMRateLimiter:
+    """
+    A throttle for the LLM requests sent to one deployment.
+
+    Every request first waits for the request and token budgets (token buckets
+    sized from the deployment's RPM and TPM quotas) and for a slot under the
+    adaptive concurrency limit. Throttled (429), server-error and connection
+    failures are retried with jittered exponential backoff. A `Retry-After`
+    from the server is always honored and pauses every caller, not only the
+    one that was throttled.
+    """
+
+    def __init__(self, rpm: int = LLM_RPM, tpm: int = LLM_TPM, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 min_concurrency: int = LLM_MIN_CONCURRENCY, max_retries: int = LLM_MAX_RETRIES,
+                 backoff_base_s: float = LLM_BACKOFF_BASE_S, backoff_max_s: float = LLM_BACKOFF_MAX_S):
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self.concurrency = AdaptiveConcurrencyLimit(max_concurrency, min_concurrency, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self._metrics = {
+            "requests": 0, "succeeded": 0, "failed": 0, "retries": 0, "failovers": 0,
+            "throttled": 0, "server_errors": 0, "connection_errors": 0,
+            "budget_wait_s": 0.0, "backoff_s": 0.0,
+        }
+
+    def _count(self, key: str, amount: float = 1) -> None:
+        with self._lock:
+            self._metrics[key] += amount
+
+    def budget_wait(self, estimated_tokens: int = 0) -> float:
+        """Returns how long a request would now wait for the request and token budgets (and any Retry-After pause)."""
+        wait = max(0.0, self._paused_until - time.monotonic())
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(1))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(estimated_tokens))
+        return wait
+
+    def _wait_for_budget(self, estimated_tokens: int) -> None:
+        wait = max(0.0, self._paused_until - time.monotonic())
+        if self.requests is not None:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.reserve(estimated_tokens))
+        if wait > 0:
+            self._count("budget_wait_s", wait)
+            record_event("rate_limit", "budget_wait", wait)
+            time.sleep(wait)
+
+    def _pause(self, retry_after: Optional[float]) -> None:
+        # The server's Retry-After holds back every caller of this deployment
+        if retry_after is not None:
+            with self._lock:
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        # "Full jitter": a random delay up to the exponential bound spreads out retries
+        delay = random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * 2 ** attempt))
+        if retry_after is not None:
+            delay += retry_after
+            self._pause(retry_after)
+        return delay
+
+    def call(self, request: Callable[[], T], estimated_tokens: int = 0, max_retries: Optional[int] = None,
+             fail_over: bool = False, retry: bool = False) -> T:
+        """
+        Runs `request` under the rate limits, retrying it on throttling and transient errors.
+
+        Args:
+            request: The call to make.
+            estimated_tokens (int): Tokens to budget for the call.
+            max_retries (int): Overrides the limiter's retry count (0 lets the caller fail over instead).
+            fail_over (bool): The caller retries elsewhere, so a retryable failure after the last
+                              retry counts as a failover rather than a failed request.
+            retry (bool): The request is a caller's retry of one that failed elsewhere.
+
+        Raises:
+            Exception: The last error, once retries are exhausted or for non-retryable errors.
+        """
+        max_retries = self.max_retries if max_retries is None else max_retries
+        if retry:
+            self._count("retries")
+        for attempt in range(max_retries + 1):
+            self._wait_for_budget(estimated_tokens)
+            started_at = self.concurrency.acquire()
+            self._count("requests")
+            try:
+                result = request()
+            except Exception as e:
+                kind = failure_kind(e)
+                self.concurrency.release(started_at, overloaded=kind in ("throttled", "server_error"))
+                if self.tokens is not None:
+                    # A rejected request did not use its token budget
+                    self.tokens.adjust(-estimated_tokens)
+                if kind is not None:
+                    self._count({"throttled": "throttled", "server_error": "server_errors", "connection": "connection_errors"}[kind])
+                if kind is not None and attempt == max_retries and fail_over:
+                    self._pause(retry_after_seconds(e))
+                    self._count("failovers")
+                    raise
+                if kind is None or attempt == max_retries:
+                    self._count("failed")
+                    raise
+                delay = self._backoff(attempt, retry_after_seconds(e))
+                self._count("retries")
+                self._count("backoff_s", delay)
+                record_event("llm_retry", kind, delay, attempt=attempt + 1)
+                time.sleep(delay)
+                continue
+            self.concurrency.release(started_at, overloaded=False)
+            self._count("succeeded")
+            return result
+
+    def settle_tokens(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Corrects the token budget once a request's real usage is known."""
+        if self.tokens is not None:
+            self.tokens.adjust(actual_tokens - estimated_tokens)
+
+    def metrics(self) -> dict:
+        """Returns request, retry and wait counters plus the current concurrency limit."""
+        with self._lock:
+            metrics = dict(self._metrics)
+        metrics["budget_wait_s"] = round(metrics["budget_wait_s"], 3)
+        metrics["backoff_s"] = round(metrics["backoff_s"], 3)
+        metrics["concurrency_limit"] = round(self.concurrency.limit, 2)
+        metrics["in_flight"] = self.concurrency.in_flight
+        return metrics
+
+
+_rate_limiter: Optional[LLMRateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> LLMRateLimiter:
+    """Returns the process-wide rate limiter of the default deployment, configured by the environment."""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = LLMRateLimiter()
+        return _rate_limiter
@@ -0,0 +1,298 @@
+import os
+import json
+import time
+import random
+import threading
+from typing import Any, Callable, List, Optional, TypeVar
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatResult
+from langchain_openai import AzureChatOpenAI
+
+from src.llm.fake import FakeGovernanceLLM
+from src.llm.rate_limit import (
+    LLM_BACKOFF_BASE_S, LLM_BACKOFF_MAX_S, LLM_MAX_RETRIES, LLM_MIN_CONCURRENCY,
+    LLMRateLimiter, failure_kind, get_rate_limiter, retry_after_seconds,
+)
+from src.llm.tokens import count_tokens
+from src.utils.tracing import record_event
+
+# --- Configuration ---
+# JSON file describing the deployments and which tier each agent role uses, e.g.
+# {
+#   "deployments": [
+#     {"name": "large-east", "endpoint": "https://...", "deployment": "gpt-4o", "tier": "large",
+#      "weight": 2, "rpm": 600, "tpm": 150000, "max_concurrency": 16, "api_key_env": "OPENAI_API_KEY"},
+#     {"name": "small-east", "endpoint": "https://...", "deployment": "gpt-4o-mini", "tier": "small"}
+#   ],
+#   "roles": {"detector": ["small", "large"], "validator": ["large"], "reporter": ["small", "large"]}
+# }
+# Tiers listed after the first one are only used when every deployment of the earlier tiers is unavailable.
+# Without a file, the single deployment configured by `API_AZURE_*` serves every role.
+LLM_DEPLOYMENTS_FILE = os.environ.get("LLM_DEPLOYMENTS_FILE")
+DEFAULT_TIER = "default"
+# Tokens budgeted for a completion before the real usage is known
+COMPLETION_TOKEN_ESTIMATE = 256
+
+T = TypeVar("T")
+
+
+class Deployment:
+    """One model deployment with its own rate limits and health state."""
+
+    def __init__(self, name: str, tier: str, model: BaseChatModel, limiter: LLMRateLimiter, weight: float = 1.0):
+        self.name = name
+        self.tier = tier
+        self.model = model
+        self.limiter = limiter
+        self.weight = weight
+        self.unavailable_until = 0.0
+        self.consecutive_failures = 0
+        self.routed = 0
+        # Smooth weighted round-robin state
+        self.current_weight = 0.0
+
+    def load(self) -> float:
+        """In-flight requests relative to the deployment's concurrency limit (1 when it is saturated)."""
+        return self.limiter.concurrency.in_flight / self.limiter.concurrency.limit
+
+
+class ModelRouter:
+    """
+    Routes each agent role's requests to the deployments of its tiers.
+
+    Requests are spread over the available deployments of the role's first tier
+    that has one by smooth weighted round-robin, so traffic splits by weight even
+    when requests are sequential. A deployment is available when it is not
+    cooling down, its request and token budgets can take the request right away
+    and its concurrency limit is not saturated. A throttled or failing deployment
+    is put on a cooldown (its `Retry-After`, or an exponential backoff for
+    repeated failures) and the request fails over to the next deployment right
+    away. When every candidate is out of budget, the one whose budget frees up
+    first takes the request; requests only wait for a cooldown once every
+    candidate is cooling down.
+    """
+
+    def __init__(self, deployments: list[Deployment], roles: dict[str, list[str]], max_attempts: int = LLM_MAX_RETRIES + 1):
+        if not deployments:
+            raise ValueError("At least one LLM deployment must be configured.")
+        self.deployments = deployments
+        self.roles = roles
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+
+    def tiers(self, role: str) -> list[str]:
+        """Returns the tiers a role may use, in order of preference (every tier for unmapped roles)."""
+        tiers = self.roles.get(role) or self.roles.get("default")
+        return tiers or list(dict.fromkeys(d.tier for d in self.deployments))
+
+    def candidates(self, role: str) -> list[Deployment]:
+        return [d for tier in self.tiers(role) for d in self.deployments if d.tier == tier]
+
+    def _pick(self, role: str, estimated_tokens: int = 0) -> Optional[Deployment]:
+        now = time.monotonic()
+        with self._lock:
+            healthy = [d for d in self.candidates(role) if d.unavailable_until <= now]
+            if not healthy:
+                return None
+            budget_waits = {d.name: d.limiter.budget_wait(estimated_tokens) for d in healthy}
+            for tier in self.tiers(role):
+                in_budget = [d for d in healthy if d.tier == tier and budget_waits[d.name] == 0]
+                available = [d for d in in_budget if d.load() < 1] or in_budget
+                if available:
+                    deployment = self._next_weighted(available)
+                    break
+            else:
+                # Every candidate is out of budget: take the one that frees up first, and wait there
+                deployment = min(healthy, key=lambda d: budget_waits[d.name])
+            deployment.routed += 1
+            return deployment
+
+    @staticmethod
+    def _next_weighted(deployments: list[Deployment]) -> Deployment:
+        """Smooth weighted round-robin: deployments are picked in proportion to their weights, interleaved."""
+        total = sum(d.weight for d in deployments)
+        for d in deployments:
+            d.current_weight += d.weight
+        deployment = max(deployments, key=lambda d: d.current_weight)
+        deployment.current_weight -= total
+        return deployment
+
+    def _mark_failed(self, deployment: Deployment, retry_after: Optional[float]) -> None:
+        with self._lock:
+            deployment.consecutive_failures += 1
+            cooldown = retry_after
+            if cooldown is None:
+                bound = min(LLM_BACKOFF_MAX_S, LLM_BACKOFF_BASE_S * 2 ** (deployment.consecutive_failures - 1))
+                cooldown = random.uniform(bound / 2, bound)
+            deployment.unavailable_until = max(deployment.unavailable_until, time.monotonic() + cooldown)
+
+    def _mark_succeeded(self, deployment: Deployment) -> None:
+        with self._lock:
+            deployment.consecutive_failures = 0
+
+    def call(self, role: str, request: Callable[[BaseChatModel], T], estimated_tokens: int = 0) -> T:
+        """
+        Runs `request` against a deployment for `role`, failing over between
+        deployments on throttling and transient errors.
+
+        Raises:
+            Exception: The last error, once every attempt failed or for non-retryable errors.
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            deployment = self._pick(role, estimated_tokens)
+            if deployment is None:
+                # Every candidate is cooling down, so wait for the first one to come back
+                wait = max(0.0, min(d.unavailable_until for d in self.candidates(role)) - time.monotonic())
+                record_event("rate_limit", "all_deployments_cooling_down", wait)
+                time.sleep(wait + random.uniform(0, LLM_BACKOFF_BASE_S / 10))
+                deployment = self._pick(role, estimated_tokens)
+                if deployment is None:
+                    continue
+
+            try:
+                # The limiter budgets and throttles the deployment; retries happen here, across deployments
+                result = deployment.limiter.call(lambda: request(deployment.model), estimated_tokens, max_retries=0,
+                                                 fail_over=attempt < self.max_attempts, retry=attempt > 1)
+            except Exception as e:
+                kind = failure_kind(e)
+                if kind is None:
+                    raise
+                self._mark_failed(deployment, retry_after_seconds(e))
+                record_event("llm_retry", kind, attempt=attempt, deployment=deployment.name)
+                if attempt == self.max_attempts:
+                    raise
+                continue
+            self._mark_succeeded(deployment)
+            return result
+        raise RuntimeError(f"No LLM deployment for role '{role}' became available after {self.max_attempts} attempts.")
+
+    def metrics(self) -> dict:
+        """Returns routing, health and rate-limit metrics per deployment."""
+        now = time.monotonic()
+        return {
+            d.name: {
+                "tier": d.tier,
+                "routed": d.routed,
+                "available": d.unavailable_until <= now,
+                "consecutive_failures": d.consecutive_failures,
+                **d.limiter.metrics(),
+            }
+            for d in self.deployments
+        }
+
+
+class RoutedChatModel(BaseChatModel):
+    """
+    A chat model that sends each request through the `ModelRouter` for its role.
+
+    Caching and callbacks belong on this model, so cache hits never consume a
+    deployment's rate-limit budget.
+    """
+
+    router: ModelRouter
+    role: str
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    @property
+    def _llm_type(self) -> str:
+        return "routed-chat"
+
+    def _get_llm_string(self, stop: Optional[List[str]] = None, **kwargs: Any) -> str:
+        # Cache entries are keyed by the role's preferred tier and that tier's model parameters
+        preferred = self.router.candidates(self.role)[0]
+        return f"tier={preferred.tier}\x00{preferred.model._get_llm_string(stop=stop, **kwargs)}"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        estimated_tokens = sum(count_tokens(str(message.content)) for message in messages) + COMPLETION_TOKEN_ESTIMATE
+        served_by = {}
+
+        def request(model: BaseChatModel) -> ChatResult:
+            served_by["model"] = model
+            return model._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+        result = self.router.call(self.role, request, estimated_tokens)
+        usage = getattr(result.generations[0].message, "usage_metadata", None) if result.generations else None
+        if usage and "total_tokens" in usage:
+            for deployment in self.router.deployments:
+                if deployment.model is served_by["model"]:
+                    deployment.limiter.settle_tokens(estimated_tokens, usage["total_tokens"])
+        return result
+
+
+def _create_model(config: dict) -> BaseChatModel:
+    """Creates the chat model of one deployment (retries are left to the router)."""
+    if os.environ.get("LLM_BACKEND", "azure") == "fake":
+        return FakeGovernanceLLM(latency_ms=float(os.environ.get("FAKE_LLM_LATENCY_MS", "0")))
+
+    api_key_env = config.get("api_key_env", "OPENAI_API_KEY")
+    settings = {
+        "api_key": os.environ.get(api_key_env),
+        "endpoint": config.get("endpoint") or os.environ.get("API_AZURE_ENDPOINT"),
+        "deployment": config.get("deployment") or os.environ.get("API_AZURE_MODEL_DEPLOYMENT"),
+        "api_version": config.get("api_version") or os.environ.get("API_ENDPOINT_VERSION"),
+    }
+    for setting, value in settings.items():
+        if not value:
+            raise RuntimeError(f"No {setting} configured for LLM deployment '{config.get('name', DEFAULT_TIER)}'.")
+
+    return AzureChatOpenAI(
+        azure_endpoint=settings["endpoint"],
+        api_key=settings["api_key"],
+        azure_deployment=settings["deployment"],
+        api_version=settings["api_version"],
+        temperature=config.get("temperature", 1),
+        # Retries are handled by the router, which also honors Retry-After
+        max_retries=0,
+    )
+
+
+def load_router(path: Optional[str] = LLM_DEPLOYMENTS_FILE) -> ModelRouter:
+    """
+    Builds the router from a deployments file, or a single default deployment
+    (configured by the `API_AZURE_*` variables and the shared rate limiter) without one.
+    """
+    if not path:
+        deployment = Deployment(DEFAULT_TIER, DEFAULT_TIER, _create_model({}), get_rate_limiter())
+        return ModelRouter([deployment], {})
+
+    with open(path) as f:
+        config = json.load(f)
+    deployments = []
+    for entry in config.get("deployments", []):
+        limiter = LLMRateLimiter(
+            rpm=entry.get("rpm", 0),
+            tpm=entry.get("tpm", 0),
+            max_concurrency=entry.get("max_concurrency", 16),
+            min_concurrency=entry.get("min_concurrency", LLM_MIN_CONCURRENCY),
+        )
+        deployments.append(Deployment(
+            entry["name"], entry.get("tier", DEFAULT_TIER), _create_model(entry), limiter, float(entry.get("weight", 1.0)),
+        ))
+    roles = {
+        role: [tiers] if isinstance(tiers, str) else list(tiers)
+        for role, tiers in config.get("roles", {}).items()
+    }
+    return ModelRouter(deployments, roles)
+
+
+_router: Optional[ModelRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_router() -> ModelRouter:
+    """Returns the model router shared by every agent in the process."""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = load_router()
+        return _router
+
+
+def router_metrics() -> dict:
+    """Returns the metrics of the process-wide router, or an empty dict if no model was created yet."""
+    return _router.metrics() if _router is not None else {}
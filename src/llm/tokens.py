@@ -0,0 +1,32 @@
+import functools
+import threading
+
+# Encoding used by the GPT-4o family of Azure OpenAI deployments
+DEFAULT_ENCODING = "o200k_base"
+
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding(name: str):
+    # Concurrent first calls would otherwise each load (or fail to download) the encoding
+    with _encoding_lock:
+        return _load_encoding(name)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_encoding(name: str):
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        # tiktoken downloads its BPE files on first use, which fails offline
+        print(f"WARNING: Could not load tiktoken encoding '{name}' ({e}). Estimating token counts instead.")
+        return None
+
+
+def count_tokens(text: str, encoding_name: str = DEFAULT_ENCODING) -> int:
+    """Counts the tokens in `text`, falling back to a ~4 characters per token estimate."""
+    encoding = _get_encoding(encoding_name)
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
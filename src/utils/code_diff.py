@@ -0,0 +1,292 @@
+import ast
+import difflib
+from dataclasses import dataclass, field
+from typing import Optional
+
+# Decorator attributes that register a route on a Flask app/blueprint or a FastAPI app/router.
+ROUTE_DECORATORS = {"route", "get", "post", "put", "patch", "delete", "head", "options", "api_route", "websocket"}
+
+# Module-level calls that register routes without a decorator. Changes to these
+# cannot be attributed to a single definition, so they are left to the LLM.
+ROUTE_REGISTRATION_CALLS = {"add_url_rule", "add_api_route", "include_router", "register_blueprint"}
+
+# Top-level packages of web frameworks; importing one marks a module as API-relevant.
+API_FRAMEWORK_MODULES = {
+    "flask", "flask_restful", "flask_restx", "fastapi", "starlette", "django", "rest_framework", "ninja",
+    "aiohttp", "tornado", "sanic", "falcon", "bottle", "connexion", "quart", "litestar",
+}
+
+
+@dataclass
+class Route:
+    """An HTTP route declared by a decorator on `owner` (e.g. `app`, `bp`, `router`)."""
+    path: str
+    methods: list[str]
+    owner: str = ""
+
+    def __str__(self) -> str:
+        return f"{'/'.join(self.methods)} {self.path}"
+
+
+@dataclass
+class Definition:
+    """A top-level function or class, with its exact source including decorators."""
+    name: str
+    kind: str
+    source: str
+    start_line: int
+    end_line: int
+    routes: list[Route] = field(default_factory=list)
+    fingerprint: str = ""
+
+
+@dataclass
+class DefinitionChange:
+    """A definition that was added to or modified in the new code."""
+    change_type: str
+    definition: Definition
+
+
+def extract_routes(node: ast.AST) -> list[Route]:
+    """Returns the routes declared by the Flask/FastAPI decorators of a function or class."""
+    routes = []
+    for decorator in getattr(node, "decorator_list", []):
+        if not isinstance(decorator, ast.Call) or not isinstance(decorator.func, ast.Attribute):
+            continue
+        attr = decorator.func.attr
+        if attr not in ROUTE_DECORATORS:
+            continue
+
+        path = None
+        if decorator.args and isinstance(decorator.args[0], ast.Constant) and isinstance(decorator.args[0].value, str):
+            path = decorator.args[0].value
+        methods = []
+        for keyword in decorator.keywords:
+            if keyword.arg == "path" and isinstance(keyword.value, ast.Constant):
+                path = keyword.value.value
+            elif keyword.arg == "methods" and isinstance(keyword.value, (ast.List, ast.Tuple, ast.Set)):
+                methods = [
+                    elt.value.upper() for elt in keyword.value.elts
+                    if isinstance(elt, ast.Constant) and isinstance(elt.value, str)
+                ]
+        if path is None:
+            continue
+
+        if not methods:
+            methods = ["GET"] if attr in ("route", "api_route") else [attr.upper()]
+        routes.append(Route(path=path, methods=methods, owner=ast.unparse(decorator.func.value)))
+    return routes
+
+
+def is_api_module(code: str) -> Optional[bool]:
+    """
+    Whether a Python module can define or register HTTP endpoints: it imports a
+    web framework, declares routes with decorators (at any depth) or registers
+    them imperatively.
+
+    Returns:
+        Optional[bool]: None if the code cannot be parsed.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return None
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import) and any(alias.name.split(".")[0] in API_FRAMEWORK_MODULES for alias in node.names):
+            return True
+        if isinstance(node, ast.ImportFrom) and node.level == 0 and (node.module or "").split(".")[0] in API_FRAMEWORK_MODULES:
+            return True
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) and extract_routes(node):
+            return True
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr in ROUTE_REGISTRATION_CALLS:
+            return True
+    return False
+
+
+def extract_definitions(code: str) -> dict[str, Definition]:
+    """
+    Parses Python source and returns its top-level functions and classes by name.
+
+    Raises:
+        SyntaxError: If the code cannot be parsed.
+    """
+    tree = ast.parse(code)
+    lines = code.splitlines()
+    definitions = {}
+    for node in tree.body:
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            continue
+        start_line = min([node.lineno] + [d.lineno for d in node.decorator_list])
+        end_line = node.end_lineno or node.lineno
+        definitions[node.name] = Definition(
+            name=node.name,
+            kind="class" if isinstance(node, ast.ClassDef) else "function",
+            source="\n".join(lines[start_line - 1:end_line]),
+            start_line=start_line,
+            end_line=end_line,
+            routes=extract_routes(node),
+            # ast.dump ignores formatting and comments, so only real code changes count
+            fingerprint=ast.dump(node),
+        )
+    return definitions
+
+
+def _module_level_statements(code: str) -> list[str]:
+    """Returns a dump of every top-level statement that is not a function or class definition."""
+    tree = ast.parse(code)
+    return [
+        ast.dump(node) for node in tree.body
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+    ]
+
+
+def _route_registrations(statements: list[str]) -> list[str]:
+    return [
+        statement for statement in statements
+        if any(f"attr='{call}'" in statement for call in ROUTE_REGISTRATION_CALLS)
+    ]
+
+
+def diff_definitions(old_code: str, new_code: str) -> Optional[list[DefinitionChange]]:
+    """
+    Compares the top-level definitions of two versions of a Python module.
+
+    Returns:
+        Optional[list[DefinitionChange]]: The added and modified definitions in
+        source order. The list is empty when nothing needs validating (only
+        formatting, comments or removed definitions changed). Returns None if the
+        AST comparison cannot decide: either version fails to parse, only
+        module-level statements changed, or routes are registered imperatively
+        (e.g. `app.add_url_rule`) and those registrations changed.
+    """
+    try:
+        old_definitions = extract_definitions(old_code) if old_code.strip() else {}
+        new_definitions = extract_definitions(new_code)
+        old_statements = _module_level_statements(old_code) if old_code.strip() else []
+        new_statements = _module_level_statements(new_code)
+    except SyntaxError:
+        return None
+
+    changes = []
+    for name, definition in new_definitions.items():
+        old_definition = old_definitions.get(name)
+        if old_definition is None:
+            changes.append(DefinitionChange("added", definition))
+        elif old_definition.fingerprint != definition.fingerprint:
+            changes.append(DefinitionChange("modified", definition))
+
+    if old_statements != new_statements:
+        if not changes and old_definitions.keys() == new_definitions.keys():
+            return None
+        if _route_registrations(old_statements) != _route_registrations(new_statements):
+            return None
+
+    return sorted(changes, key=lambda change: change.definition.start_line)
+
+
+def summarize_changes(changes: list[DefinitionChange]) -> str:
+    """Builds a one-sentence change summary from route paths and definition names."""
+    parts = []
+    for change in changes:
+        definition = change.definition
+        if definition.routes:
+            routes = ", ".join(str(route) for route in definition.routes)
+            noun = "endpoint" if len(definition.routes) == 1 else "endpoints"
+            if change.change_type == "added":
+                parts.append(f"a new {noun} {routes} ({definition.name}) was added")
+            else:
+                parts.append(f"the {noun} {routes} ({definition.name}) was modified")
+        else:
+            parts.append(f"the {definition.kind} {definition.name} was {change.change_type}")
+    summary = "; ".join(parts)
+    return summary[0].upper() + summary[1:] + "."
+
+
+def changed_line_ranges(old_code: str, new_code: str) -> tuple[list[tuple[int, int]], list[tuple[int, int]]]:
+    """
+    Computes the diff hunks between two versions of a file.
+
+    Returns:
+        tuple: The changed line ranges in the old code and in the new code, as
+        1-based inclusive (start, end) pairs. A pure deletion or insertion is
+        represented on the other side by the line it happened next to.
+    """
+    old_lines = old_code.splitlines()
+    new_lines = new_code.splitlines()
+    old_ranges, new_ranges = [], []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        old_ranges.append((i1 + 1, max(i2, i1 + 1)))
+        new_ranges.append((j1 + 1, max(j2, j1 + 1)))
+    return old_ranges, new_ranges
+
+
+def _enclosing_scopes(code: str) -> list[tuple[int, int]]:
+    """Returns the line spans (including decorators) of top-level functions and classes, or [] if the code does not parse."""
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return []
+    return [
+        (min([node.lineno] + [d.lineno for d in node.decorator_list]), node.end_lineno or node.lineno)
+        for node in tree.body
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+    ]
+
+
+def expand_ranges(code: str, ranges: list[tuple[int, int]], context_lines: int = 3) -> list[tuple[int, int]]:
+    """
+    Widens each changed range to the top-level function or class it touches,
+    adds `context_lines` of surrounding context, and merges overlapping ranges.
+    """
+    line_count = len(code.splitlines())
+    if line_count == 0:
+        return []
+    scopes = _enclosing_scopes(code)
+
+    expanded = []
+    for start, end in ranges:
+        for scope_start, scope_end in scopes:
+            if scope_start <= end and start <= scope_end:
+                start, end = min(start, scope_start), max(end, scope_end)
+        expanded.append((max(1, start - context_lines), min(line_count, end + context_lines)))
+
+    merged = []
+    for start, end in sorted(expanded):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def extract_regions(code: str, ranges: list[tuple[int, int]]) -> str:
+    """Joins the given line ranges of `code`, marking omitted lines so the excerpt stays readable."""
+    lines = code.splitlines()
+    parts = []
+    previous_end = 0
+    for start, end in ranges:
+        if start > previous_end + 1:
+            parts.append(f"# ... lines {previous_end + 1}-{start - 1} unchanged ...")
+        parts.extend(lines[start - 1:end])
+        previous_end = end
+    if previous_end < len(lines):
+        parts.append(f"# ... lines {previous_end + 1}-{len(lines)} unchanged ...")
+    return "\n".join(parts)
+
+
+def changed_regions(old_code: str, new_code: str, context_lines: int = 3) -> tuple[str, str]:
+    """
+    Reduces both versions of a file to the regions touched by the diff, each
+    expanded to its enclosing function or class plus a little context.
+
+    Returns:
+        tuple[str, str]: The old and new excerpts.
+    """
+    old_ranges, new_ranges = changed_line_ranges(old_code, new_code)
+    return (
+        extract_regions(old_code, expand_ranges(old_code, old_ranges, context_lines)),
+        extract_regions(new_code, expand_ranges(new_code, new_ranges, context_lines)),
+    )
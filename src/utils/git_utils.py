@@ -1,5 +1,8 @@
 import git
-from typing import Optional
+import subprocess
+import threading
+from dataclasses import dataclass
+from typing import Iterable, Optional
 import os
 
 def get_file_content_from_commit(repo_path: str, file_path: str, commit_ref: str) -> Optional[str]:
@@ -75,6 +78,158 @@ def get_changed_files_in_dir(repo_path: str, dir_path: str, old_commit_ref: str,
 
     return changed_files
 
+@dataclass
+class ChangedFile:
+    """A file that differs between two commits, identified by its blob SHAs."""
+    path: str
+    change_type: str
+    old_sha: Optional[str]
+    new_sha: Optional[str]
+
+
+# All-zero object ID git uses for the missing side of an added or deleted file
+NULL_SHA = "0" * 40
+
+
+class GitObjectReader:
+    """
+    Batched access to the objects of one Git repository.
+
+    The repository is located once, and blobs are read through a single persistent
+    `git cat-file --batch` process instead of a new repository handle and tree walk
+    per file. Blob contents are returned as raw bytes; decode them once at the
+    point of use. Use as a context manager, or call `close()` when done.
+    """
+
+    def __init__(self, repo_path: str):
+        """
+        Raises:
+            ValueError: If `repo_path` is not inside a Git repository.
+        """
+        try:
+            self.working_dir = self._git(["rev-parse", "--show-toplevel"], cwd=repo_path).decode("utf-8").strip()
+        except (subprocess.CalledProcessError, FileNotFoundError, NotADirectoryError) as e:
+            raise ValueError(f"'{repo_path}' is not a valid Git repository.") from e
+        self._lock = threading.Lock()
+        self._cat_file = self._start_cat_file()
+
+    def _start_cat_file(self) -> subprocess.Popen:
+        return subprocess.Popen(
+            ["git", "cat-file", "--batch"],
+            cwd=self.working_dir,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self) -> None:
+        """Stops the `git cat-file` process."""
+        if self._cat_file.poll() is None:
+            self._cat_file.stdin.close()
+            self._cat_file.wait()
+
+    @staticmethod
+    def _git(args: list[str], cwd: str) -> bytes:
+        return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True).stdout
+
+    def resolve_commit(self, commit_ref: str) -> str:
+        """Resolves a commit reference (e.g. 'main', 'HEAD~1') to its full SHA."""
+        return self._git(["rev-parse", "--verify", f"{commit_ref}^{{commit}}"], cwd=self.working_dir).decode("utf-8").strip()
+
+    def changed_files(self, old_commit_ref: str, new_commit_ref: str, dir_path: str = ".",
+                      suffix: str = ".py") -> list[ChangedFile]:
+        """
+        Lists added (A) and modified (M) files between two commits with a single
+        `git diff-tree` call, including the old and new blob SHAs of each file.
+
+        Args:
+            old_commit_ref (str): The old commit hash or reference.
+            new_commit_ref (str): The new commit hash or reference.
+            dir_path (str): Only report files within this directory ('.' for the whole repo).
+            suffix (str): Only report files whose path ends with this suffix.
+        """
+        old_sha = self.resolve_commit(old_commit_ref)
+        new_sha = self.resolve_commit(new_commit_ref)
+        args = ["diff-tree", "-r", "-z", "-M", "--raw", "--full-index", old_sha, new_sha]
+        if dir_path not in (".", ""):
+            args += ["--", dir_path]
+        output = self._git(args, cwd=self.working_dir).decode("utf-8", errors="surrogateescape")
+
+        changed = []
+        fields = output.split("\0")
+        i = 0
+        while i < len(fields) - 1:
+            # ":old_mode new_mode old_sha new_sha status" followed by one path (two for renames/copies)
+            _, _, blob_old, blob_new, status = fields[i].lstrip(":").split(" ")
+            path_count = 2 if status[0] in ("R", "C") else 1
+            path = fields[i + path_count]
+            i += 1 + path_count
+            if status[0] in ("A", "M") and path.endswith(suffix):
+                changed.append(ChangedFile(
+                    path=path,
+                    change_type=status[0],
+                    old_sha=None if blob_old == NULL_SHA else blob_old,
+                    new_sha=None if blob_new == NULL_SHA else blob_new,
+                ))
+        return changed
+
+    def read_blob(self, sha: str) -> Optional[bytes]:
+        """Reads one object by SHA. Returns None if it does not exist."""
+        return self.read_blobs([sha]).get(sha)
+
+    def read_blobs(self, shas: Iterable[str]) -> dict[str, bytes]:
+        """
+        Reads many objects through the persistent `cat-file` stream. Requests are
+        written from a separate thread while responses are read, so the pipe never
+        stalls. Missing objects are left out of the result.
+
+        Raises:
+            RuntimeError: If the `cat-file` process exits or answers unexpectedly. The
+                          process is restarted, so later calls can succeed.
+        """
+        shas = list(dict.fromkeys(sha for sha in shas if sha))
+        blobs = {}
+        with self._lock:
+            cat_file = self._cat_file
+
+            def write_requests():
+                try:
+                    cat_file.stdin.write("".join(f"{sha}\n" for sha in shas).encode("ascii"))
+                    cat_file.stdin.flush()
+                except (BrokenPipeError, ValueError):
+                    # The process died (or was closed); the reader below reports it
+                    pass
+
+            writer = threading.Thread(target=write_requests, daemon=True)
+            writer.start()
+            try:
+                for sha in shas:
+                    line = cat_file.stdout.readline()
+                    header = line.split()
+                    if len(header) == 2 and header[1] in (b"missing", b"ambiguous"):
+                        continue
+                    if len(header) < 3:
+                        # EOF or garbage: a partial result would look like missing or empty files
+                        reason = f"exited with code {cat_file.poll()}" if not line else f"answered {line!r}"
+                        raise RuntimeError(f"git cat-file {reason} while reading {sha}.")
+                    blobs[sha] = cat_file.stdout.read(int(header[2]))
+                    cat_file.stdout.read(1) # Trailing newline after each object
+            except RuntimeError:
+                # Kill rather than close, so a writer blocked on a full pipe is released too
+                cat_file.kill()
+                cat_file.wait()
+                self._cat_file = self._start_cat_file()
+                raise
+            finally:
+                writer.join()
+        return blobs
+
+
 if __name__ == '__main__':
     # Example usage:
     # This assumes you are running this from a directory within a git repository.
@@ -0,0 +1,164 @@
+import re
+import math
+from collections import Counter
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+
+from src.utils.numpy_index import NumpyVectorIndex
+from src.utils.retrieval_cache import RetrievalCache
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Signals in the change summary or code, mapped to the policy categories they make
+# relevant. Categories are matched as case-insensitive substrings of the `category`
+# metadata that `ingest.py` attaches to every chunk. Plain keywords are matched as
+# whole tokens (a space-separated keyword as a run of tokens, so "rate limit" also
+# matches `rate_limit`); keywords with punctuation are code patterns, matched as
+# substrings. Words every change summary contains, such as "endpoint", would
+# select the same categories for every change and are left out.
+CATEGORY_SIGNALS = [
+    (("route", "@app.", "router.", "blueprint"), ("Versioning", "Naming", "Authentication")),
+    (("jsonify", "json", "return {"), ("Naming", "Error Handling")),
+    (("abort", "httpexception", "raise", "except", "status code", "error", "errorhandler"), ("Error Handling",)),
+    (("auth", "authorization", "authenticate", "authentication", "token", "login", "api key", "apikey", "bearer",
+      "oauth", "scope", "password", "secret"), ("Authentication", "Security")),
+    (("request.args", "request.json", "request.form", "query_params", "sql", "execute("), ("Security", "Naming")),
+    (("rate limit", "ratelimit", "limiter", "throttle", "quota", "429", "retry after"), ("Rate", "Security")),
+]
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def _matches(keyword: str, text: str, tokens: str) -> bool:
+    if TOKEN_PATTERN.fullmatch(keyword.replace(" ", "")):
+        return f" {keyword} " in tokens
+    return keyword in text
+
+
+def infer_categories(text: str) -> set[str]:
+    """Returns the policy categories suggested by keywords in a change summary or snippet (empty if none match)."""
+    text = text.lower()
+    tokens = f" {' '.join(tokenize(text))} "
+    categories = set()
+    for keywords, signal_categories in CATEGORY_SIGNALS:
+        if any(_matches(keyword, text, tokens) for keyword in keywords):
+            categories.update(signal_categories)
+    return categories
+
+
+class BM25Index:
+    """A small Okapi BM25 index over the policy chunks."""
+
+    def __init__(self, documents: list[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_frequencies = [Counter(tokenize(doc)) for doc in documents]
+        self.lengths = np.array([sum(tf.values()) for tf in self.term_frequencies], dtype=np.float32)
+        self.average_length = float(self.lengths.mean()) if len(documents) else 0.0
+        document_frequency = Counter(term for tf in self.term_frequencies for term in tf)
+        count = len(documents)
+        self.idf = {
+            term: math.log(1 + (count - freq + 0.5) / (freq + 0.5))
+            for term, freq in document_frequency.items()
+        }
+
+    def scores(self, query: str) -> np.ndarray:
+        """Returns the BM25 score of every document for the query."""
+        scores = np.zeros(len(self.term_frequencies), dtype=np.float32)
+        if not self.average_length:
+            return scores
+        norm = self.k1 * (1 - self.b + self.b * self.lengths / self.average_length)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            tf = np.array([frequencies.get(term, 0) for frequencies in self.term_frequencies], dtype=np.float32)
+            scores += idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+
+def _normalize(scores: np.ndarray) -> np.ndarray:
+    low, high = float(scores.min()), float(scores.max())
+    if high - low < 1e-9:
+        return np.ones_like(scores) if high > 0 else np.zeros_like(scores)
+    return (scores - low) / (high - low)
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Scores policy chunks with both BM25 and embedding similarity.
+
+    Chunks are pre-filtered to the categories suggested by the change (when any
+    are), fused scores are ranked, and an adaptive cutoff returns fewer than `k`
+    chunks once scores drop off, so weakly related rules don't each cost a
+    validation call.
+    """
+
+    index: NumpyVectorIndex
+    bm25: BM25Index
+    embeddings: Embeddings
+    cache: Optional[RetrievalCache] = None
+    k: int = 5
+    # Weight of the dense score in the fused score; the rest goes to BM25
+    alpha: float = 0.5
+    # Stop when a score falls below this fraction of the best score...
+    min_score_ratio: float = 0.5
+    # ...or drops by more than this much from the previous result
+    max_score_drop: float = 0.25
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    @classmethod
+    def from_index(cls, index: NumpyVectorIndex, embeddings: Embeddings, **kwargs) -> "HybridRetriever":
+        return cls(index=index, bm25=BM25Index(index.documents), embeddings=embeddings, **kwargs)
+
+    def _embed(self, query: str) -> list[float]:
+        embedding = self.cache.get_embedding(query) if self.cache is not None else None
+        if embedding is None:
+            embedding = self.embeddings.embed_query(query)
+            if self.cache is not None:
+                self.cache.put_embedding(query, embedding)
+        return embedding
+
+    def _candidates(self, categories: set[str]) -> np.ndarray:
+        if not categories:
+            return np.arange(len(self.index))
+        wanted = [category.lower() for category in categories]
+        rows = [
+            i for i, metadata in enumerate(self.index.metadatas)
+            if any(category in (metadata or {}).get("category", "").lower() for category in wanted)
+        ]
+        # Fall back to the whole corpus rather than returning nothing
+        return np.array(rows) if rows else np.arange(len(self.index))
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun,
+                                code: str = "") -> List[Document]:
+        """
+        Args:
+            query (str): The change summary.
+            code (str): Optional changed code, used together with the query to infer categories.
+        """
+        if not len(self.index):
+            return []
+        candidates = self._candidates(infer_categories(f"{query}\n{code}"))
+
+        dense = self.index.scores(self._embed(query))[0][candidates]
+        lexical = self.bm25.scores(query)[candidates]
+        fused = self.alpha * _normalize(dense) + (1 - self.alpha) * _normalize(lexical)
+
+        order = np.argsort(-fused)[:self.k]
+        selected = [order[0]]
+        for position in order[1:]:
+            score = fused[position]
+            if score < self.min_score_ratio * fused[order[0]] or fused[selected[-1]] - score > self.max_score_drop:
+                break
+            selected.append(position)
+
+        return [self.index.document(int(candidates[position]), float(fused[position])) for position in selected]
@@ -0,0 +1,153 @@
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+# Number of buffered access-time updates that triggers a write back to SQLite
+ACCESS_FLUSH_THRESHOLD = 256
+
+
+class SQLiteKVStore:
+    """
+    A small persistent key-value store backed by a single SQLite file.
+
+    Entries are evicted least-recently-used first once the total size of the
+    stored values exceeds `max_bytes`. The store is safe to share between threads.
+    Access times of cache hits are buffered in memory and written in batches, so a
+    read does not cost a write transaction.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, table: str = "entries"):
+        """
+        Args:
+            path (str): Location of the SQLite database file. Parent directories are created.
+            max_bytes (int): Upper bound on the total size of stored values.
+            table (str): Name of the table holding the entries, so several stores can share a file.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.max_bytes = max_bytes
+        self.table = table
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._pending_access: dict[str, float] = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._total_bytes = self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {table}").fetchone()[0]
+        atexit.register(self.close)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Returns the value stored under `key`, or None on a miss."""
+        with self._lock:
+            row = self._conn.execute(f"SELECT value FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._pending_access[key] = time.time()
+            if len(self._pending_access) >= ACCESS_FLUSH_THRESHOLD:
+                self._flush_access()
+                self._conn.commit()
+            return row[0]
+
+    def put(self, key: str, value: bytes) -> None:
+        """Stores `value` under `key`, evicting old entries if the store grows too large."""
+        size = len(value)
+        with self._lock:
+            row = self._conn.execute(f"SELECT size FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._total_bytes -= row[0]
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, size, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time()),
+            )
+            self._pending_access.pop(key, None)
+            self._total_bytes += size
+            self._evict()
+            self._conn.commit()
+
+    def retain_prefixes(self, prefixes: list[str]) -> int:
+        """Removes every entry whose key does not start with one of `prefixes`. Returns the number removed."""
+        conditions = " AND ".join("substr(key, 1, ?) != ?" for _ in prefixes) or "1"
+        params = [value for prefix in prefixes for value in (len(prefix), prefix)]
+        with self._lock:
+            self._flush_access()
+            cursor = self._conn.execute(f"DELETE FROM {self.table} WHERE {conditions}", params)
+            self._conn.commit()
+            self._total_bytes = self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+            return cursor.rowcount
+
+    def clear(self) -> None:
+        """Removes every entry."""
+        with self._lock:
+            self._pending_access.clear()
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
+            self._total_bytes = 0
+
+    def flush(self) -> None:
+        """Writes buffered access times to the database."""
+        with self._lock:
+            self._flush_access()
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Flushes buffered access times and closes the database connection. Safe to call twice."""
+        with self._lock:
+            if self._conn is None:
+                return
+            self._flush_access()
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
+        atexit.unregister(self.close)
+
+    def stats(self) -> dict:
+        """Returns hit/miss/eviction counters and the current size of the store."""
+        with self._lock:
+            entries = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": entries,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _flush_access(self) -> None:
+        """Writes buffered access times. The caller holds the lock and commits."""
+        if not self._pending_access:
+            return
+        self._conn.executemany(
+            f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?",
+            [(accessed_at, key) for key, accessed_at in self._pending_access.items()],
+        )
+        self._pending_access.clear()
+
+    def _evict(self) -> None:
+        """Drops least-recently-used entries until the store is back under 90% of `max_bytes`."""
+        if self._total_bytes <= self.max_bytes:
+            return
+        # Recent hits must be visible before picking the least-recently-used entries
+        self._flush_access()
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute(f"SELECT key, size FROM {self.table} ORDER BY accessed_at ASC").fetchall()
+        for key, size in rows:
+            if self._total_bytes <= target:
+                break
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._total_bytes -= size
+            self.evictions += 1
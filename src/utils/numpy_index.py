@@ -0,0 +1,195 @@
+import os
+import json
+import shutil
+import time
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+
+# --- Configuration ---
+INDEX_MATRIX_FILE = "policy_index.npy"
+INDEX_METADATA_FILE = "policy_index.json"
+# Names the versioned subdirectory holding the current matrix and metadata
+INDEX_POINTER_FILE = "policy_index.current"
+INDEX_VERSION_PREFIX = "policy_index-"
+INDEX_DTYPES = ("float32", "float16", "int8")
+# Rows of the matrix scored at a time, so a compressed index is only ever
+# converted to float32 one block at a time
+SCORE_BLOCK_ROWS = 4096
+
+
+def write_numpy_index(directory: str, ids: list[str], embeddings, documents: list[str],
+                      metadatas: list[dict], dtype: str = "float32") -> str:
+    """
+    Writes policy chunk embeddings as one contiguous matrix file plus a JSON
+    sidecar with the chunk texts and metadata, then points the index at them.
+
+    Rows are L2-normalized so a dot product is the cosine similarity. With
+    `dtype="int8"` each row is quantized with its own scale factor.
+
+    Returns:
+        str: The path of the matrix file.
+    """
+    if dtype not in INDEX_DTYPES:
+        raise ValueError(f"Unknown index dtype '{dtype}'. Expected one of {INDEX_DTYPES}.")
+
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = matrix / np.where(norms == 0, 1, norms)
+
+    scales = None
+    if dtype == "int8":
+        row_max = np.abs(matrix).max(axis=1)
+        scales = np.where(row_max == 0, 1, row_max) / 127.0
+        matrix = np.round(matrix / scales[:, None]).astype(np.int8)
+    else:
+        matrix = matrix.astype(dtype)
+
+    # Each write goes to a fresh versioned directory, and a single pointer swap
+    # publishes the matrix and metadata together
+    version = f"{INDEX_VERSION_PREFIX}{time.time_ns()}"
+    version_dir = os.path.join(directory, version)
+    os.makedirs(version_dir)
+    matrix_path = os.path.join(version_dir, INDEX_MATRIX_FILE)
+    np.save(matrix_path, np.ascontiguousarray(matrix))
+    with open(os.path.join(version_dir, INDEX_METADATA_FILE), "w") as f:
+        json.dump({
+            "dtype": dtype,
+            "ids": ids,
+            "documents": documents,
+            "metadatas": metadatas,
+            "scales": scales.tolist() if scales is not None else None,
+        }, f)
+    pointer_path = os.path.join(directory, INDEX_POINTER_FILE)
+    with open(pointer_path + ".tmp", "w") as f:
+        f.write(version)
+    os.replace(pointer_path + ".tmp", pointer_path)
+    _prune_index_versions(directory, keep=version)
+    return matrix_path
+
+
+def _prune_index_versions(directory: str, keep: str) -> None:
+    """Removes old index versions, leaving `keep` and the one before it for readers still loading it."""
+    versions = sorted(
+        (name for name in os.listdir(directory) if name.startswith(INDEX_VERSION_PREFIX) and name != keep),
+        key=lambda name: int(name[len(INDEX_VERSION_PREFIX):]),
+    )
+    for name in versions[:-1]:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+def _current_index_dir(directory: str) -> str:
+    """Returns the directory holding the current index files, falling back to the flat layout."""
+    pointer_path = os.path.join(directory, INDEX_POINTER_FILE)
+    if not os.path.exists(pointer_path):
+        return directory
+    with open(pointer_path) as f:
+        return os.path.join(directory, f.read().strip())
+
+
+class NumpyVectorIndex:
+    """
+    An in-process exact vector index over a memory-mapped embedding matrix.
+
+    The whole policy corpus is a few dozen chunks, so one vectorized dot product
+    answers a query faster than a persistent client with an HNSW index.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Raises:
+            FileNotFoundError: If the index files have not been written by `ingest.py`.
+            ValueError: If the matrix and metadata disagree on the number of chunks.
+        """
+        index_dir = _current_index_dir(directory)
+        matrix_path = os.path.join(index_dir, INDEX_MATRIX_FILE)
+        metadata_path = os.path.join(index_dir, INDEX_METADATA_FILE)
+        if not os.path.exists(matrix_path) or not os.path.exists(metadata_path):
+            raise FileNotFoundError(
+                f"NumPy vector index not found in '{directory}'. "
+                "Please run the `ingest.py` script first."
+            )
+
+        with open(metadata_path) as f:
+            metadata = json.load(f)
+        self.matrix = np.load(matrix_path, mmap_mode="r")
+        self.dtype = metadata["dtype"]
+        self.ids = metadata["ids"]
+        self.documents = metadata["documents"]
+        self.metadatas = metadata["metadatas"]
+        self.scales = np.asarray(metadata["scales"], dtype=np.float32) if metadata["scales"] is not None else None
+
+        row_counts = {len(self.ids), len(self.documents), len(self.metadatas), self.matrix.shape[0]}
+        if self.scales is not None:
+            row_counts.add(self.scales.shape[0])
+        if len(row_counts) != 1:
+            raise ValueError(
+                f"NumPy vector index in '{index_dir}' is inconsistent: the matrix has {self.matrix.shape[0]} rows "
+                f"but the metadata describes {len(self.ids)} chunks. Please re-run the `ingest.py` script."
+            )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def scores(self, query_vectors) -> np.ndarray:
+        """Returns the cosine similarity of every chunk to every query, shaped (queries, chunks)."""
+        queries = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        scores = np.empty((queries.shape[0], self.matrix.shape[0]), dtype=np.float32)
+        for start in range(0, self.matrix.shape[0], SCORE_BLOCK_ROWS):
+            # A no-op for float32; float16 and int8 blocks are widened without copying the whole matrix
+            block = np.asarray(self.matrix[start:start + SCORE_BLOCK_ROWS], dtype=np.float32)
+            scores[:, start:start + block.shape[0]] = queries @ block.T
+        if self.scales is not None:
+            scores *= self.scales
+        return scores
+
+    def search(self, query_vectors, k: int) -> list[list[tuple[int, float]]]:
+        """
+        Finds the `k` most similar chunks for each query vector.
+
+        Returns:
+            list[list[tuple[int, float]]]: For each query, (row index, score) pairs, best first.
+        """
+        scores = self.scores(query_vectors)
+        k = min(k, scores.shape[1])
+        if k == 0:
+            return [[] for _ in range(scores.shape[0])]
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in enumerate(top):
+            ordered = candidates[np.argsort(-scores[row, candidates])]
+            results.append([(int(i), float(scores[row, i])) for i in ordered])
+        return results
+
+    def document(self, index: int, score: Optional[float] = None) -> Document:
+        """Returns the chunk at a row index as a LangChain document."""
+        metadata = dict(self.metadatas[index] or {})
+        if score is not None:
+            metadata["score"] = score
+        return Document(id=self.ids[index], page_content=self.documents[index], metadata=metadata)
+
+
+class NumpyRetriever(BaseRetriever):
+    """A LangChain retriever backed by a `NumpyVectorIndex`."""
+
+    index: NumpyVectorIndex
+    embeddings: Embeddings
+    k: int = 5
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.search_many([query])[0]
+
+    def search_many(self, queries: list[str]) -> list[list[Document]]:
+        """Answers several queries with one batched embedding call and one matrix product."""
+        query_vectors = self.embeddings.embed_documents(queries)
+        return [
+            [self.index.document(i, score) for i, score in hits]
+            for hits in self.index.search(query_vectors, self.k)
+        ]
@@ -0,0 +1,96 @@
+import re
+import fnmatch
+from dataclasses import dataclass, field
+from typing import Optional, Sequence
+
+from src.utils.code_diff import changed_regions
+
+# API surface signals searched for in the changed regions of a file, with the
+# weight each occurrence adds to the file's relevance score.
+SIGNALS = {
+    "route": (re.compile(r"@\s*[\w.]+\.(?:route|get|post|put|patch|delete|head|options|api_route|websocket)\s*\("), 5),
+    "registration": (re.compile(
+        r"\b(?:add_url_rule|register_blueprint|include_router|add_api_route|Blueprint|APIRouter|APIView|ViewSet|urlpatterns)\b"
+    ), 4),
+    "auth": (re.compile(
+        r"\b(?:login_required|jwt_required|auth_required|permission_required|permission_classes|authentication_classes"
+        r"|Depends|Security|HTTPBearer|OAuth2\w*|APIKey\w*|before_request|middleware|Authorization)\b"
+    ), 3),
+    "response": (re.compile(
+        r"\b(?:jsonify|make_response|JSONResponse|ORJSONResponse|Response|abort|HTTPException|status_code)\b"
+    ), 2),
+}
+# Occurrences of one signal beyond this don't raise the score further
+MAX_COUNTED_OCCURRENCES = 5
+
+
+@dataclass
+class FileRelevance:
+    """How relevant a changed file is to API governance, and why it is skipped (if it is)."""
+    path: str
+    score: int = 0
+    signals: dict[str, int] = field(default_factory=dict)
+    skip_reason: str = ""
+
+    @property
+    def relevant(self) -> bool:
+        return not self.skip_reason
+
+
+class RelevanceFilter:
+    """
+    A cheap pre-filter that decides which changed files enter the validation graph.
+
+    Files are first matched against include/exclude globs (`fnmatch` patterns on
+    the repository path, where `*` also matches `/`). The remaining files are
+    scored by the API surface signals (route decorators, router registration,
+    response construction, auth) found in their changed regions, and files
+    scoring below `min_score` are skipped. No model is needed for either step.
+    """
+
+    def __init__(self, include: Sequence[str] = (), exclude: Sequence[str] = (), min_score: int = 1):
+        """
+        Args:
+            include (Sequence[str]): If given, only paths matching one of these globs are analyzed.
+            exclude (Sequence[str]): Paths matching any of these globs are skipped.
+            min_score (int): The lowest relevance score that is analyzed (0 analyzes every file).
+        """
+        self.include = list(include)
+        self.exclude = list(exclude)
+        self.min_score = min_score
+
+    def excluded(self, path: str) -> Optional[str]:
+        """Returns why the globs exclude a path, or None if it passes them."""
+        if self.include and not any(fnmatch.fnmatch(path, pattern) for pattern in self.include):
+            return "Not matched by any include glob."
+        for pattern in self.exclude:
+            if fnmatch.fnmatch(path, pattern):
+                return f"Excluded by the glob '{pattern}'."
+        return None
+
+    def assess(self, path: str, old_code: str, new_code: str) -> FileRelevance:
+        """Scores a file by the API surface signals in its changed regions."""
+        old_excerpt, new_excerpt = changed_regions(old_code, new_code, context_lines=0)
+        relevance = FileRelevance(path)
+        for name, (pattern, weight) in SIGNALS.items():
+            count = len(pattern.findall(old_excerpt)) + len(pattern.findall(new_excerpt))
+            if count:
+                relevance.signals[name] = count
+                relevance.score += weight * min(count, MAX_COUNTED_OCCURRENCES)
+        if relevance.score < self.min_score:
+            relevance.skip_reason = f"No API surface signals in the changed code (relevance {relevance.score} < {self.min_score})."
+        return relevance
+
+
+def format_relevance(assessments: Sequence[FileRelevance]) -> str:
+    """Formats assessments as a table, analyzed files first by descending score."""
+    ordered = sorted(assessments, key=lambda relevance: (not relevance.relevant, -relevance.score, relevance.path))
+    width = max([len(relevance.path) for relevance in ordered] + [4])
+    lines = [f"{'File':<{width}}  {'Score':>5}  Decision  Details"]
+    for relevance in ordered:
+        decision = "analyze" if relevance.relevant else "skip"
+        details = ", ".join(f"{name}={count}" for name, count in relevance.signals.items())
+        if not relevance.relevant:
+            details = f"{relevance.skip_reason} {details}".strip()
+        lines.append(f"{relevance.path:<{width}}  {relevance.score:>5}  {decision:<8}  {details}")
+    return "\n".join(lines)
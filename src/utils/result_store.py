@@ -0,0 +1,80 @@
+import os
+import json
+import hashlib
+import threading
+from typing import Optional
+
+from src.utils.kv_store import SQLiteKVStore
+from src.utils.tracing import record_event
+
+# --- Configuration ---
+RESULT_STORE_PATH = os.environ.get("RESULT_STORE_PATH", os.path.join(".cache", "result_store.sqlite3"))
+RESULT_STORE_MAX_MB = int(os.environ.get("RESULT_STORE_MAX_MB", "256"))
+# Per-run files that are not reused from an earlier validation
+EXCLUDED_ARTIFACTS = {"trace.json"}
+
+
+class ResultStore:
+    """
+    Stores the artifacts of validated files keyed by content rather than commit.
+
+    Keys combine the old and new git blob SHAs with the policy corpus version and
+    the prompt version (which callers extend with the validator settings, see
+    `results_version`), so the same change seen again in another commit range
+    (cherry-picks, rebases, reverts, nightly full-range runs) reuses the earlier
+    report, while any policy, prompt or validator change forces a fresh validation.
+    """
+
+    def __init__(self, path: str = RESULT_STORE_PATH, max_bytes: int = RESULT_STORE_MAX_MB * 1024 * 1024):
+        self.store = SQLiteKVStore(path, max_bytes=max_bytes, table="file_results")
+
+    @staticmethod
+    def _key(old_blob: str, new_blob: str, corpus_version: str, prompt_version: str) -> str:
+        return hashlib.sha256(f"{old_blob}\x00{new_blob}\x00{corpus_version}\x00{prompt_version}".encode("utf-8")).hexdigest()
+
+    def get(self, old_blob: str, new_blob: str, corpus_version: str, prompt_version: str) -> Optional[dict[str, str]]:
+        """Returns the stored artifacts (file name to content) for a change, or None on a miss."""
+        value = self.store.get(self._key(old_blob, new_blob, corpus_version, prompt_version))
+        record_event("cache", "file_result", hit=value is not None)
+        return json.loads(value) if value is not None else None
+
+    def put(self, old_blob: str, new_blob: str, corpus_version: str, prompt_version: str, output_dir: str) -> None:
+        """Stores every artifact written to `output_dir` for a change."""
+        artifacts = {}
+        for name in sorted(os.listdir(output_dir)):
+            path = os.path.join(output_dir, name)
+            if name not in EXCLUDED_ARTIFACTS and os.path.isfile(path):
+                with open(path, encoding="utf-8", errors="replace") as f:
+                    artifacts[name] = f.read()
+        value = json.dumps(artifacts).encode("utf-8")
+        self.store.put(self._key(old_blob, new_blob, corpus_version, prompt_version), value)
+
+    @staticmethod
+    def restore(artifacts: dict[str, str], output_dir: str) -> None:
+        """Writes stored artifacts into an output directory."""
+        os.makedirs(output_dir, exist_ok=True)
+        for name, content in artifacts.items():
+            with open(os.path.join(output_dir, name), "w") as f:
+                f.write(content)
+
+    def stats(self) -> dict:
+        """Returns the hit/miss counters and size of the store."""
+        return self.store.stats()
+
+
+_result_store: Optional[ResultStore] = None
+_result_store_lock = threading.Lock()
+
+
+def get_result_store() -> Optional[ResultStore]:
+    """
+    Returns the process-wide file result store, or None when it is disabled with
+    `RESULT_STORE_DISABLED=1`.
+    """
+    global _result_store
+    if os.environ.get("RESULT_STORE_DISABLED", "").lower() in ("1", "true", "yes"):
+        return None
+    with _result_store_lock:
+        if _result_store is None:
+            _result_store = ResultStore()
+        return _result_store
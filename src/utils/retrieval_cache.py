@@ -0,0 +1,183 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+
+from src.utils.kv_store import SQLiteKVStore
+from src.utils.tracing import record_event
+
+# --- Configuration ---
+RETRIEVAL_CACHE_PATH = os.environ.get("RETRIEVAL_CACHE_PATH", os.path.join(".cache", "retrieval_cache.sqlite3"))
+RETRIEVAL_CACHE_MEMORY_ENTRIES = 1024
+RETRIEVAL_CACHE_MAX_MB = 64
+CORPUS_VERSION_FILE = "corpus_version"
+
+
+def normalize_query(query: str) -> str:
+    """Normalizes a query so trivially different spellings share a cache entry."""
+    return " ".join(query.lower().split())
+
+
+def read_corpus_version(vector_store_dir: str) -> str:
+    """Returns the policy corpus version written by `ingest.py`, or "unversioned" if there is none."""
+    try:
+        with open(os.path.join(vector_store_dir, CORPUS_VERSION_FILE)) as f:
+            return f.read().strip() or "unversioned"
+    except FileNotFoundError:
+        return "unversioned"
+
+
+class RetrievalCache:
+    """
+    A two-tier cache of query embeddings and top-k retrieval results.
+
+    A bounded in-memory LRU sits in front of an on-disk SQLite tier. Result keys
+    include the policy corpus version, which is re-read whenever `ingest.py`
+    rewrites it, so a rebuilt store invalidates stale results automatically.
+    Query embeddings only depend on the embedding model and survive rebuilds.
+    """
+
+    def __init__(self, vector_store_dir: str, embedding_model: str, path: str = RETRIEVAL_CACHE_PATH,
+                 memory_entries: int = RETRIEVAL_CACHE_MEMORY_ENTRIES):
+        self.vector_store_dir = vector_store_dir
+        self.embedding_model = embedding_model
+        self.memory_entries = memory_entries
+        self.store = SQLiteKVStore(path, max_bytes=RETRIEVAL_CACHE_MAX_MB * 1024 * 1024, table="retrieval")
+        self.memory_hits = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._version_mtime = None
+        self._version = None
+
+    @property
+    def corpus_version(self) -> str:
+        """The current corpus version, refreshed when the version file changes on disk."""
+        path = os.path.join(self.vector_store_dir, CORPUS_VERSION_FILE)
+        mtime = os.path.getmtime(path) if os.path.exists(path) else None
+        with self._lock:
+            if self._version is None or mtime != self._version_mtime:
+                self._version_mtime = mtime
+                self._version = read_corpus_version(self.vector_store_dir)
+                # Drop in-memory and on-disk results that belong to older corpus versions
+                self._memory.clear()
+                self.store.retain_prefixes([f"results:{self._version}:", f"embedding:{self.embedding_model}:"])
+            return self._version
+
+    def _results_key(self, query: str, k: int, backend: str) -> str:
+        digest = hashlib.sha256(f"{backend}\x00{k}\x00{normalize_query(query)}".encode("utf-8")).hexdigest()
+        return f"results:{self.corpus_version}:{digest}"
+
+    def _embedding_key(self, query: str) -> str:
+        digest = hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()
+        return f"embedding:{self.embedding_model}:{digest}"
+
+    def _get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return self._memory[key]
+        value = self.store.get(key)
+        if value is not None:
+            self._remember(key, value)
+        return value
+
+    def _put(self, key: str, value: bytes) -> None:
+        self._remember(key, value)
+        self.store.put(key, value)
+
+    def _remember(self, key: str, value: bytes) -> None:
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get_results(self, query: str, k: int, backend: str) -> Optional[list[Document]]:
+        """Returns the cached top-k documents for a query, or None on a miss."""
+        value = self._get(self._results_key(query, k, backend))
+        record_event("cache", "retrieval_results", hit=value is not None)
+        if value is None:
+            return None
+        return [Document(**doc) for doc in json.loads(value)]
+
+    def put_results(self, query: str, k: int, backend: str, documents: list[Document]) -> None:
+        """Caches the top-k documents for a query under the current corpus version."""
+        value = json.dumps([
+            {"id": doc.id, "page_content": doc.page_content, "metadata": doc.metadata} for doc in documents
+        ])
+        self._put(self._results_key(query, k, backend), value.encode("utf-8"))
+
+    def get_embedding(self, query: str) -> Optional[list[float]]:
+        """Returns the cached embedding of a query, or None on a miss."""
+        value = self._get(self._embedding_key(query))
+        record_event("cache", "query_embedding", hit=value is not None)
+        if value is None:
+            return None
+        return np.frombuffer(value, dtype=np.float32).tolist()
+
+    def put_embedding(self, query: str, embedding: list[float]) -> None:
+        """Caches the embedding of a query."""
+        self._put(self._embedding_key(query), np.asarray(embedding, dtype=np.float32).tobytes())
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters for both tiers."""
+        return {"memory_hits": self.memory_hits, **self.store.stats()}
+
+
+class LazyEmbeddings(Embeddings):
+    """Defers loading an embedding model until the first cache miss needs it."""
+
+    def __init__(self, factory: Callable[[], Embeddings]):
+        self._factory = factory
+        self._embeddings = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Embeddings:
+        with self._lock:
+            if self._embeddings is None:
+                self._embeddings = self._factory()
+            return self._embeddings
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._load().embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._load().embed_query(text)
+
+
+class CachingRetriever(BaseRetriever):
+    """
+    A retriever that serves repeated queries from a `RetrievalCache` and only
+    embeds a query (and searches the store) on a miss.
+    """
+
+    embeddings: Embeddings
+    search_by_vector: Callable[[list[float], int], list[Document]]
+    cache: RetrievalCache
+    backend: str
+    k: int = 5
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        documents = self.cache.get_results(query, self.k, self.backend)
+        if documents is not None:
+            return documents
+
+        embedding = self.cache.get_embedding(query)
+        if embedding is None:
+            embedding = self.embeddings.embed_query(query)
+            self.cache.put_embedding(query, embedding)
+
+        documents = self.search_by_vector(embedding, self.k)
+        self.cache.put_results(query, self.k, self.backend, documents)
+        return documents
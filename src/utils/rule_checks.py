@@ -0,0 +1,306 @@
+import re
+import ast
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from src.utils.code_diff import Route, extract_routes
+
+# Matches the start of a rule bullet in the policy documents, e.g. "- **Rule 2.1:** ..."
+RULE_BULLET_PATTERN = re.compile(r"^\s*-\s*\*\*Rule (\d+\.\d+):\*\*", re.MULTILINE)
+
+SNAKE_CASE_PATTERN = re.compile(r"^[a-z][a-z0-9]*(_[a-z0-9]+)*$")
+KEBAB_CASE_PATTERN = re.compile(r"^[a-z0-9]+(-[a-z0-9]+)*$")
+VERSION_SEGMENT_PATTERN = re.compile(r"^v\d+$")
+API_KEY_PARAM_PATTERN = re.compile(r"^(x[-_])?(api[-_]?key|access[-_]?token|token|key|secret)$", re.IGNORECASE)
+
+# Calls whose arguments become the JSON body of a response.
+RESPONSE_CALLS = {"jsonify", "JSONResponse", "make_response", "Response", "ORJSONResponse"}
+# FastAPI parameter annotations that are sent as query parameters by default.
+QUERY_SCALAR_TYPES = {"str", "int", "float", "bool", "Optional", "List", "list"}
+# Request attributes holding query parameters: Flask's `args` and `values`, Starlette's `query_params`.
+QUERY_CONTAINERS = {"args", "values", "query_params"}
+
+# Words whose plural form does not end in a plain "s", and words ending in "s" that are not plurals.
+IRREGULAR_PLURALS = {"people", "children", "men", "women", "mice", "geese", "feet", "teeth", "criteria", "media", "indices"}
+NOT_PLURAL = {"news", "series", "species", "canvas", "gas", "lens", "alias", "bias", "chaos", "ethos", "kudos", "physics"}
+
+
+@dataclass
+class RuleCheckResult:
+    """The outcome of a deterministic rule check."""
+    status: str
+    message: str
+
+
+@dataclass
+class SnippetFacts:
+    """Facts about a code snippet that the rule checkers work from, extracted once per snippet."""
+    routes: list[Route] = field(default_factory=list)
+    query_params: list[str] = field(default_factory=list)
+    # The query is also accessed in a way that hides which parameters are read
+    dynamic_query_access: bool = False
+    json_keys: list[str] = field(default_factory=list)
+
+
+RuleChecker = Callable[[SnippetFacts], Optional[RuleCheckResult]]
+
+# Registry of deterministic checkers keyed by rule ID (e.g. "2.1"). A checker
+# returns None when it cannot reach a conclusive verdict for the snippet.
+RULE_CHECKERS: dict[str, RuleChecker] = {}
+
+
+def register_rule_checker(rule_id: str):
+    """Decorator that registers a deterministic checker for the given rule ID."""
+    def decorator(checker: RuleChecker) -> RuleChecker:
+        RULE_CHECKERS[rule_id] = checker
+        return checker
+    return decorator
+
+
+def split_rules(doc: str) -> list[tuple[Optional[str], str]]:
+    """
+    Splits a policy document chunk into its rule bullets.
+
+    Returns:
+        list[tuple[Optional[str], str]]: (rule ID, rule text) pairs. Text that does not
+        belong to a recognizable rule bullet is returned with a rule ID of None.
+    """
+    matches = list(RULE_BULLET_PATTERN.finditer(doc))
+    if not matches:
+        return [(None, doc)]
+
+    rules = []
+    leading_text = doc[:matches[0].start()].strip()
+    if leading_text:
+        rules.append((None, leading_text))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(doc)
+        rules.append((match.group(1), doc[match.start():end].strip()))
+    return rules
+
+
+def _string_value(node: ast.AST) -> Optional[str]:
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    return None
+
+
+def _dict_keys(node: ast.AST) -> list[str]:
+    """Returns the string keys of a dict literal, including those of nested dicts and lists."""
+    keys = []
+    for child in ast.walk(node):
+        if not isinstance(child, ast.Dict):
+            continue
+        for key in child.keys:
+            value = _string_value(key) if key is not None else None
+            if value is not None:
+                keys.append(value)
+    return keys
+
+
+def _call_name(node: ast.Call) -> str:
+    if isinstance(node.func, ast.Name):
+        return node.func.id
+    if isinstance(node.func, ast.Attribute):
+        return node.func.attr
+    return ""
+
+
+def _query_params_read(tree: ast.AST) -> tuple[list[str], bool]:
+    """
+    Finds the query parameters read through Flask's `request.args`/`request.values`
+    or Starlette's `query_params`.
+
+    Returns:
+        tuple[list[str], bool]: The names of the parameters read by constant name
+        (`.get("name")`, `["name"]`, `"name" in ...`), and whether the query is also
+        accessed any other way (a non-constant key, `to_dict()`, iteration, `**`
+        unpacking, passing it on), which hides the parameters that are read.
+    """
+    parents = {child: node for node in ast.walk(tree) for child in ast.iter_child_nodes(node)}
+    params, dynamic = [], False
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Attribute) or node.attr not in QUERY_CONTAINERS:
+            continue
+        parent = parents.get(node)
+        if isinstance(parent, ast.Call) and parent.func is node:
+            # A method such as `dict.values()`, not a query container
+            continue
+        name = None
+        if isinstance(parent, ast.Attribute) and parent.attr in ("get", "getlist"):
+            call = parents.get(parent)
+            if isinstance(call, ast.Call) and call.func is parent and call.args:
+                name = _string_value(call.args[0])
+        elif isinstance(parent, ast.Subscript) and parent.value is node:
+            name = _string_value(parent.slice)
+        elif (isinstance(parent, ast.Compare) and node in parent.comparators
+              and all(isinstance(op, (ast.In, ast.NotIn)) for op in parent.ops)):
+            name = _string_value(parent.left)
+        if name is None:
+            dynamic = True
+        else:
+            params.append(name)
+    return params, dynamic
+
+
+def _fastapi_query_params(function: ast.AST, routes: list[Route]) -> list[str]:
+    """Returns route function parameters that FastAPI treats as query parameters."""
+    path_params = set(re.findall(r"[{<](?:\w+:)?(\w+)[}>]", " ".join(route.path for route in routes)))
+    args = function.args
+    defaults = [None] * (len(args.args) - len(args.defaults)) + list(args.defaults)
+    params = []
+    for arg, default in zip(args.args, defaults):
+        if arg.arg in path_params or arg.arg in ("self", "cls"):
+            continue
+        if isinstance(default, ast.Call) and _call_name(default) == "Query":
+            params.append(arg.arg)
+        elif arg.annotation is not None and not isinstance(default, ast.Call):
+            annotation = arg.annotation
+            base = annotation.value if isinstance(annotation, ast.Subscript) else annotation
+            if isinstance(base, ast.Name) and base.id in QUERY_SCALAR_TYPES:
+                params.append(arg.arg)
+    return params
+
+
+def _response_json_keys(tree: ast.AST) -> list[str]:
+    """Returns the keys of dict literals that are returned or passed to a response constructor."""
+    # Dict literals assigned to plain names, so `return jsonify(user_data)` can be resolved
+    assigned = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign) and isinstance(node.value, ast.Dict):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    assigned[target.id] = node.value
+
+    bodies = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and _call_name(node) in RESPONSE_CALLS:
+            bodies.extend(node.args)
+            bodies.extend(keyword.value for keyword in node.keywords if keyword.arg == "content")
+        elif isinstance(node, ast.Return) and node.value is not None:
+            bodies.append(node.value)
+
+    keys = []
+    for body in bodies:
+        # A tuple return such as `return {...}, 201`
+        candidates = body.elts if isinstance(body, ast.Tuple) else [body]
+        for candidate in candidates:
+            if isinstance(candidate, ast.Name) and candidate.id in assigned:
+                candidate = assigned[candidate.id]
+            if isinstance(candidate, (ast.Dict, ast.List)):
+                keys.extend(_dict_keys(candidate))
+    return list(dict.fromkeys(keys))
+
+
+def extract_snippet_facts(code: str) -> Optional[SnippetFacts]:
+    """Parses a snippet and extracts its routes, query parameters and JSON keys. Returns None if it does not parse."""
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return None
+
+    facts = SnippetFacts()
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            routes = extract_routes(node)
+            facts.routes.extend(routes)
+            if routes and not isinstance(node, ast.ClassDef):
+                facts.query_params.extend(_fastapi_query_params(node, routes))
+    params, facts.dynamic_query_access = _query_params_read(tree)
+    facts.query_params = list(dict.fromkeys(facts.query_params + params))
+    facts.json_keys = _response_json_keys(tree)
+    return facts
+
+
+def _static_segments(path: str) -> list[str]:
+    """Returns the literal segments of a route path, skipping parameters and version prefixes."""
+    return [
+        segment for segment in path.split("/")
+        if segment and not segment.startswith(("<", "{")) and not VERSION_SEGMENT_PATTERN.match(segment)
+    ]
+
+
+def _is_plural(segment: str) -> bool:
+    """Whether the last word of a kebab-case URL segment is clearly a plural noun."""
+    word = segment.rsplit("-", 1)[-1]
+    if word in IRREGULAR_PLURALS:
+        return True
+    # "-ss", "-us" and "-is" words (address, status, analysis) are singular
+    return word.endswith("s") and not word.endswith(("ss", "us", "is")) and word not in NOT_PLURAL
+
+
+@register_rule_checker("1.4")
+def check_api_keys_not_in_query(facts: SnippetFacts) -> Optional[RuleCheckResult]:
+    """Rule 1.4: API keys must not be transmitted as query parameters."""
+    if not facts.routes:
+        return None
+    offending = [param for param in facts.query_params if API_KEY_PARAM_PATTERN.match(param)]
+    if offending:
+        return RuleCheckResult("Non-compliant", f"Credentials are read from query parameters ({', '.join(offending)}) instead of the Authorization header.")
+    if facts.dynamic_query_access:
+        return None
+    return RuleCheckResult("Compliant", "No API keys or tokens are read from query parameters.")
+
+
+@register_rule_checker("2.1")
+def check_version_prefix(facts: SnippetFacts) -> Optional[RuleCheckResult]:
+    """Rule 2.1: API versions must be included in the URL path."""
+    if not facts.routes:
+        return None
+    unversioned = [route for route in facts.routes if not any(VERSION_SEGMENT_PATTERN.match(s) for s in route.path.split("/"))]
+    if not unversioned:
+        return RuleCheckResult("Compliant", "All routes include a version prefix such as /v1/.")
+    # Blueprints and routers may receive the version through a url_prefix defined elsewhere
+    if any(route.owner != "app" for route in unversioned):
+        return None
+    paths = ", ".join(route.path for route in unversioned)
+    return RuleCheckResult("Non-compliant", f"The route(s) {paths} do not include a version prefix such as /v1/.")
+
+
+@register_rule_checker("5.1")
+def check_resource_names(facts: SnippetFacts) -> Optional[RuleCheckResult]:
+    """Rule 5.1: Resource names in URLs should be plural and use kebab-case."""
+    if not facts.routes:
+        return None
+    segments = [segment for route in facts.routes for segment in _static_segments(route.path)]
+    not_kebab = [segment for segment in segments if not KEBAB_CASE_PATTERN.match(segment)]
+    if not_kebab:
+        return RuleCheckResult("Non-compliant", f"The URL segment(s) {', '.join(not_kebab)} are not kebab-case.")
+    # Plurality is only decided mechanically when every segment is clearly plural
+    if segments and all(_is_plural(segment) for segment in segments):
+        return RuleCheckResult("Compliant", "All resource names in the URL are plural and kebab-case.")
+    return None
+
+
+@register_rule_checker("5.2")
+def check_json_keys(facts: SnippetFacts) -> Optional[RuleCheckResult]:
+    """Rule 5.2: JSON property names should use snake_case."""
+    if not facts.json_keys:
+        return None
+    offending = [key for key in facts.json_keys if not SNAKE_CASE_PATTERN.match(key)]
+    if offending:
+        return RuleCheckResult("Non-compliant", f"The JSON property name(s) {', '.join(offending)} are not snake_case.")
+    return RuleCheckResult("Compliant", "All JSON property names use snake_case.")
+
+
+@register_rule_checker("5.3")
+def check_query_params(facts: SnippetFacts) -> Optional[RuleCheckResult]:
+    """Rule 5.3: Query parameters should use snake_case."""
+    if not facts.routes:
+        return None
+    offending = [param for param in facts.query_params if not SNAKE_CASE_PATTERN.match(param)]
+    if offending:
+        return RuleCheckResult("Non-compliant", f"The query parameter(s) {', '.join(offending)} are not snake_case.")
+    if facts.dynamic_query_access:
+        return None
+    if not facts.query_params:
+        return RuleCheckResult("Compliant", "The endpoint reads no query parameters.")
+    return RuleCheckResult("Compliant", "All query parameters use snake_case.")
+
+
+def check_rule(rule_id: str, facts: Optional[SnippetFacts]) -> Optional[RuleCheckResult]:
+    """Runs the registered checker for a rule. Returns None if there is none or it is inconclusive."""
+    checker = RULE_CHECKERS.get(rule_id)
+    if checker is None or facts is None:
+        return None
+    return checker(facts)
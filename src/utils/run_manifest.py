@@ -0,0 +1,78 @@
+import os
+import json
+import time
+import threading
+from typing import Optional
+
+MANIFEST_FILE = "manifest.json"
+CHECKPOINT_DB_FILE = "checkpoints.sqlite3"
+
+# File statuses recorded in the manifest
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+# Left out of the graph by the relevance pre-filter
+SKIPPED = "skipped"
+
+
+class RunManifest:
+    """
+    Tracks the status of every file of a multi-file run in `manifest.json`.
+
+    The manifest is keyed by the resolved commit pair and the policy corpus
+    version. Opening it for a different run starts a fresh manifest, so a resumed
+    run never trusts reports produced against other commits or policies. Every
+    update is written atomically, so the manifest survives the process dying.
+    """
+
+    def __init__(self, output_dir: str, old_commit: str, new_commit: str, corpus_version: str, resume: bool = False):
+        """
+        Args:
+            output_dir (str): The run's output directory, which holds the manifest.
+            old_commit (str): The resolved SHA of the old commit.
+            new_commit (str): The resolved SHA of the new commit.
+            corpus_version (str): The policy corpus version the run validates against.
+            resume (bool): Keep the statuses of an existing manifest for the same run.
+        """
+        self.path = os.path.join(output_dir, MANIFEST_FILE)
+        self._lock = threading.Lock()
+        self.data = {"old_commit": old_commit, "new_commit": new_commit, "corpus_version": corpus_version, "files": {}}
+
+        if resume and os.path.exists(self.path):
+            with open(self.path) as f:
+                previous = json.load(f)
+            if all(previous.get(key) == self.data[key] for key in ("old_commit", "new_commit", "corpus_version")):
+                self.data["files"] = previous.get("files", {})
+            else:
+                print("WARNING: The existing manifest belongs to a different commit pair or policy version. Starting over.")
+        self._write()
+
+    def is_done(self, file_path: str) -> bool:
+        """Whether a file already completed in this run and its report is still on disk."""
+        entry = self.data["files"].get(file_path)
+        return bool(entry) and entry["status"] == DONE and os.path.exists(os.path.join(entry["output_dir"], "report.md"))
+
+    def status(self, file_path: str) -> Optional[str]:
+        entry = self.data["files"].get(file_path)
+        return entry["status"] if entry else None
+
+    def update(self, file_path: str, status: str, **fields) -> None:
+        """Sets a file's status (and any extra fields such as `output_dir` or `error`)."""
+        with self._lock:
+            entry = self.data["files"].setdefault(file_path, {})
+            entry.update(fields, status=status, updated_at=time.time())
+            self._write()
+
+    def counts(self) -> dict:
+        counts = {}
+        for entry in self.data["files"].values():
+            counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        return counts
+
+    def _write(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "w") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(temporary_path, self.path)
@@ -0,0 +1,265 @@
+import os
+import json
+import time
+import threading
+import contextvars
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.runnables import RunnableConfig
+
+from src.llm.tokens import count_tokens
+
+# --- Configuration ---
+TRACE_FILE = "trace.json"
+RUN_TRACE_FILE = "run_trace.json"
+# Prices used to estimate LLM cost, in USD per 1,000 tokens (0 disables the estimate)
+LLM_PROMPT_PRICE_PER_1K = float(os.environ.get("LLM_PROMPT_PRICE_PER_1K", "0"))
+LLM_COMPLETION_PRICE_PER_1K = float(os.environ.get("LLM_COMPLETION_PRICE_PER_1K", "0"))
+
+_current_trace: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("current_trace", default=None)
+
+
+class Trace:
+    """
+    A thread-safe record of timed events for one workflow run.
+
+    Events are plain dicts with a `kind` ("node", "llm", "retrieval", "cache", ...),
+    a `name`, an optional `duration_s` and any extra fields. Parallel graph
+    branches record into the same trace.
+    """
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.events: list[dict] = []
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, name: str, duration_s: Optional[float] = None, **fields: Any) -> None:
+        """Appends an event to the trace."""
+        event = {"kind": kind, "name": name, "at_s": round(time.perf_counter() - self._start, 6)}
+        if duration_s is not None:
+            event["duration_s"] = round(duration_s, 6)
+        event.update(fields)
+        with self._lock:
+            self.events.append(event)
+
+    @contextmanager
+    def span(self, kind: str, name: str, **fields: Any):
+        """Times the enclosed block and records it as one event, even if it raises."""
+        start = time.perf_counter()
+        try:
+            yield fields
+        finally:
+            self.record(kind, name, time.perf_counter() - start, **fields)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            events = list(self.events)
+        return {
+            "label": self.label,
+            "started_at": self.started_at,
+            "wall_time_s": round(self.elapsed(), 6),
+            "summary": summarize_events(events),
+            "events": events,
+        }
+
+    def write(self, path: str) -> None:
+        """Writes the trace as JSON."""
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+def summarize_events(events: list[dict]) -> dict:
+    """
+    Aggregates trace events into per-kind, per-name timings plus LLM token,
+    retry and cache counters.
+    """
+    timings = defaultdict(list)
+    for event in events:
+        if "duration_s" in event:
+            timings[f"{event['kind']}:{event['name']}"].append(event["duration_s"])
+
+    llm_events = [e for e in events if e["kind"] == "llm"]
+    billed = [e for e in llm_events if not e.get("cached")]
+    prompt_tokens = sum(e.get("prompt_tokens", 0) for e in billed)
+    completion_tokens = sum(e.get("completion_tokens", 0) for e in billed)
+
+    caches = defaultdict(lambda: {"hits": 0, "misses": 0})
+    for event in events:
+        if event["kind"] == "cache":
+            caches[event["name"]]["hits" if event.get("hit") else "misses"] += 1
+
+    return {
+        "timings": {
+            key: {
+                "count": len(durations),
+                "total_s": round(sum(durations), 6),
+                "mean_s": round(sum(durations) / len(durations), 6),
+                "max_s": round(max(durations), 6),
+            }
+            for key, durations in sorted(timings.items())
+        },
+        "llm": {
+            "calls": len(llm_events),
+            "cached_calls": len(llm_events) - len(billed),
+            "errors": sum(1 for e in events if e["kind"] == "llm_error"),
+            "retries": sum(1 for e in events if e["kind"] == "llm_retry"),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "estimated_cost_usd": _estimate_cost(prompt_tokens, completion_tokens),
+        },
+        "caches": dict(caches),
+    }
+
+
+def _estimate_cost(prompt_tokens: int, completion_tokens: int) -> float:
+    return round(prompt_tokens / 1000 * LLM_PROMPT_PRICE_PER_1K + completion_tokens / 1000 * LLM_COMPLETION_PRICE_PER_1K, 6)
+
+
+class RunTraceSummary:
+    """
+    Aggregates per-file traces into a run summary as files finish.
+
+    Only each trace's summary is kept, not its events, so a run's memory does
+    not grow with the events of every file. Stage traces cover run-level stages
+    (such as the run report): they count towards the totals and are listed
+    under "stages" rather than as files.
+    """
+
+    def __init__(self):
+        self.per_file = {}
+        self.stages = {}
+        self._timings = {}
+        self._llm = defaultdict(int)
+        self._caches = defaultdict(lambda: {"hits": 0, "misses": 0})
+        self._lock = threading.Lock()
+
+    def add(self, trace: Trace, stage: bool = False) -> None:
+        summary = trace.to_dict()["summary"]
+        with self._lock:
+            (self.stages if stage else self.per_file)[trace.label] = summary
+            for key, timing in summary["timings"].items():
+                count, total_s, max_s = self._timings.get(key, (0, 0.0, 0.0))
+                self._timings[key] = (count + timing["count"], total_s + timing["total_s"], max(max_s, timing["max_s"]))
+            for key, value in summary["llm"].items():
+                if key != "estimated_cost_usd":
+                    self._llm[key] += value
+            for name, counts in summary["caches"].items():
+                self._caches[name]["hits"] += counts["hits"]
+                self._caches[name]["misses"] += counts["misses"]
+
+    def to_dict(self, wall_time_s: float) -> dict:
+        with self._lock:
+            llm = dict(self._llm)
+            llm["estimated_cost_usd"] = _estimate_cost(llm.get("prompt_tokens", 0), llm.get("completion_tokens", 0))
+            summary = {
+                "files": len(self.per_file),
+                "wall_time_s": round(wall_time_s, 6),
+                "summary": {
+                    "timings": {
+                        key: {"count": count, "total_s": round(total_s, 6), "mean_s": round(total_s / count, 6), "max_s": max_s}
+                        for key, (count, total_s, max_s) in sorted(self._timings.items())
+                    },
+                    "llm": llm,
+                    "caches": {name: dict(counts) for name, counts in self._caches.items()},
+                },
+                "per_file": dict(self.per_file),
+            }
+            if self.stages:
+                summary["stages"] = dict(self.stages)
+        return summary
+
+
+def current_trace() -> Optional[Trace]:
+    """Returns the trace of the workflow run executing in this context, if any."""
+    return _current_trace.get()
+
+
+@contextmanager
+def use_trace(trace: Optional[Trace]):
+    """Makes `trace` the current trace for the enclosed block."""
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def span(kind: str, name: str, **fields: Any):
+    """Times the enclosed block into the current trace; does nothing without one."""
+    trace = current_trace()
+    if trace is None:
+        yield fields
+        return
+    with trace.span(kind, name, **fields) as span_fields:
+        yield span_fields
+
+
+def record_event(kind: str, name: str, duration_s: Optional[float] = None, **fields: Any) -> None:
+    """Records an event into the current trace; does nothing without one."""
+    trace = current_trace()
+    if trace is not None:
+        trace.record(kind, name, duration_s, **fields)
+
+
+def traced_node(name: str, node: Callable[[dict], dict]) -> Callable[[dict, RunnableConfig], dict]:
+    """
+    Wraps a graph node so its wall time is recorded. The trace is taken from
+    `config["configurable"]["trace"]` and made current while the node runs, so
+    LLM, retrieval and cache events inside the node land in the same trace.
+    """
+    # Not `functools.wraps`: LangGraph inspects the signature to decide whether to pass `config`
+    def wrapper(state: dict, config: RunnableConfig) -> dict:
+        trace = (config or {}).get("configurable", {}).get("trace") or current_trace()
+        with use_trace(trace), span("node", name):
+            return node(state)
+    return wrapper
+
+
+class TraceCallbackHandler(BaseCallbackHandler):
+    """Records latency, token counts, errors and retries of chat model calls into the current trace."""
+
+    def __init__(self):
+        self._started: dict[UUID, tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized: dict, messages: list, *, run_id: UUID, **kwargs: Any) -> None:
+        prompt_tokens = sum(
+            count_tokens(message.content) for batch in messages for message in batch if isinstance(message.content, str)
+        )
+        with self._lock:
+            self._started[run_id] = (time.perf_counter(), prompt_tokens)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            start, prompt_tokens = self._started.pop(run_id, (time.perf_counter(), 0))
+        completion_tokens = 0
+        cached = False
+        for generation in (response.generations or [[]])[0]:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            # LangChain zeroes `total_cost` on generations served from the cache
+            cached = cached or usage.get("total_cost") == 0
+            prompt_tokens = usage.get("input_tokens", prompt_tokens)
+            completion_tokens += usage.get("output_tokens", count_tokens(generation.text))
+        record_event(
+            "llm", "chat", time.perf_counter() - start,
+            prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, cached=cached,
+        )
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            start, _ = self._started.pop(run_id, (time.perf_counter(), 0))
+        record_event("llm_error", type(error).__name__, time.perf_counter() - start, message=str(error)[:200])
+
+    def on_retry(self, retry_state: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        record_event("llm_retry", "chat", attempt=getattr(retry_state, "attempt_number", None))
@@ -3,6 +3,9 @@ from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import Chroma
 from sentence_transformers import SentenceTransformer
 from langchain_huggingface import HuggingFaceEmbeddings
+from src.utils.numpy_index import NumpyRetriever, NumpyVectorIndex
+from src.utils.hybrid_retriever import HybridRetriever
+from src.utils.retrieval_cache import CachingRetriever, LazyEmbeddings, RetrievalCache
 
 from dotenv import load_dotenv
 
@@ -10,17 +13,46 @@ load_dotenv()
 
 # --- Configuration ---
 VECTOR_STORE_DIR = "db"
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+# "chroma" (persistent Chroma client), "numpy" (in-process memory-mapped matrix)
+# or "hybrid" (BM25 + embeddings over the NumPy index, with category filtering)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+RETRIEVER_BACKENDS = ("chroma", "numpy", "hybrid")
 
-def get_retriever(k_results=5):
+def get_embeddings():
+    """Returns the embedding model shared by ingestion and retrieval."""
+    #embeddings = OpenAIEmbeddings(api_key=api_key)
+    return HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL
+    )
+
+_retrieval_cache = None
+
+def get_retrieval_cache() -> RetrievalCache:
+    """Returns the process-wide query embedding and retrieval cache."""
+    global _retrieval_cache
+    if _retrieval_cache is None:
+        _retrieval_cache = RetrievalCache(VECTOR_STORE_DIR, EMBEDDING_MODEL)
+    return _retrieval_cache
+
+def get_retriever(k_results=5, backend=None, use_cache=None):
     """
-    Initializes and returns a Chroma vector store retriever.
+    Initializes and returns a vector store retriever.
 
     Args:
         k_results (int): The number of top results to retrieve.
+        backend (str): "chroma", "numpy" or "hybrid". Defaults to the `VECTOR_BACKEND` environment variable.
+        use_cache (bool): Serve repeated queries from the retrieval cache without
+                          loading the embedding model. Defaults to on unless
+                          `RETRIEVAL_CACHE_DISABLED=1` is set.
 
     Returns:
-        Chroma.as_retriever: A retriever object ready to find relevant documents.
+        BaseRetriever: A retriever object ready to find relevant documents.
     """
+    backend = backend or VECTOR_BACKEND
+    if backend not in RETRIEVER_BACKENDS:
+        raise ValueError(f"Unknown retriever backend '{backend}'. Expected one of {RETRIEVER_BACKENDS}.")
+
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise ValueError("OPENAI_API_KEY not found in environment variables.")
@@ -31,16 +63,40 @@ def get_retriever(k_results=5):
             "Please run the `ingest.py` script first."
         )
 
-    #embeddings = OpenAIEmbeddings(api_key=api_key)
-    embeddings = HuggingFaceEmbeddings(
-    model_name="sentence-transformers/all-MiniLM-L6-v2"
-)
-    vector_store = Chroma(
-        persist_directory=VECTOR_STORE_DIR,
-        embedding_function=embeddings
+    if use_cache is None:
+        use_cache = os.getenv("RETRIEVAL_CACHE_DISABLED", "").lower() not in ("1", "true", "yes")
+
+    # The model is only loaded when a query actually needs embedding
+    embeddings = LazyEmbeddings(get_embeddings)
+    if backend == "hybrid":
+        # Results depend on the changed code as well as the query, so only embeddings are cached
+        return HybridRetriever.from_index(
+            NumpyVectorIndex(VECTOR_STORE_DIR),
+            embeddings,
+            cache=get_retrieval_cache() if use_cache else None,
+            k=k_results,
+        )
+    if backend == "numpy":
+        index = NumpyVectorIndex(VECTOR_STORE_DIR)
+        if not use_cache:
+            return NumpyRetriever(index=index, embeddings=embeddings, k=k_results)
+        search_by_vector = lambda vector, k: [index.document(i, score) for i, score in index.search(vector, k)[0]]
+    else:
+        vector_store = Chroma(
+            persist_directory=VECTOR_STORE_DIR,
+            embedding_function=embeddings
+        )
+        if not use_cache:
+            return vector_store.as_retriever(search_kwargs={"k": k_results})
+        search_by_vector = lambda vector, k: vector_store.similarity_search_by_vector(vector, k=k)
+
+    return CachingRetriever(
+        embeddings=embeddings,
+        search_by_vector=search_by_vector,
+        cache=get_retrieval_cache(),
+        backend=backend,
+        k=k_results,
     )
-    
-    return vector_store.as_retriever(search_kwargs={"k": k_results})
 
 if __name__ == '__main__':
     # Example usage:
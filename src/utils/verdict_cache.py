@@ -0,0 +1,78 @@
+import os
+import json
+import hashlib
+import threading
+from typing import Optional
+
+from src.graph.state import PROMPT_VERSION, Verdict
+from src.utils.kv_store import SQLiteKVStore
+from src.utils.tracing import record_event
+
+# --- Configuration ---
+VERDICT_CACHE_PATH = os.environ.get("VERDICT_CACHE_PATH", os.path.join(".cache", "verdict_cache.sqlite3"))
+VERDICT_CACHE_MAX_MB = int(os.environ.get("VERDICT_CACHE_MAX_MB", "64"))
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class VerdictCache:
+    """
+    A persistent memo of validation verdicts.
+
+    Verdicts are keyed by the snippet, the rule ID and the rule text, so an
+    identical endpoint seen again in another file, commit or repository reuses
+    its earlier verdict. Editing a rule's wording, bumping `PROMPT_VERSION`,
+    switching models or switching to a validation mode with a different prompt
+    changes its key.
+    """
+
+    def __init__(self, path: str = VERDICT_CACHE_PATH, max_bytes: int = VERDICT_CACHE_MAX_MB * 1024 * 1024):
+        self.store = SQLiteKVStore(path, max_bytes=max_bytes, table="structured_verdicts")
+
+    @staticmethod
+    def _key(code: str, rule_id: Optional[str], rule_text: str, model: str, prompt: str) -> str:
+        return (
+            f"{PROMPT_VERSION}:{_digest(model)}:{_digest(prompt)}:"
+            f"{_digest(code.strip())}:{rule_id or '-'}:{_digest(rule_text.strip())}"
+        )
+
+    def get(self, code: str, rule_id: Optional[str], rule_text: str, model: str = "", prompt: str = "") -> Optional[Verdict]:
+        """
+        Returns the memoized verdict for a snippet and rule, or None on a miss.
+
+        Args:
+            model (str): Identifies the model (and its parameters) that judged the rule.
+            prompt (str): The prompt template the rule was judged with.
+        """
+        value = self.store.get(self._key(code, rule_id, rule_text, model, prompt))
+        record_event("cache", "verdict", hit=value is not None)
+        return json.loads(value) if value is not None else None
+
+    def put(self, code: str, rule_id: Optional[str], rule_text: str, verdict: Verdict, model: str = "",
+            prompt: str = "") -> None:
+        """Memoizes the verdict for a snippet and rule."""
+        self.store.put(self._key(code, rule_id, rule_text, model, prompt), json.dumps(verdict).encode("utf-8"))
+
+    def stats(self) -> dict:
+        """Returns the hit/miss counters and size of the cache."""
+        return self.store.stats()
+
+
+_verdict_cache: Optional[VerdictCache] = None
+_verdict_cache_lock = threading.Lock()
+
+
+def get_verdict_cache() -> Optional[VerdictCache]:
+    """
+    Returns the process-wide verdict cache, or None when it is disabled with
+    `VERDICT_CACHE_DISABLED=1`.
+    """
+    global _verdict_cache
+    if os.environ.get("VERDICT_CACHE_DISABLED", "").lower() in ("1", "true", "yes"):
+        return None
+    with _verdict_cache_lock:
+        if _verdict_cache is None:
+            _verdict_cache = VerdictCache()
+        return _verdict_cache
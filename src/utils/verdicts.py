@@ -0,0 +1,195 @@
+import os
+import re
+import json
+from typing import Optional
+
+from src.graph.state import Verdict
+
+# Artifacts holding a file's (or run's) verdicts in machine-readable form
+VERDICTS_FILE = "verdicts.json"
+SARIF_FILE = "results.sarif"
+
+COMPLIANT = "Compliant"
+NON_COMPLIANT = "Non-compliant"
+NOT_EVALUATED = "Not evaluated"
+LLM_STATUSES = (COMPLIANT, NON_COMPLIANT)
+
+# The JSON object the LLM must answer with for each rule
+VERDICT_SCHEMA = {
+    "type": "object",
+    "required": ["verdict", "explanation", "confidence"],
+    "properties": {
+        "verdict": {"enum": list(LLM_STATUSES)},
+        "explanation": {"type": "string", "description": "A brief, one-sentence explanation."},
+        "confidence": {"type": "number", "minimum": 0, "maximum": 1},
+    },
+}
+
+# A verdict at the start of a free-text result, e.g. "Compliant: ..." or "**Non-compliant** - ..."
+VERDICT_PATTERN = re.compile(r"^[\s*_#>-]*(non-compliant|compliant)\b[\s*_:.-]*(.*)$", re.IGNORECASE | re.DOTALL)
+
+SARIF_VERSION = "2.1.0"
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+# Only "fail" results may have a level other than "none" (SARIF 2.1.0, section 3.27.10)
+SARIF_KINDS = {COMPLIANT: ("pass", "none"), NON_COMPLIANT: ("fail", "error"), NOT_EVALUATED: ("review", "none")}
+
+
+def make_verdict(status: str, message: str, rule_id: str = "", confidence: float = 0.0, source: str = "llm") -> Verdict:
+    """Creates a verdict that is not yet attached to a change unit or file."""
+    return Verdict(rule_id=rule_id or "", status=status, message=message.strip(), confidence=confidence, source=source,
+                   file="", unit="", start_line=0, end_line=0)
+
+
+def _extract_json(text: str, opening: str, closing: str):
+    # The response might be in a markdown code block or surrounded by prose
+    start, end = text.find(opening), text.rfind(closing)
+    if start == -1 or end <= start:
+        raise ValueError(f"no JSON {'array' if opening == '[' else 'object'} found")
+    try:
+        return json.loads(text[start:end + 1])
+    except json.JSONDecodeError as e:
+        raise ValueError(f"invalid JSON ({e})") from e
+
+
+def _check_verdict_object(value, where: str = "the response") -> dict:
+    """Validates one LLM verdict object against `VERDICT_SCHEMA`."""
+    if not isinstance(value, dict):
+        raise ValueError(f"{where} must be a JSON object")
+    missing = [key for key in VERDICT_SCHEMA["required"] if key not in value]
+    if missing:
+        raise ValueError(f"{where} is missing {', '.join(missing)}")
+    if value["verdict"] not in LLM_STATUSES:
+        raise ValueError(f"the verdict in {where} must be one of {', '.join(LLM_STATUSES)}, not {value['verdict']!r}")
+    if not isinstance(value["explanation"], str) or not value["explanation"].strip():
+        raise ValueError(f"the explanation in {where} must be a non-empty string")
+    confidence = value["confidence"]
+    if isinstance(confidence, bool) or not isinstance(confidence, (int, float)) or not 0 <= confidence <= 1:
+        raise ValueError(f"the confidence in {where} must be a number between 0 and 1")
+    return value
+
+
+def parse_verdict(text: str, rule_id: str = "") -> Verdict:
+    """
+    Parses an LLM response for one rule.
+
+    Raises:
+        ValueError: If the response does not match `VERDICT_SCHEMA`. The message
+                    explains what is wrong, so it can be sent back in a repair prompt.
+    """
+    value = _check_verdict_object(_extract_json(text, "{", "}"))
+    return make_verdict(value["verdict"], value["explanation"], rule_id, float(value["confidence"]))
+
+
+def parse_verdict_list(text: str, rule_ids: list[str]) -> list[Verdict]:
+    """
+    Parses an LLM response holding one verdict object per numbered rule, in order.
+
+    Raises:
+        ValueError: If the response is not a list of exactly one valid verdict per rule.
+    """
+    values = _extract_json(text, "[", "]")
+    if not isinstance(values, list) or len(values) != len(rule_ids):
+        raise ValueError(f"expected a JSON array of {len(rule_ids)} verdicts")
+    verdicts = []
+    for i, (value, rule_id) in enumerate(zip(values, rule_ids), start=1):
+        value = _check_verdict_object(value, f"verdict {i}")
+        verdicts.append(make_verdict(value["verdict"], value["explanation"], rule_id, float(value["confidence"])))
+    return verdicts
+
+
+def verdict_from_text(text: str, rule_id: str = "", source: str = "llm") -> Verdict:
+    """
+    Best-effort verdict for a free-text result such as "Non-compliant: ...". Its
+    confidence is 0, and text without a recognizable verdict is "Not evaluated".
+    """
+    match = VERDICT_PATTERN.match(text.strip())
+    if not match:
+        return make_verdict(NOT_EVALUATED, text, rule_id, source=source)
+    status = NON_COMPLIANT if match.group(1).lower() == "non-compliant" else COMPLIANT
+    return make_verdict(status, match.group(2), rule_id, source=source)
+
+
+def verdict_text(verdict: Verdict) -> str:
+    """Formats a verdict as a one-line validation result."""
+    rule = f"Rule {verdict['rule_id']} - " if verdict["rule_id"] else ""
+    return f"{verdict['status']}: {rule}{verdict['message']}"
+
+
+def count_verdicts(verdicts: list[Verdict]) -> dict[str, int]:
+    """Counts verdicts per status."""
+    counts = {COMPLIANT: 0, NON_COMPLIANT: 0, NOT_EVALUATED: 0}
+    for verdict in verdicts:
+        counts[verdict["status"]] = counts.get(verdict["status"], 0) + 1
+    return counts
+
+
+def verdicts_document(verdicts: list[Verdict], **fields) -> dict:
+    """The content of `verdicts.json`: status counts plus every verdict (and any extra fields)."""
+    return {**fields, "counts": count_verdicts(verdicts), "verdicts": verdicts}
+
+
+def _rule_ids(verdict: Verdict) -> list[str]:
+    # A verdict on a policy chunk with several rules carries their IDs comma-separated
+    return [rule_id.strip() for rule_id in verdict["rule_id"].split(",") if rule_id.strip()]
+
+
+def to_sarif(verdicts: list[Verdict]) -> dict:
+    """
+    Converts verdicts to a SARIF 2.1.0 log with one result per verdict.
+
+    Non-compliant verdicts are "fail" results at level "error", compliant ones
+    "pass" results and unevaluated ones "review" results, so code-scanning
+    tools can gate on errors alone. Verdicts covering several rules have no
+    `ruleId`; their rule IDs are listed in the result's properties instead.
+    """
+    rule_ids = sorted({rule_id for verdict in verdicts for rule_id in _rule_ids(verdict)})
+    results = []
+    for verdict in verdicts:
+        kind, level = SARIF_KINDS[verdict["status"]]
+        result = {
+            "kind": kind,
+            "level": level,
+            "message": {"text": verdict["message"] or verdict["status"]},
+            "properties": {"confidence": verdict["confidence"], "source": verdict["source"], "unit": verdict["unit"]},
+        }
+        verdict_rule_ids = _rule_ids(verdict)
+        if len(verdict_rule_ids) == 1:
+            result["ruleId"] = verdict_rule_ids[0]
+        elif verdict_rule_ids:
+            result["properties"]["ruleIds"] = verdict_rule_ids
+        if verdict["file"]:
+            location = {"artifactLocation": {"uri": verdict["file"]}}
+            if verdict["start_line"]:
+                location["region"] = {"startLine": verdict["start_line"], "endLine": max(verdict["end_line"], verdict["start_line"])}
+            result["locations"] = [{"physicalLocation": location}]
+        results.append(result)
+
+    driver = {"name": "api-governance-agent", "rules": [{"id": rule_id} for rule_id in rule_ids]}
+    return {"$schema": SARIF_SCHEMA, "version": SARIF_VERSION, "runs": [{"tool": {"driver": driver}, "results": results}]}
+
+
+def write_verdicts(output_dir: str, verdicts: list[Verdict], **fields) -> None:
+    """Writes `verdicts.json` and `results.sarif` for a file or a run."""
+    with open(os.path.join(output_dir, VERDICTS_FILE), "w") as f:
+        json.dump(verdicts_document(verdicts, **fields), f, indent=2)
+    with open(os.path.join(output_dir, SARIF_FILE), "w") as f:
+        json.dump(to_sarif(verdicts), f, indent=2)
+
+
+def read_verdicts(output_dir: str) -> Optional[dict]:
+    """Reads the `verdicts.json` document saved in an output directory, or None if there is none."""
+    path = os.path.join(output_dir, VERDICTS_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def relocate_verdicts(output_dir: str, file_path: str) -> None:
+    """Rewrites the verdicts saved in an output directory for another file path (e.g. after reusing a stored result)."""
+    document = read_verdicts(output_dir)
+    if document is None:
+        return
+    verdicts = [{**verdict, "file": file_path} for verdict in document.pop("verdicts")]
+    document.pop("counts", None)
+    write_verdicts(output_dir, verdicts, **{**document, "file": file_path})
@@ -0,0 +1,34 @@
+import subprocess
+
+import pytest
+
+from src.utils.git_utils import GitObjectReader
+
+
+@pytest.fixture
+def repo(tmp_path):
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=tmp_path, check=True, capture_output=True).stdout.decode().strip()
+
+    git("init", "-q")
+    (tmp_path / "a.py").write_text("x = 1\n")
+    git("add", ".")
+    git("-c", "user.name=a", "-c", "user.email=a@b", "commit", "-qm", "one")
+    return tmp_path, git("rev-parse", "HEAD:a.py")
+
+
+def test_missing_objects_are_left_out(repo):
+    path, blob = repo
+    with GitObjectReader(str(path)) as reader:
+        assert reader.read_blobs([blob, "0" * 39 + "1"]) == {blob: b"x = 1\n"}
+
+
+def test_dead_cat_file_process_raises_and_restarts(repo):
+    path, blob = repo
+    with GitObjectReader(str(path)) as reader:
+        reader._cat_file.kill()
+        reader._cat_file.wait()
+        with pytest.raises(RuntimeError, match="cat-file"):
+            reader.read_blobs([blob])
+        # The process was restarted, so the next read works again
+        assert reader.read_blob(blob) == b"x = 1\n"
@@ -0,0 +1,30 @@
+import pytest
+
+from src.utils.hybrid_retriever import infer_categories
+
+
+@pytest.mark.parametrize("summary", [
+    "A new endpoint /v1/users (list_users) was added.",
+    "The endpoint /v1/accounts (get_account) was modified to return the account status.",
+    "The function parse_input was modified to accept a url.",
+    "The function compute_accurate_separator was added.",
+])
+def test_generic_summary_words_select_no_categories(summary):
+    assert infer_categories(summary) == set()
+
+
+@pytest.mark.parametrize("text, category", [
+    ("RATE_LIMIT = 100", "Rate"),
+    ("@limiter.limit('5/minute')", "Rate"),
+    ("response.headers['Retry-After'] = 30", "Rate"),
+    ("token = request.headers['Authorization']", "Authentication"),
+    ("return jsonify(error), status_code", "Error Handling"),
+    ("api_key = request.args.get('apiKey')", "Security"),
+    ("@app.route('/v1/users')", "Versioning"),
+])
+def test_specific_signals_select_their_category(text, category):
+    assert category in infer_categories(text)
+
+
+def test_keywords_do_not_match_inside_other_words():
+    assert infer_categories("author = 'x'; accurate = separate(operator)") == set()
@@ -0,0 +1,61 @@
+from src.utils import kv_store
+from src.utils.kv_store import SQLiteKVStore
+
+
+def _accessed_at(store: SQLiteKVStore, key: str) -> float:
+    return store._conn.execute(f"SELECT accessed_at FROM {store.table} WHERE key = ?", (key,)).fetchone()[0]
+
+
+def test_hits_are_buffered_until_flush(tmp_path):
+    store = SQLiteKVStore(str(tmp_path / "kv.sqlite"))
+    store.put("a", b"1")
+    written = _accessed_at(store, "a")
+
+    assert store.get("a") == b"1"
+    assert _accessed_at(store, "a") == written
+
+    store.flush()
+    assert _accessed_at(store, "a") > written
+    store.close()
+
+
+def test_buffer_flushes_at_threshold(tmp_path, monkeypatch):
+    monkeypatch.setattr(kv_store, "ACCESS_FLUSH_THRESHOLD", 2)
+    store = SQLiteKVStore(str(tmp_path / "kv.sqlite"))
+    store.put("a", b"1")
+    store.put("b", b"2")
+    written = _accessed_at(store, "a")
+
+    store.get("a")
+    store.get("b")
+
+    assert _accessed_at(store, "a") > written
+    assert not store._pending_access
+    store.close()
+
+
+def test_eviction_sees_buffered_hits(tmp_path):
+    store = SQLiteKVStore(str(tmp_path / "kv.sqlite"), max_bytes=20)
+    store.put("old", b"x" * 8)
+    store.put("new", b"x" * 8)
+    store.get("old")
+
+    store.put("third", b"x" * 8)
+
+    assert store.get("old") is not None
+    assert store.get("new") is None
+    store.close()
+
+
+def test_close_persists_access_times(tmp_path):
+    path = str(tmp_path / "kv.sqlite")
+    store = SQLiteKVStore(path)
+    store.put("a", b"1")
+    written = _accessed_at(store, "a")
+    store.get("a")
+    store.close()
+    store.close()
+
+    reopened = SQLiteKVStore(path)
+    assert _accessed_at(reopened, "a") > written
+    reopened.close()
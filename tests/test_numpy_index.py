@@ -0,0 +1,58 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from src.utils.numpy_index import (
+    INDEX_METADATA_FILE,
+    INDEX_POINTER_FILE,
+    INDEX_VERSION_PREFIX,
+    NumpyVectorIndex,
+    write_numpy_index,
+)
+
+
+def _write(directory, rows: int, dtype: str = "float32") -> str:
+    rng = np.random.default_rng(rows)
+    ids = [f"chunk-{i}" for i in range(rows)]
+    return write_numpy_index(
+        str(directory), ids, rng.normal(size=(rows, 8)), [f"text {i}" for i in ids], [{"n": i} for i in range(rows)], dtype=dtype
+    )
+
+
+def _versions(directory) -> list[str]:
+    return sorted(name for name in os.listdir(directory) if name.startswith(INDEX_VERSION_PREFIX))
+
+
+def test_rewrite_switches_matrix_and_metadata_together(tmp_path):
+    _write(tmp_path, 3)
+    first = NumpyVectorIndex(str(tmp_path))
+
+    _write(tmp_path, 5, dtype="int8")
+    second = NumpyVectorIndex(str(tmp_path))
+
+    assert len(first) == first.matrix.shape[0] == 3
+    assert len(second) == second.matrix.shape[0] == 5
+    assert second.dtype == "int8"
+
+
+def test_only_current_and_previous_versions_are_kept(tmp_path):
+    for rows in (2, 3, 4):
+        _write(tmp_path, rows)
+
+    versions = _versions(tmp_path)
+    assert len(versions) == 2
+    with open(tmp_path / INDEX_POINTER_FILE) as f:
+        assert f.read() == versions[-1]
+
+
+def test_mismatched_row_counts_are_rejected(tmp_path):
+    _write(tmp_path, 3)
+    metadata_path = tmp_path / _versions(tmp_path)[0] / INDEX_METADATA_FILE
+    metadata = json.loads(metadata_path.read_text())
+    metadata["ids"].append("extra")
+    metadata_path.write_text(json.dumps(metadata))
+
+    with pytest.raises(ValueError, match="inconsistent"):
+        NumpyVectorIndex(str(tmp_path))
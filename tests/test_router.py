@@ -0,0 +1,29 @@
+from src.llm.rate_limit import LLMRateLimiter
+from src.llm.router import Deployment, ModelRouter
+
+
+def _deployment(name: str, weight: float = 1.0, tpm: int = 0) -> Deployment:
+    return Deployment(name, "default", model=name, limiter=LLMRateLimiter(rpm=0, tpm=tpm, max_concurrency=4), weight=weight)
+
+
+def test_sequential_requests_split_by_weight():
+    heavy, light = _deployment("heavy", weight=2), _deployment("light", weight=1)
+    router = ModelRouter([heavy, light], {})
+
+    served = [router.call("validator", lambda model: model) for _ in range(300)]
+
+    assert served.count("heavy") == 200
+    assert served.count("light") == 100
+    # Smooth round-robin interleaves the deployments instead of sending bursts to one
+    assert served[:3] == ["heavy", "light", "heavy"]
+
+
+def test_exhausted_token_budget_fails_over_without_waiting():
+    limited, spare = _deployment("limited", weight=2, tpm=1000), _deployment("spare", weight=1)
+    router = ModelRouter([limited, spare], {})
+
+    served = [router.call("validator", lambda model: model, estimated_tokens=600) for _ in range(3)]
+
+    # Once "limited" has spent 600 of its 1000 tokens, it cannot take another 600 right away
+    assert served == ["limited", "spare", "spare"]
+    assert limited.limiter.metrics()["budget_wait_s"] == 0
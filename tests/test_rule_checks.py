@@ -0,0 +1,65 @@
+import pytest
+
+from src.utils.rule_checks import check_rule, extract_snippet_facts
+
+
+def _route(body: str, path: str = "/v1/users") -> str:
+    return (
+        "from flask import Flask, request, jsonify\n"
+        "app = Flask(__name__)\n\n"
+        f"@app.route(\"{path}\")\n"
+        "def handler():\n"
+        + "".join(f"    {line}\n" for line in body.splitlines())
+    )
+
+
+def _status(rule_id: str, code: str):
+    result = check_rule(rule_id, extract_snippet_facts(code))
+    return result.status if result is not None else None
+
+
+@pytest.mark.parametrize("body", [
+    'key = "apiKey"\nreturn jsonify({"value": request.args[key]})',
+    'return jsonify(request.args.to_dict())',
+    'return jsonify({"keys": [name for name in request.args]})',
+    'return jsonify(dict(**request.args))',
+    'name = "token"\nreturn jsonify({"value": request.values.get(name)})',
+])
+def test_dynamic_query_access_is_inconclusive(body):
+    code = _route(body)
+    assert _status("1.4", code) is None
+    assert _status("5.3", code) is None
+
+
+def test_constant_api_key_in_query_is_non_compliant_even_with_dynamic_access():
+    code = _route('data = request.args.to_dict()\nreturn jsonify({"key": request.args.get("api_key")})')
+    assert _status("1.4", code) == "Non-compliant"
+
+
+def test_api_key_membership_test_counts_as_a_read():
+    assert _status("1.4", _route('if "apiKey" in request.args:\n    return jsonify({})\nreturn jsonify({})')) == "Non-compliant"
+
+
+def test_no_query_access_is_compliant():
+    code = _route('values = {"a": 1}.values()\nreturn jsonify({"user_id": 1})')
+    assert _status("1.4", code) == "Compliant"
+    assert _status("5.3", code) == "Compliant"
+
+
+def test_constant_query_params_are_checked_for_snake_case():
+    assert _status("5.3", _route('return jsonify({"page": request.args.get("page_size")})')) == "Compliant"
+    assert _status("5.3", _route('return jsonify({"page": request.args["pageSize"]})')) == "Non-compliant"
+
+
+@pytest.mark.parametrize("path", ["/v1/status", "/v1/address", "/v1/news", "/v1/analysis", "/v1/user"])
+def test_singular_or_uncountable_resource_names_are_inconclusive(path):
+    assert _status("5.1", _route('return jsonify({})', path)) is None
+
+
+@pytest.mark.parametrize("path", ["/v1/users", "/v1/order-items/<int:item_id>", "/v1/people", "/v1/addresses"])
+def test_plural_resource_names_are_compliant(path):
+    assert _status("5.1", _route('return jsonify({})', path)) == "Compliant"
+
+
+def test_non_kebab_resource_names_are_non_compliant():
+    assert _status("5.1", _route('return jsonify({})', "/v1/orderItems")) == "Non-compliant"
@@ -0,0 +1,42 @@
+import pytest
+
+pytest.importorskip("sentence_transformers")
+
+from src.agents.validator import ValidatorAgent
+from src.utils.verdict_cache import VerdictCache
+
+CODE = "@app.route('/v1/users')\ndef users():\n    return jsonify([])"
+RULE = "1.1 Every endpoint must be versioned."
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("LLM_BACKEND", "fake")
+    monkeypatch.setenv("FAKE_LLM_LATENCY_MS", "0")
+    cache = VerdictCache(str(tmp_path / "verdicts.sqlite3"))
+    yield cache
+    cache.store.close()
+
+
+def _validator(mode: str, cache: VerdictCache) -> ValidatorAgent:
+    validator = ValidatorAgent(validation_mode=mode, use_static_checks=False, use_verdict_cache=False)
+    validator.verdict_cache = cache
+    return validator
+
+
+def test_verdicts_are_not_shared_between_prompts(cache):
+    _validator("single", cache)._validate_with_memo(CODE, [RULE])
+
+    _validator("sequential", cache)._validate_with_memo(CODE, [RULE])
+
+    assert cache.stats()["hits"] == 0
+    assert cache.stats()["entries"] == 2
+
+
+def test_modes_with_the_same_prompt_share_verdicts(cache):
+    _validator("sequential", cache)._validate_with_memo(CODE, [RULE])
+
+    _validator("concurrent", cache)._validate_with_memo(CODE, [RULE])
+
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["entries"] == 1